@@ -0,0 +1,41 @@
+"""Bench commands for Gebeya ERP."""
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("backfill-daily-summaries")
+@click.option("--company", required=True, help="Company to backfill")
+@click.option("--from-date", required=True, help="First day (YYYY-MM-DD)")
+@click.option("--to-date", required=True, help="Last day (YYYY-MM-DD), capped at yesterday")
+@click.option("--chunk-days", default=31, show_default=True, help="Days per job")
+@click.option("--now", is_flag=True, help="Run in this process instead of queuing jobs")
+@pass_context
+def backfill_daily_summaries(context, company, from_date, to_date, chunk_days, now):
+    """Create missing Daily Summaries for a date range."""
+    import frappe
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        from gebeyaerp.services import daily_summary
+
+        if now:
+            total = 0
+            from_date, to_date = daily_summary.backfill_range(from_date, to_date)
+            for chunk_from, chunk_to in daily_summary.date_chunks(from_date, to_date, chunk_days):
+                total += daily_summary.generate_summaries(chunk_from, chunk_to, [company])
+                click.echo(f"{chunk_from} → {chunk_to}: {total} summaries created so far")
+            return
+
+        frappe.set_user("Administrator")
+        result = daily_summary.backfill_daily_summaries(company, from_date, to_date, chunk_days)
+        click.echo(
+            f"Queued {len(result['chunks'])} jobs for {result['from_date']} → {result['to_date']}"
+        )
+    finally:
+        frappe.destroy()
+
+
+commands = [backfill_daily_summaries]
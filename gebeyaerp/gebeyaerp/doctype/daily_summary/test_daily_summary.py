@@ -2,6 +2,13 @@ import frappe
 from frappe.tests.utils import FrappeTestCase
 from frappe.utils import add_days, today
 
+_FANOUT_CALLS = []
+
+
+def _fanout_probe(**task):
+    """Fan-out task used by the tests: records the kwargs it ran with."""
+    _FANOUT_CALLS.append(task)
+
 
 class TestDailySummary(FrappeTestCase):
     """Integration tests for the daily summary service.
@@ -75,3 +82,147 @@ class TestDailySummary(FrappeTestCase):
             {"summary_date": self.FUTURE_DATE, "company": company},
         )
         self.assertEqual(count, 0)
+
+    def test_batched_generation_across_companies_without_data(self):
+        """The cross-company pass inserts nothing for an empty range."""
+        from gebeyaerp.services.daily_summary import generate_summaries
+
+        companies = frappe.get_all("Company", filters={"is_group": 0}, pluck="name")
+        inserted = generate_summaries("2099-12-01", self.FUTURE_DATE, companies)
+        self.assertEqual(inserted, 0)
+        self.assertEqual(generate_summaries(self.FUTURE_DATE, self.FUTURE_DATE, []), 0)
+
+    def test_reserved_names_are_consecutive(self):
+        """Bulk-inserted summaries take consecutive names from the naming series."""
+        from gebeyaerp.services.daily_summary import _reserve_names
+
+        first = _reserve_names(2)
+        second = _reserve_names(1)
+        frappe.db.rollback()
+
+        self.assertEqual(len(set(first + second)), 3)
+        self.assertEqual(int(second[0][-4:]), int(first[1][-4:]) + 1)
+
+    def test_backfill_range_is_split_into_chunks(self):
+        """Backfill chunks cover the range exactly, without overlap."""
+        from gebeyaerp.services.daily_summary import date_chunks
+
+        chunks = date_chunks("2099-01-01", "2099-03-05", 31)
+        self.assertEqual([(str(a), str(b)) for a, b in chunks], [
+            ("2099-01-01", "2099-01-31"),
+            ("2099-02-01", "2099-03-03"),
+            ("2099-03-04", "2099-03-05"),
+        ])
+
+    def test_fanout_runs_every_dispatched_task(self):
+        """Both tasks are taken off the queue, run, and counted in the status."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services.fanout import dispatch, get_fanout_status, run_task
+
+        def run_inline(method, run_id, task, **kwargs):
+            run_task(run_id, task)
+
+        _FANOUT_CALLS.clear()
+        tasks = [{"company": "A"}, {"company": "B"}]
+        with patch("frappe.enqueue", side_effect=run_inline) as enqueue:
+            run_id = dispatch(
+                "_test_fanout_probe",
+                "gebeyaerp.gebeyaerp.doctype.daily_summary.test_daily_summary._fanout_probe",
+                tasks,
+                concurrency=1,
+            )
+
+        self.assertEqual(_FANOUT_CALLS, tasks)
+        self.assertEqual(enqueue.call_count, 2)
+        status = get_fanout_status(run_id)
+        self.assertEqual(
+            (status["total"], status["done"], status["failed"], status["pending"], status["running"]),
+            (2, 2, 0, 0, 0),
+        )
+
+    def test_fanout_runs_every_task_and_isolates_failures(self):
+        """A failing task is recorded without stopping the rest of the run."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services.fanout import dispatch, get_fanout_status, run_task
+
+        def run_inline(method, run_id, task, **kwargs):
+            run_task(run_id, task)
+
+        tasks = [
+            {"from_date": "2099-01-01", "to_date": "2099-01-31", "days": 7},
+            {"from_date": "not a date", "to_date": "2099-01-31", "days": 7},
+            {"from_date": "2099-02-01", "to_date": "2099-02-28", "days": 7},
+        ]
+        with patch("frappe.enqueue", side_effect=run_inline):
+            run_id = dispatch(
+                "_test_fanout", "gebeyaerp.services.daily_summary.date_chunks", tasks, concurrency=2
+            )
+
+        status = get_fanout_status(run_id)
+        self.assertEqual((status["total"], status["done"], status["failed"]), (3, 2, 1))
+        self.assertEqual(status["pending"], 0)
+        self.assertEqual(status["failures"][0]["task"], tasks[1])
+        self.assertTrue(status["finished_at"])
+        self.assertEqual(get_fanout_status(job="_test_fanout")["run_id"], run_id)
+
+    def test_dirty_dates_are_queued_once_and_reconciled(self):
+        """Late invoice changes mark a day dirty; the reconciler clears it."""
+        from gebeyaerp.services.daily_summary import mark_dirty, reconcile_dirty_summaries
+
+        company = self._get_company()
+        mark_dirty(company, "2000-01-01", "submit")
+        mark_dirty(company, "2000-01-01", "cancel")
+        mark_dirty(company, today(), "submit")     # today: summarised tomorrow anyway
+
+        filters = {"company": company, "date": ["in", ["2000-01-01", today()]]}
+        self.assertEqual(frappe.db.count("Daily Summary Dirty Date", filters), 1)
+
+        reconcile_dirty_summaries()
+        self.assertEqual(frappe.db.count("Daily Summary Dirty Date", filters), 0)
+
+    def test_live_summary_matches_todays_invoices(self):
+        """A rebuilt live summary agrees with a direct sum of today's invoices."""
+        from gebeyaerp.services.live_summary import discard_live_summary, get_live_summary
+        from frappe.utils import flt, getdate
+
+        company = self._get_company()
+        discard_live_summary(company, getdate(today()))
+        live = get_live_summary(company)
+
+        total, count = frappe.db.sql(
+            """
+            SELECT COALESCE(SUM(grand_total), 0), COUNT(*)
+            FROM `tabSales Invoice`
+            WHERE docstatus = 1 AND company = %s AND posting_date = %s
+            """,
+            (company, today()),
+        )[0]
+        self.assertEqual(live["total_sales"], flt(total, 2))
+        self.assertEqual(live["total_invoices"], count)
+        # Second read is served from Redis
+        self.assertEqual(get_live_summary(company), live)
+
+    def test_live_summary_keeps_deltas_committed_during_a_rebuild(self):
+        """A delta arriving while the keys are missing is journaled, not lost."""
+        from gebeyaerp.services.live_summary import _apply, discard_live_summary, read_live_summary
+        from frappe.utils import getdate
+
+        company = self._get_company()
+        date = getdate(today())
+        discard_live_summary(company, date)
+        before = read_live_summary(company)
+        discard_live_summary(company, date)
+
+        # An invoice the rebuild's snapshot cannot see yet
+        _apply(company, date, "_Test Unseen Invoice", 1,
+               {"total_sales": 150.0, "total_invoices": 1, "cash_collected": 150.0},
+               {"_TEST-ITEM": (2.0, "Test Item")})
+        after = read_live_summary(company)
+
+        self.assertEqual(after["total_sales"], before["total_sales"] + 150)
+        self.assertEqual(after["total_invoices"], before["total_invoices"] + 1)
+        # Applied once: the journal was consumed by the rebuild
+        self.assertEqual(read_live_summary(company), after)
+        discard_live_summary(company, date)
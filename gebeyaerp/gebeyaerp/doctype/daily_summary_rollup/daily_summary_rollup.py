@@ -0,0 +1,10 @@
+import frappe
+from frappe.model.document import Document
+
+
+class DailySummaryRollup(Document):
+    pass
+
+
+def on_doctype_update():
+    frappe.db.add_index("Daily Summary Rollup", ["company", "period_type", "from_date"])
@@ -0,0 +1,13 @@
+import frappe
+from frappe.model.document import Document
+
+
+class ItemSalesFact(Document):
+    pass
+
+
+def on_doctype_update():
+    # Range reads per company (top-N, margins, daily rollups)
+    frappe.db.add_index("Item Sales Fact", ["company", "posting_date"])
+    # Velocity of one item over time
+    frappe.db.add_index("Item Sales Fact", ["company", "item_code", "posting_date"])
@@ -0,0 +1,13 @@
+import frappe
+from frappe.model.document import Document
+
+
+class PulseCheckKPIFact(Document):
+    pass
+
+
+def on_doctype_update():
+    # Trend reads: one KPI of one company over time
+    frappe.db.add_index("PulseCheck KPI Fact", ["company", "kpi_code", "to_date"])
+    # Replacing a period's facts, and period-over-period deltas
+    frappe.db.add_index("PulseCheck KPI Fact", ["company", "from_date", "to_date"])
@@ -1,6 +1,48 @@
 import frappe
 from frappe.model.document import Document
 
+from gebeyaerp.services.pulsecheck_render import HTML_FIELDS, refresh_cache
+from gebeyaerp.services.pulsecheck_storage import (
+    COMPRESSED_FIELDS,
+    compress_text,
+    decompress_text,
+)
+
 
 class PulseCheckReport(Document):
-    pass
+    """Large text fields are stored compressed (see pulsecheck_storage) but
+    always plain on the in-memory document. Markdown sections are rendered
+    to HTML whenever they are written (see pulsecheck_render)."""
+
+    def load_from_db(self):
+        super().load_from_db()
+        self._decompress_fields()
+
+    def before_save(self):
+        html_cache = refresh_cache(self.html_cache, {f: self.get(f) for f in HTML_FIELDS})
+        if html_cache is not None:
+            self.html_cache = html_cache
+        for field in COMPRESSED_FIELDS:
+            self.set(field, compress_text(self.get(field)))
+
+    def on_update(self):
+        self._decompress_fields()
+
+    def db_set(self, fieldname, value=None, *args, **kwargs):
+        values = fieldname if isinstance(fieldname, dict) else {fieldname: value}
+        markdown = {f: v for f, v in values.items() if f in HTML_FIELDS}
+        if markdown and "html_cache" not in values:
+            html_cache = refresh_cache(self.html_cache, markdown)
+            if html_cache is not None:
+                values = {**values, "html_cache": html_cache}
+        stored = {
+            field: compress_text(val) if field in COMPRESSED_FIELDS else val
+            for field, val in values.items()
+        }
+        super().db_set(stored, None, *args, **kwargs)
+        for field, val in values.items():
+            self.set(field, val)
+
+    def _decompress_fields(self):
+        for field in COMPRESSED_FIELDS:
+            self.set(field, decompress_text(self.get(field)))
@@ -80,3 +80,298 @@ class TestPulseCheckReport(FrappeTestCase):
 
         self.assertIsInstance(kpis, dict)
         self.assertIn("Liquidity", kpis)
+
+    # ── Stage metrics ────────────────────────────────────────────────────────
+
+    def test_percentile_interpolates(self):
+        from gebeyaerp.services.pulsecheck_metrics import percentile
+
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertAlmostEqual(percentile(values, 95), 4.8)
+        self.assertEqual(percentile([], 95), 0)
+
+    def test_apply_usage_maps_cache_tokens(self):
+        from gebeyaerp.services.pulsecheck_metrics import apply_usage
+
+        metric = {}
+        apply_usage(metric, {"usage": {
+            "input_tokens": 1200,
+            "output_tokens": 800,
+            "cache_read_input_tokens": 300,
+        }})
+        self.assertEqual(metric["input_tokens"], 1200)
+        self.assertEqual(metric["output_tokens"], 800)
+        self.assertEqual(metric["cache_read_tokens"], 300)
+        self.assertEqual(metric["cache_creation_tokens"], 0)
+
+    # ── Rendered HTML cache ──────────────────────────────────────────────────
+
+    def test_html_cache_renders_sanitized_html_once(self):
+        from gebeyaerp.services.pulsecheck_render import get_cached_html, refresh_cache
+
+        markdown = "**Red Flags** — thin margins\n\n<script>alert(1)</script>"
+        cache = refresh_cache(None, {"cfo_report": markdown})
+        html = get_cached_html(cache, "cfo_report", markdown)
+
+        self.assertIn("<strong>Red Flags</strong>", html)
+        self.assertNotIn("<script>", html)
+        # Unchanged markdown → nothing to re-render
+        self.assertIsNone(refresh_cache(cache, {"cfo_report": markdown}))
+        # Edited markdown → the old entry no longer matches
+        self.assertIsNone(get_cached_html(cache, "cfo_report", markdown + " edited"))
+
+    # ── Board pack ───────────────────────────────────────────────────────────
+
+    def test_board_pack_hash_tracks_report_content(self):
+        from gebeyaerp.services.pulsecheck_pdf import board_pack_hash
+
+        report = frappe.get_doc({
+            "doctype": "PulseCheck Report",
+            "company": self._get_company(),
+            "from_date": "2099-01-01",
+            "to_date": "2099-01-31",
+            "consultant_report": "**Company Verdict** — steady.",
+            "financial_kpis": '{"Liquidity": {"Current_Ratio": 1.2}}',
+        })
+        original = board_pack_hash(report)
+        self.assertEqual(board_pack_hash(report), original)
+
+        report.consultant_report += " Revised."
+        self.assertNotEqual(board_pack_hash(report), original)
+
+    # ── KPI history ──────────────────────────────────────────────────────────
+
+    def test_kpi_facts_give_trends_and_deltas(self):
+        from gebeyaerp.services.pulsecheck_kpi_store import (
+            get_kpi_deltas,
+            get_kpi_trend,
+            record_kpi_facts,
+        )
+
+        company = self._get_company()
+        for start, end, margin in (("2099-01-01", "2099-01-31", "30.0%"),
+                                   ("2099-02-01", "2099-03-03", "33.0%")):
+            report = frappe._dict(name=None, company=company, from_date=start, to_date=end)
+            record_kpi_facts(report, {"financial": {"Profitability": {"Gross_Margin": margin}}})
+        # Re-running a period replaces its rows
+        record_kpi_facts(report, {"financial": {"Profitability": {"Gross_Margin": "36.0%"}}})
+
+        code = "financial.Profitability.Gross_Margin"
+        trend = get_kpi_trend(company, code, period_days=31)
+        self.assertEqual([row.value for row in trend][-2:], [30.0, 36.0])
+
+        deltas = get_kpi_deltas(company, "2099-02-01", "2099-03-03")
+        self.assertEqual(deltas["previous"], {"from_date": "2099-01-01", "to_date": "2099-01-31"})
+        self.assertEqual(deltas["kpis"][code]["delta"], 6.0)
+        self.assertEqual(deltas["kpis"][code]["delta_pct"], 20.0)
+
+    def test_second_identical_run_waits_for_the_lock(self):
+        """A caller that finds the run lock held waits until it is released."""
+        import time
+        from unittest.mock import patch
+
+        from gebeyaerp.services import pulsecheck_ai
+
+        run_key = f"_test_wait_{frappe.generate_hash(length=8)}"
+        self.assertTrue(pulsecheck_ai._acquire_run_lock(run_key, "holder"))
+        frappe.cache().expire(pulsecheck_ai._run_lock_key(run_key), 1)    # "released" after ~1s
+
+        start = time.time()
+        with patch.object(pulsecheck_ai, "_RUN_WAIT_INTERVAL", 0.05):
+            with self.assertRaises(frappe.ValidationError):     # no report for this key
+                pulsecheck_ai._wait_for_inflight_run(run_key)
+        self.assertGreaterEqual(time.time() - start, 0.8)
+
+    def test_identical_run_returns_the_inflight_report_at_once(self):
+        """The caller gets the other run's Processing report without waiting for it to finish."""
+        import time
+        from unittest.mock import patch
+
+        from gebeyaerp.services import pulsecheck_ai
+
+        run_key = f"_test_attach_{frappe.generate_hash(length=8)}"
+        report = pulsecheck_ai.create_report(
+            self._get_company(), "2099-01-01", "2099-01-31", "claude-test", run_key, {}, {}, {},
+        )
+        self.assertTrue(pulsecheck_ai._acquire_run_lock(run_key, "holder"))
+
+        start = time.time()
+        with patch.object(pulsecheck_ai, "_RUN_WAIT_INTERVAL", 5):
+            self.assertEqual(pulsecheck_ai._wait_for_inflight_run(run_key), report.name)
+        self.assertLess(time.time() - start, 1)
+
+        report.db_set("status", "Error", commit=True)
+        pulsecheck_ai._release_run_lock(run_key, "holder")
+        with self.assertRaises(frappe.ValidationError):
+            pulsecheck_ai._wait_for_inflight_run(run_key)
+        report.delete(ignore_permissions=True)
+        frappe.db.commit()
+
+    def test_invoice_commit_invalidates_its_cohort_month(self):
+        """A back-dated invoice drops its month from the closed-month cache."""
+        from gebeyaerp.services.pulsecheck import _COHORT_CACHE, invalidate_cohort_month
+
+        cache = frappe.cache()
+        cache.hset(_COHORT_CACHE, "_Test Co::2020-03", {"CUST-1": 100.0})
+        cache.hset(_COHORT_CACHE, "_Test Co::2020-04", {"CUST-1": 50.0})
+
+        invalidate_cohort_month("_Test Co", "2020-03-15")
+        frappe.db.commit()
+
+        self.assertIsNone(cache.hget(_COHORT_CACHE, "_Test Co::2020-03"))
+        self.assertEqual(cache.hget(_COHORT_CACHE, "_Test Co::2020-04"), {"CUST-1": 50.0})
+        cache.hdel(_COHORT_CACHE, "_Test Co::2020-04")
+
+    def test_zero_intelligence_ttl_in_shop_settings_disables_the_cache(self):
+        """0 in Shop Settings means "no cache", the same as 0 in site_config."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services.pulsecheck_ai import get_intelligence_ttl
+
+        with patch.dict(frappe.conf, {"pulsecheck_intelligence_ttl_hours": None}):
+            frappe.db.set_single_value("Shop Settings", "intelligence_cache_hours", 0)
+            self.assertEqual(get_intelligence_ttl(), 0)
+            frappe.db.set_single_value("Shop Settings", "intelligence_cache_hours", 6)
+            self.assertEqual(get_intelligence_ttl(), 6 * 3600)
+        frappe.db.rollback()
+
+    def test_resuming_an_offline_report_with_claude_records_the_model(self):
+        """Stages resumed against the API replace the offline model name."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services import pulsecheck_ai
+
+        report = pulsecheck_ai.create_report(
+            self._get_company(), "2099-01-01", "2099-01-31", pulsecheck_ai.LOCAL_MODEL,
+            f"_test_resume_{frappe.generate_hash(length=8)}", {}, {}, {},
+        )
+        report.db_set({
+            "status": "Error",
+            "intelligence_brief": pulsecheck_ai._INTELLIGENCE_OFFLINE,
+            "cfo_report": "CFO", "cmo_report": "CMO", "coo_report": "COO",
+        }, commit=True)
+
+        with patch.object(pulsecheck_ai, "get_claude_config", return_value=("key", "claude-test")), \
+                patch.object(pulsecheck_ai, "call_claude", return_value="Consultant") as call, \
+                patch("gebeyaerp.services.pulsecheck_pdf.enqueue_board_pack"):
+            pulsecheck_ai.resume_pulsecheck_analysis(report.name)
+
+        self.assertEqual(call.call_args.args[3], "claude-test")
+        report.reload()
+        self.assertEqual(report.status, "Complete")
+        self.assertEqual(report.claude_model, "claude-test")
+        self.assertEqual(report.consultant_report, "Consultant")
+        report.delete(ignore_permissions=True)
+        frappe.db.commit()
+
+    def test_zero_claude_limit_in_shop_settings_disables_it(self):
+        """0 in Shop Settings means "no limit", the same as 0 in site_config."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services.claude_limiter import get_limits
+
+        with patch.dict(frappe.conf, {"claude_max_concurrency": None}):
+            frappe.db.set_single_value("Shop Settings", "claude_max_concurrency", 0)
+            self.assertEqual(get_limits()["claude_max_concurrency"], 0)
+            frappe.db.set_single_value("Shop Settings", "claude_max_concurrency", 2)
+            self.assertEqual(get_limits()["claude_max_concurrency"], 2)
+        frappe.db.rollback()
+
+    def test_batch_preparation_failure_skips_only_that_company(self):
+        """A company failing before its report exists does not strand the others."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services import pulsecheck_batch
+
+        company = self._get_company()
+
+        def extract(name, from_date, to_date):
+            if name == "_Test Broken Company":
+                raise frappe.ValidationError("extraction failed")
+            return ({}, {}, {}), None
+
+        with patch.object(pulsecheck_batch, "get_claude_config", return_value=("key", "claude-test")), \
+                patch.object(pulsecheck_batch, "extract_data_with_metric", side_effect=extract), \
+                patch.object(pulsecheck_batch, "ensure_intelligence"), \
+                patch.object(pulsecheck_batch, "submit_batch", return_value={"id": "msgbatch_test"}), \
+                patch.object(frappe, "log_error"):
+            result = pulsecheck_batch.prepare_pulsecheck_batch(
+                "2099-01-01", "2099-01-31", ["_Test Broken Company", company], force=1,
+            )
+
+        self.assertEqual(result["failed"], ["_Test Broken Company"])
+        self.assertEqual(result["batch_id"], "msgbatch_test")
+        self.assertEqual(len(result["reports"]), 1)
+        self.assertEqual(
+            frappe.db.get_value("PulseCheck Report", result["reports"][0], "batch_id"), "msgbatch_test"
+        )
+        frappe.delete_doc("PulseCheck Report", result["reports"][0], ignore_permissions=True)
+        frappe.db.commit()
+
+    def test_batch_prompt_failure_marks_only_that_report(self):
+        """A prompt that cannot be built fails its report; the rest are submitted."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services import pulsecheck_ai, pulsecheck_batch
+
+        good, bad = (
+            pulsecheck_ai.create_report(
+                self._get_company(), "2099-01-01", "2099-01-31", "claude-test",
+                f"_test_prompt_{frappe.generate_hash(length=8)}", {}, {}, {},
+            )
+            for _i in range(2)
+        )
+
+        def build(report, stage):
+            if report.name == bad.name:
+                raise KeyError("financial_kpis")
+            return "system", "user"
+
+        with patch.object(pulsecheck_batch, "build_stage_prompt", side_effect=build), \
+                patch.object(pulsecheck_batch, "submit_batch", return_value={"id": "msgbatch_test"}) as submit:
+            batch_id = pulsecheck_batch._submit_stages([good, bad], ("cfo", "cmo"), "key", "claude-test")
+
+        self.assertEqual(batch_id, "msgbatch_test")
+        custom_ids = [r["custom_id"] for r in submit.call_args.args[0]]
+        self.assertEqual(custom_ids, [f"{good.name}--cfo", f"{good.name}--cmo"])
+        bad.reload()
+        self.assertEqual((bad.status, bad.failed_stage, bad.batch_id), ("Error", "cfo", None))
+        good.reload()
+        self.assertEqual(good.batch_id, "msgbatch_test")
+        for report in (good, bad):
+            report.delete(ignore_permissions=True)
+        frappe.db.commit()
+
+    def test_collecting_a_batch_twice_records_each_metric_once(self):
+        """A batch re-read after an interrupted poll does not duplicate stage metrics."""
+        from unittest.mock import patch
+
+        from gebeyaerp.services import pulsecheck_ai, pulsecheck_batch
+
+        report = pulsecheck_ai.create_report(
+            self._get_company(), "2099-01-01", "2099-01-31", "claude-test",
+            f"_test_collect_{frappe.generate_hash(length=8)}", {}, {}, {},
+        )
+        report.db_set({"batch_id": "msgbatch_test", "cfo_report": "CFO"}, commit=True)
+
+        def results(*args, **kwargs):
+            for stage in ("cfo", "cmo", "coo"):
+                message = {"model": "claude-test", "content": [{"type": "text", "text": stage.upper()}],
+                           "usage": {"input_tokens": 10, "output_tokens": 5}}
+                yield f"{report.name}--{stage}", {"type": "succeeded", "message": message}
+
+        with patch.object(pulsecheck_batch, "get_batch", return_value={"id": "msgbatch_test", "processing_status": "ended"}), \
+                patch.object(pulsecheck_batch, "iter_batch_results", side_effect=results), \
+                patch.object(pulsecheck_batch, "_submit_stages"):
+            pulsecheck_batch._collect_batch("msgbatch_test", "key", "claude-test")
+            pulsecheck_batch._collect_batch("msgbatch_test", "key", "claude-test")
+
+        stages = frappe.get_all(
+            "PulseCheck Stage Metric", filters={"parent": report.name}, pluck="stage", order_by="idx asc",
+        )
+        self.assertEqual(stages, ["cmo", "coo"])
+        report.reload()
+        self.assertEqual((report.cfo_report, report.cmo_report), ("CFO", "CMO"))
+        report.delete(ignore_permissions=True)
+        frappe.db.commit()
@@ -0,0 +1,11 @@
+import frappe
+from frappe.model.document import Document
+
+
+class SalesBaseline(Document):
+    pass
+
+
+def on_doctype_update():
+    # Rows are named by (company, metric); reads filter by company
+    frappe.db.add_index("Sales Baseline", ["company", "metric"])
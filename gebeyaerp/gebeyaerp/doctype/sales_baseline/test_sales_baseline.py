@@ -0,0 +1,79 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days
+
+
+class TestSalesBaseline(FrappeTestCase):
+    """Baseline updates from Daily Summary and anomaly reads.
+
+    Uses 2099 dates and rolls everything back afterwards.
+    """
+
+    FIRST_DATE = "2099-01-01"
+
+    def setUp(self):
+        companies = frappe.get_all("Company", filters={"is_group": 0}, pluck="name", limit=1)
+        if not companies:
+            self.skipTest("No company on this site")
+        self.company = companies[0]
+        frappe.db.delete("Sales Baseline", {"company": self.company})
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def _summaries(self, days):
+        for i in range(days):
+            frappe.get_doc({
+                "doctype": "Daily Summary",
+                "company": self.company,
+                "date": add_days(self.FIRST_DATE, i),
+                "total_sales": 1000 + 10 * (i % 3),
+                "total_invoices": 20,
+                "cash_collected": 900 + 10 * (i % 3),
+                "credit_given": 100,
+            }).insert(ignore_permissions=True)
+
+    def test_day_without_sales_is_flagged_once(self):
+        from gebeyaerp.services.sales_anomalies import get_sales_anomalies, update_baselines
+
+        self._summaries(35)
+        quiet_day = add_days(self.FIRST_DATE, 35)       # no summary: no sales
+
+        anomalies = update_baselines(self.FIRST_DATE, quiet_day, [self.company])
+        self.assertEqual(
+            {(a["metric"], a["date"]) for a in anomalies},
+            {("total_sales", str(quiet_day)), ("total_invoices", str(quiet_day))},
+        )
+        self.assertEqual(frappe.db.count("Sales Baseline", {"company": self.company}), 6)
+
+        # Days already seen are not scored again
+        self.assertEqual(update_baselines(self.FIRST_DATE, quiet_day, [self.company]), [])
+
+        flagged = get_sales_anomalies(self.company)
+        self.assertEqual({a["metric"] for a in flagged}, {"total_sales", "total_invoices"})
+        self.assertEqual(flagged[0]["value"], 0)
+
+    def test_unsummarised_day_outside_the_run_stops_the_walk(self):
+        """A missed summary run is not mistaken for a day without sales."""
+        from gebeyaerp.services.sales_anomalies import update_baselines
+
+        self._summaries(35)
+        update_baselines(self.FIRST_DATE, add_days(self.FIRST_DATE, 34), [self.company])
+
+        # Day 35 was never summarised; the run now only covers day 36
+        day = add_days(self.FIRST_DATE, 36)
+        self.assertEqual(update_baselines(day, day, [self.company]), [])
+        last_date = frappe.db.get_value(
+            "Sales Baseline", {"company": self.company, "metric": "total_sales"}, "last_date"
+        )
+        self.assertEqual(str(last_date), str(add_days(self.FIRST_DATE, 34)))
+
+    def test_anomalies_are_kept_per_day(self):
+        """Each flagged day stays readable, not just the latest one."""
+        from gebeyaerp.services.sales_anomalies import get_sales_anomalies, update_baselines
+
+        self._summaries(35)
+        update_baselines(self.FIRST_DATE, add_days(self.FIRST_DATE, 36), [self.company])
+
+        dates = {a["date"] for a in get_sales_anomalies(self.company) if a["metric"] == "total_sales"}
+        self.assertEqual(dates, {str(add_days(self.FIRST_DATE, 35)), str(add_days(self.FIRST_DATE, 36))})
@@ -0,0 +1,21 @@
+"""Sales Invoice document events (see doc_events in hooks.py)."""
+
+from gebeyaerp.services.daily_summary import mark_dirty
+from gebeyaerp.services.item_sales import apply_invoice
+from gebeyaerp.services.live_summary import on_invoice_change
+from gebeyaerp.services.pulsecheck import invalidate_cohort_month
+
+
+def on_submit(doc, method=None):
+    # Covers amendments too: the amended invoice is submitted as a new document
+    mark_dirty(doc.company, doc.posting_date, "submit")
+    apply_invoice(doc, 1)
+    on_invoice_change(doc, 1)
+    invalidate_cohort_month(doc.company, doc.posting_date)
+
+
+def on_cancel(doc, method=None):
+    mark_dirty(doc.company, doc.posting_date, "cancel")
+    apply_invoice(doc, -1)
+    on_invoice_change(doc, -1)
+    invalidate_cohort_month(doc.company, doc.posting_date)
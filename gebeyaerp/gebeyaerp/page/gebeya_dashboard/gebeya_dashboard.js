@@ -37,6 +37,13 @@ frappe.pages["gebeya-dashboard"].on_page_load = function (wrapper) {
         .gd-low-table td { padding:8px 12px; border:1px solid #e5e7eb; }
         .gd-low-table tr:nth-child(even) td { background:#fafafa; }
         .gd-refresh { float:right; margin-top:-4px; }
+        .gd-anomalies {
+            display:none; background:#fef2f2; border:1px solid #fecaca;
+            border-radius:10px; padding:16px 20px; margin-bottom:20px;
+        }
+        .gd-anomalies .gd-section-title { color:#b91c1c; }
+        .gd-anomalies ul { margin:0; padding-left:18px; color:#7f1d1d; font-size:13px; }
+        .gd-anomalies li { margin-bottom:4px; }
         .gd-onboarding {
             display:none; background:#eff6ff; border:1px solid #bfdbfe;
             border-radius:10px; padding:24px 28px; margin-bottom:20px;
@@ -58,6 +65,11 @@ frappe.pages["gebeya-dashboard"].on_page_load = function (wrapper) {
                 <p id="gd-date"></p>
             </div>
 
+            <div class="gd-anomalies" id="gd-anomalies">
+                <div class="gd-section-title">Unusual Sales Days</div>
+                <ul id="gd-anomaly-rows"></ul>
+            </div>
+
             <div class="gd-grid">
                 <div class="gd-card" id="card-todays-sales">
                     <div class="gd-label">Today&#39;s Sales</div>
@@ -167,6 +179,45 @@ frappe.pages["gebeya-dashboard"].on_page_load = function (wrapper) {
         });
     }
 
+    var METRIC_LABELS = {
+        total_sales: "Sales",
+        total_invoices: "Invoices",
+        cash_share: "Cash share",
+        mobile_money_share: "Mobile money share",
+        bank_share: "Bank transfer share",
+        credit_share: "Credit share",
+    };
+
+    function pct(n) {
+        return Math.round(parseFloat(n || 0) * 100) + "%";
+    }
+
+    function describeAnomaly(a) {
+        var label = METRIC_LABELS[a.metric] || a.metric;
+        var when = frappe.datetime.str_to_user(a.date);
+        if (a.metric === "total_sales") {
+            return label + " on " + when + ": " + etb(a.value) + " against about " +
+                etb(a.expected) + " expected (" + (a.change > 0 ? "+" : "") + pct(a.change) + ")";
+        }
+        if (a.metric === "total_invoices") {
+            return label + " on " + when + ": " + Math.round(a.value) + " against about " +
+                Math.round(a.expected) + " expected (" + (a.change > 0 ? "+" : "") + pct(a.change) + ")";
+        }
+        return label + " on " + when + ": " + pct(a.value) + " of sales against about " +
+            pct(a.expected) + " usually";
+    }
+
+    function renderAnomalies(list) {
+        if (!list || !list.length) {
+            $("#gd-anomalies").hide();
+            return;
+        }
+        $("#gd-anomaly-rows").html(list.map(function (a) {
+            return "<li>" + frappe.utils.escape_html(describeAnomaly(a)) + "</li>";
+        }).join(""));
+        $("#gd-anomalies").show();
+    }
+
     function setLoading() {
         $("#val-todays-sales,#val-monthly-sales,#val-invoices-today," +
           "#val-low-stock,#val-outstanding,#val-employees,#val-top-item").text("\u2026");
@@ -222,6 +273,12 @@ frappe.pages["gebeya-dashboard"].on_page_load = function (wrapper) {
             },
         });
 
+        frappe.call({
+            method: "gebeyaerp.services.sales_anomalies.get_sales_anomalies",
+            args: { company: company },
+            callback: function (r) { renderAnomalies(r.message); },
+        });
+
         frappe.call({
             method: "gebeyaerp.services.dashboard.get_low_stock_items",
             args: { company: company },
@@ -246,6 +303,16 @@ frappe.pages["gebeya-dashboard"].on_page_load = function (wrapper) {
 
     loadDashboard();
 
+    // ── Realtime anomaly alerts (raised by the nightly Daily Summary job) ────
+    frappe.realtime.on("gebeya_sales_anomaly", function (data) {
+        if (!data || data.company !== frappe.defaults.get_user_default("Company")) return;
+        frappe.show_alert({
+            message: __("Unusual sales day: {0}", [describeAnomaly(data.anomalies[0])]),
+            indicator: "red",
+        }, 10);
+        loadDashboard();
+    });
+
     $("#gd-refresh-link").on("click", function (e) {
         e.preventDefault();
         setLoading();
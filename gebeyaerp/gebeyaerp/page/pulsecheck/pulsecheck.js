@@ -67,6 +67,9 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
                     </div>
                     <div>
                         <button class="btn btn-primary" id="pc-run-btn">Run Analysis</button>
+                        <label style="margin:6px 0 0;">
+                            <input type="checkbox" id="pc-force"> Re-run even if unchanged
+                        </label>
                     </div>
                 </div>
             </div>
@@ -79,9 +82,15 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
             </div>
 
             <div class="pc-status-banner" id="pc-banner"></div>
+            <div style="margin:-8px 0 16px;">
+                <button class="btn btn-default btn-sm" id="pc-resume-btn" style="display:none;">Resume Analysis</button>
+            </div>
 
             <div id="pc-results" style="display:none;">
-                <div class="pc-meta" id="pc-meta"></div>
+                <div style="display:flex;justify-content:space-between;align-items:flex-start;gap:12px;">
+                    <div class="pc-meta" id="pc-meta"></div>
+                    <button class="btn btn-default btn-xs" id="pc-pdf-btn" style="display:none;">Board Pack PDF</button>
+                </div>
                 <div class="pc-tabs">
                     <div class="pc-tab active" data-panel="panel-consultant">Board Report</div>
                     <div class="pc-tab" data-panel="panel-cfo">CFO</div>
@@ -125,6 +134,7 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
         $(".pc-panel").removeClass("active");
         $(this).addClass("active");
         $("#" + $(this).data("panel")).addClass("active");
+        loadSection($(this).data("panel"));
     });
 
     // ── Default dates (current month) ────────────────────────────────────────
@@ -144,6 +154,8 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
     });
 
     // ── Load past reports ────────────────────────────────────────────────────
+    var reportShown = false;
+
     function loadPastReports() {
         frappe.db.get_list("PulseCheck Report", {
             fields: ["name", "company", "from_date", "to_date", "status", "run_duration"],
@@ -158,6 +170,13 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
                     (r.status === "Error" ? "  [Error]" : "  (" + (r.run_duration || 0) + "s)");
                 sel.append($("<option>").val(r.name).text(label));
             });
+
+            // Open the newest report (e.g. from the overnight run) on first load
+            var latest = rows.find(function (r) { return r.status === "Complete"; });
+            if (!reportShown && latest) {
+                sel.val(latest.name);
+                fetchAndRender(latest.name);
+            }
         });
     }
     loadPastReports();
@@ -183,11 +202,27 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
         hideBanner();
         $("#pc-run-btn").prop("disabled", true).text("Running\u2026");
 
+        // Instant rule-based preview while the AI pipeline runs
+        var aiDone = false;
         frappe.call({
-            method: "gebeyaerp.services.pulsecheck_ai.run_pulsecheck_analysis",
+            method: "gebeyaerp.services.pulsecheck_ai.get_pulsecheck_preview",
             args: { company: company, from_date: from_date, to_date: to_date },
+            callback: function (r) {
+                if (!aiDone && r.message) renderPreview(r.message, company, from_date, to_date);
+            },
+        });
+
+        frappe.call({
+            method: "gebeyaerp.services.pulsecheck_ai.run_pulsecheck_analysis",
+            args: {
+                company: company,
+                from_date: from_date,
+                to_date: to_date,
+                force: $("#pc-force").is(":checked") ? 1 : 0,
+            },
             timeout: 300,
             callback: function (r) {
+                aiDone = true;
                 $("#pc-spinner").hide();
                 $("#pc-run-btn").prop("disabled", false).text("Run Analysis");
                 if (r.exc || !r.message) {
@@ -198,6 +233,7 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
                 fetchAndRender(r.message);
             },
             error: function () {
+                aiDone = true;
                 $("#pc-spinner").hide();
                 $("#pc-run-btn").prop("disabled", false).text("Run Analysis");
                 showBanner(
@@ -208,31 +244,144 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
         });
     });
 
+    // ── Resume a failed report ───────────────────────────────────────────────
+    $("#pc-resume-btn").on("click", function () {
+        var reportName = $(this).data("report");
+        if (!reportName) return;
+
+        $("#pc-resume-btn").hide();
+        $("#pc-spinner").show();
+        showBanner("Resuming from the failed stage\u2026", "processing");
+
+        frappe.call({
+            method: "gebeyaerp.services.pulsecheck_ai.resume_pulsecheck_analysis",
+            args: { report_name: reportName },
+            timeout: 300,
+            callback: function (r) {
+                $("#pc-spinner").hide();
+                loadPastReports();
+                fetchAndRender(r.message || reportName);
+            },
+            error: function () {
+                $("#pc-spinner").hide();
+                fetchAndRender(reportName);
+            },
+        });
+    });
+
+    // ── Board pack PDF (built in the background, served from the attachment) ─
+    $("#pc-pdf-btn").on("click", function () {
+        if (!current) return;
+        requestBoardPack(current.name, 0);
+    });
+
+    function requestBoardPack(reportName, attempt) {
+        frappe.call({
+            method: "gebeyaerp.services.pulsecheck_pdf.get_board_pack",
+            args: { report_name: reportName },
+            callback: function (r) {
+                var res = r.message || {};
+                if (res.status === "ready") {
+                    window.open(res.file_url);
+                } else if (attempt < 24) {
+                    if (!attempt) frappe.show_alert({ message: __("Preparing the board pack\u2026"), indicator: "blue" });
+                    setTimeout(function () { requestBoardPack(reportName, attempt + 1); }, 5000);
+                } else {
+                    frappe.show_alert({ message: __("The board pack is still being prepared. Try again shortly."), indicator: "orange" });
+                }
+            },
+        });
+    }
+
     // ── Fetch & render a report ───────────────────────────────────────────────
+    // Only the header is fetched up front; each tab loads its section on first view.
+    var SECTION_PANELS = {
+        "panel-consultant": { section: "consultant", target: "#report-consultant", field: "consultant_report" },
+        "panel-cfo":        { section: "cfo",        target: "#report-cfo",        field: "cfo_report" },
+        "panel-cmo":        { section: "cmo",        target: "#report-cmo",        field: "cmo_report" },
+        "panel-coo":        { section: "coo",        target: "#report-coo",        field: "coo_report" },
+        "panel-intel":      { section: "intel",      target: "#report-intel",      field: "intelligence_brief" },
+        "panel-kpis":       { section: "kpis",       target: "#kpi-grid" },
+    };
+    var current = null;   // { name, sections, loaded: {panelId: true} }
+
+    var awaiting = null;  // report whose meta was requested last; a Processing one is re-polled
     function fetchAndRender(reportName) {
+        awaiting = reportName;
         frappe.call({
-            method: "gebeyaerp.services.pulsecheck_ai.get_pulsecheck_report",
+            method: "gebeyaerp.services.pulsecheck_ai.get_pulsecheck_report_meta",
             args: { report_name: reportName },
             callback: function (r) {
-                if (r.message) renderReport(r.message);
+                if (r.message && awaiting === reportName) renderReport(r.message);
+            },
+        });
+    }
+
+    function loadSection(panelId) {
+        var panel = SECTION_PANELS[panelId];
+        if (!current || !panel || current.loaded[panelId]) return;
+        current.loaded[panelId] = true;
+
+        if (current.sections.indexOf(panel.section) === -1) {
+            if (panel.field) renderMd(panel.target, null);
+            else renderKpis({});
+            return;
+        }
+
+        var reportName = current.name;
+        $(panel.target).html("<p style='color:#9ca3af;padding:20px;text-align:center;'>Loading\u2026</p>");
+        frappe.call({
+            method: "gebeyaerp.services.pulsecheck_ai.get_pulsecheck_section",
+            args: { report_name: reportName, section: panel.section },
+            callback: function (r) {
+                if (!current || current.name !== reportName) return;   // another report was opened
+                var data = r.message || {};
+                if (!panel.field) renderKpis(data);
+                else if ((data.html || {})[panel.field]) $(panel.target).html(data.html[panel.field]);  // pre-rendered on the server
+                else renderMd(panel.target, data[panel.field]);
+            },
+            error: function () {
+                if (current && current.name === reportName) current.loaded[panelId] = false;
             },
         });
     }
 
     function renderReport(data) {
+        reportShown = true;
+        current = null;
+        $("#pc-pdf-btn").hide();
+        if (data.status === "Processing") {
+            // e.g. an identical run started elsewhere: show it once it finishes
+            $("#pc-spinner").show();
+            showBanner("This analysis is still running \u2014 the report will appear when it finishes.", "processing");
+            setTimeout(function () {
+                if (awaiting === data.name) fetchAndRender(data.name);
+            }, 5000);
+            return;
+        }
+        $("#pc-spinner").hide();
         if (data.status === "Error") {
-            showBanner("This report encountered an error. See PulseCheck Report list for the error log.", "error");
+            showBanner(
+                "This report failed" + (data.failed_stage ? " at the " + data.failed_stage + " stage" : "") +
+                ". Completed stages were saved \u2014 resume to finish it, or see the PulseCheck Report list for the error log.",
+                "error"
+            );
+            $("#pc-resume-btn").data("report", data.name).show();
             return;
         }
 
         hideBanner();
+        $("#pc-resume-btn").hide();
         $("#pc-results").show();
         $("#pc-meta").text(
             "Report: " + data.name + "  \u2502  " +
             data.company + "  \u2502  " +
             data.from_date + " \u2192 " + data.to_date +
             "  \u2502  Model: " + (data.claude_model || "\u2014") +
-            "  \u2502  Duration: " + (data.run_duration || 0) + "s"
+            (data.analysis_engine && data.analysis_engine !== "Claude"
+                ? "  \u2502  Engine: " + data.analysis_engine + " (offline rules)" : "") +
+            "  \u2502  Duration: " + (data.run_duration || 0) + "s" +
+            intelFreshness(data)
         );
 
         $(".pc-tab").removeClass("active");
@@ -240,12 +389,41 @@ frappe.pages["pulsecheck"].on_page_load = function (wrapper) {
         $(".pc-tab[data-panel='panel-consultant']").addClass("active");
         $("#panel-consultant").addClass("active");
 
-        renderMd("#report-consultant", data.consultant_report);
-        renderMd("#report-cfo",        data.cfo_report);
-        renderMd("#report-cmo",        data.cmo_report);
-        renderMd("#report-coo",        data.coo_report);
-        renderMd("#report-intel",      data.intelligence_brief);
-        renderKpis(data);
+        current = { name: data.name, sections: data.sections || [], loaded: {} };
+        $("#pc-pdf-btn").show();
+        Object.keys(SECTION_PANELS).forEach(function (panelId) {
+            $(SECTION_PANELS[panelId].target).empty();
+        });
+        loadSection("panel-consultant");
+    }
+
+    function renderPreview(preview, company, from_date, to_date) {
+        current = null;
+        $("#pc-pdf-btn").hide();
+        $("#pc-spinner").hide();
+        showBanner("Instant preview from benchmark rules \u2014 the full AI analysis is still running and will replace it.", "processing");
+        $("#pc-results").show();
+        $("#pc-meta").text(
+            "Preview  \u2502  " + company + "  \u2502  " + from_date + " \u2192 " + to_date + "  \u2502  Engine: Local (not saved)"
+        );
+        renderMd("#report-consultant", preview.consultant);
+        renderMd("#report-cfo",        preview.cfo);
+        renderMd("#report-cmo",        preview.cmo);
+        renderMd("#report-coo",        preview.coo);
+        renderMd("#report-intel",      "Market intelligence will appear with the AI analysis.");
+        renderKpis({
+            financial_kpis: JSON.stringify(preview.kpis.financial),
+            marketing_kpis: JSON.stringify(preview.kpis.marketing),
+            operating_kpis: JSON.stringify(preview.kpis.operating),
+        });
+    }
+
+    function intelFreshness(data) {
+        if (!data.intelligence_gathered_at) return "";
+        var gathered = frappe.datetime.str_to_user(data.intelligence_gathered_at);
+        var age = frappe.datetime.prettyDate(data.intelligence_gathered_at);
+        return "  \u2502  Market intel: " + gathered +
+            (cint(data.intelligence_cached) ? " (cached, " + age + ")" : " (live)");
     }
 
     function renderMd(selector, text) {
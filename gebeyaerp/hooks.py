@@ -60,17 +60,32 @@ doctype_list_js = {
 }
 
 # ─── Document Events ───
-# doc_events = {
-#     "Sales Invoice": {
-#         "on_submit": "gebeyaerp.gebeyaerp.overrides.sales_invoice.on_submit",
-#     },
-# }
+doc_events = {
+    "Sales Invoice": {
+        "on_submit": "gebeyaerp.gebeyaerp.overrides.sales_invoice.on_submit",
+        "on_cancel": "gebeyaerp.gebeyaerp.overrides.sales_invoice.on_cancel",
+    },
+}
 
 # ─── Scheduled Tasks ───
 scheduler_events = {
     "daily_long": [
         "gebeyaerp.services.daily_summary.generate_daily_summary",
     ],
+    "cron": {
+        # 01:30 — off-peak PulseCheck pre-computation (weekly / monthly)
+        "30 1 * * *": [
+            "gebeyaerp.services.pulsecheck_scheduler.schedule_pulsecheck_reports",
+        ],
+        # Collect finished PulseCheck message batches
+        "*/5 * * * *": [
+            "gebeyaerp.services.pulsecheck_batch.poll_pulsecheck_batches",
+        ],
+        # Recompute Daily Summaries touched by late or cancelled invoices
+        "*/15 * * * *": [
+            "gebeyaerp.services.daily_summary.reconcile_dirty_summaries",
+        ],
+    },
 }
 
 # ─── Whitelisted Methods (called from frontend via frappe.call) ───
@@ -0,0 +1,17 @@
+"""Fill PulseCheck KPI Fact from the KPIs of existing PulseCheck Reports."""
+
+import frappe
+
+from gebeyaerp.services.pulsecheck_kpi_store import record_kpi_facts
+
+
+def execute():
+    reports = frappe.get_all(
+        "PulseCheck Report",
+        filters={"financial_kpis": ["is", "set"]},
+        pluck="name",
+        order_by="creation asc",   # the latest run of a period wins
+    )
+    for name in reports:
+        record_kpi_facts(frappe.get_doc("PulseCheck Report", name))
+    frappe.db.commit()
@@ -0,0 +1,10 @@
+"""Build Item Sales Fact from the existing submitted Sales Invoices."""
+
+import frappe
+
+from gebeyaerp.services.item_sales import rebuild_item_sales_facts
+
+
+def execute():
+    rebuild_item_sales_facts()
+    frappe.db.commit()
@@ -0,0 +1,7 @@
+"""Build Daily Summary Rollup from the existing Daily Summary history."""
+
+from gebeyaerp.services.summary_rollups import rebuild_rollups
+
+
+def execute():
+    rebuild_rollups()
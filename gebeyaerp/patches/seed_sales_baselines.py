@@ -0,0 +1,15 @@
+"""Seed Sales Baseline from the existing Daily Summary history."""
+
+import frappe
+from frappe.utils import add_days, today
+
+from gebeyaerp.services.sales_anomalies import update_baselines
+
+
+def execute():
+    yesterday = add_days(today(), -1)
+    for company, first_date in frappe.db.sql(
+        "SELECT company, MIN(date) FROM `tabDaily Summary` GROUP BY company"
+    ):
+        update_baselines(first_date, yesterday, [company])
+        frappe.db.commit()
@@ -0,0 +1,80 @@
+"""Minimal client for the Anthropic Message Batches API.
+
+Kept free of Frappe imports so it can be exercised against a local stand-in
+batch server (see gebeyaerp/tests/test_claude_batch.py).
+
+Flow: submit_batch() -> poll get_batch() until processing_status is
+"ended" -> iter_batch_results() yields one (custom_id, result) per request.
+"""
+
+import json
+
+import requests
+
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+
+
+def _headers(api_key):
+    return {
+        "Content-Type": "application/json",
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+    }
+
+
+def submit_batch(batch_requests, api_key, base_url=DEFAULT_BASE_URL, timeout=60):
+    """Create a message batch.
+
+    Args:
+        batch_requests: list of {"custom_id": str, "params": <Messages API body>}
+        api_key: Anthropic API key
+        base_url: API base URL (override for a stand-in server)
+
+    Returns:
+        dict: The batch object (``id``, ``processing_status``, ...)
+    """
+    response = requests.post(
+        f"{base_url.rstrip('/')}/v1/messages/batches",
+        headers=_headers(api_key),
+        json={"requests": batch_requests},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def get_batch(batch_id, api_key, base_url=DEFAULT_BASE_URL, timeout=30):
+    """Retrieve a batch object to check ``processing_status``."""
+    response = requests.get(
+        f"{base_url.rstrip('/')}/v1/messages/batches/{batch_id}",
+        headers=_headers(api_key),
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_batch_results(batch, api_key, base_url=DEFAULT_BASE_URL, timeout=120):
+    """Yield (custom_id, result) for an ended batch.
+
+    ``result`` is the API's result object: ``{"type": "succeeded",
+    "message": {...}}`` or ``{"type": "errored" | "canceled" | "expired", ...}``.
+    """
+    url = batch.get("results_url") or (
+        f"{base_url.rstrip('/')}/v1/messages/batches/{batch['id']}/results"
+    )
+    response = requests.get(url, headers=_headers(api_key), timeout=timeout, stream=True)
+    response.raise_for_status()
+    for line in response.iter_lines():
+        if not line:
+            continue
+        row = json.loads(line)
+        yield row["custom_id"], row["result"]
+
+
+def result_error(result):
+    """Human-readable reason for a non-succeeded batch result."""
+    error = (result.get("error") or {}).get("error") or result.get("error") or {}
+    message = error.get("message") if isinstance(error, dict) else str(error)
+    return f"Batch request {result.get('type')}: {message or 'no details'}"
@@ -0,0 +1,195 @@
+"""Bench-wide rate limiting for outbound Claude API calls.
+
+All gunicorn and RQ workers on a bench share one Redis server, so the
+limits below are enforced across every process and site that uses the same
+API key:
+
+- a fair (FIFO) semaphore caps the number of calls in flight, and
+- two token buckets cap requests per minute and tokens per minute.
+
+Callers wait their turn in arrival order instead of all firing at once and
+collecting 429s. Limits come from site_config, then Shop Settings, then the
+defaults below; a limit of 0 in site_config disables it.
+"""
+
+import hashlib
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint
+
+from gebeyaerp.services.pulsecheck_compact import estimate_tokens
+
+
+_DEFAULT_LIMITS = {
+    "claude_requests_per_minute": 50,
+    "claude_tokens_per_minute":   80000,
+    "claude_max_concurrency":     4,
+}
+
+_SLOT_STALE_AFTER = 300    # seconds; longer than the slowest single call
+_POLL_INTERVAL = 0.5
+_MAX_WAIT = 600
+
+
+# Refill a bucket from Redis server time, then take `cost` if available.
+# Returns 0 when taken, otherwise the seconds to wait. With force=1 the cost
+# is always taken (the bucket may go negative) — used to settle actual usage.
+_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = capacity / 60.0
+local cost = math.min(tonumber(ARGV[2]), capacity)
+local force = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if force == 1 or tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(wait)
+"""
+
+# Fair semaphore: each caller joins a queue ordered by an atomic counter and
+# holds a slot once it is among the first `limit` entries. Waiters heartbeat
+# on every poll; entries whose heartbeat is older than `stale` are dropped.
+_SEMAPHORE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local stale = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - tonumber(ARGV[3]))
+for _, member in ipairs(stale) do
+    redis.call('ZREM', KEYS[1], member)
+    redis.call('ZREM', KEYS[2], member)
+end
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('ZADD', KEYS[1], redis.call('INCR', KEYS[3]), ARGV[1])
+end
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+if redis.call('ZRANK', KEYS[1], ARGV[1]) < tonumber(ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+
+def get_limits():
+    """Return the effective limits as a dict keyed like _DEFAULT_LIMITS."""
+    limits = {}
+    for key, default in _DEFAULT_LIMITS.items():
+        value = frappe.conf.get(key)
+        if value is None:
+            try:
+                # Raw Singles read: get_single_value turns "not set" into 0
+                value = frappe.db.get_value(
+                    "Singles", {"doctype": "Shop Settings", "field": key}, "value"
+                )
+            except Exception:
+                value = None
+            if value is None or value == "":
+                value = default
+        # 0 disables the limit, whichever source it was set in
+        limits[key] = max(cint(value), 0)
+    return limits
+
+
+def estimate_request_tokens(payload):
+    """Input-token estimate for a Messages API payload."""
+    tokens = estimate_tokens(payload.get("system") or "")
+    for message in payload.get("messages") or []:
+        tokens += estimate_tokens(message.get("content") or "")
+    return max(tokens, 1)
+
+
+class ClaudePermit:
+    """Handle for one admitted call; settles actual token usage afterwards."""
+
+    def __init__(self, prefix, limits, estimated_tokens):
+        self.prefix = prefix
+        self.limits = limits
+        self.estimated_tokens = estimated_tokens
+
+    def settle(self, actual_tokens):
+        """Charge the difference between actual and estimated token usage."""
+        tpm = self.limits["claude_tokens_per_minute"]
+        extra = cint(actual_tokens) - self.estimated_tokens
+        if tpm and extra > 0:
+            _take(f"{self.prefix}:tpm", tpm, extra, force=True)
+
+
+@contextmanager
+def claude_permit(api_key, estimated_tokens):
+    """Wait for a concurrency slot and bucket capacity, then yield a permit.
+
+    Args:
+        api_key: Anthropic API key (limits are shared per key, bench-wide)
+        estimated_tokens: Expected input tokens for the request
+
+    Yields:
+        ClaudePermit
+    """
+    limits = get_limits()
+    prefix = "gebeyaerp:claude:" + hashlib.sha1((api_key or "").encode()).hexdigest()[:16]
+    slot_id = frappe.generate_hash(length=16)
+    deadline = time.time() + _MAX_WAIT
+
+    concurrency = limits["claude_max_concurrency"]
+    if concurrency:
+        while not _try_slot(prefix, slot_id, concurrency):
+            _check_deadline(deadline, prefix, slot_id)
+            time.sleep(_POLL_INTERVAL)
+
+    try:
+        buckets = (
+            ("rpm", limits["claude_requests_per_minute"], 1),
+            ("tpm", limits["claude_tokens_per_minute"], estimated_tokens),
+        )
+        for bucket, capacity, cost in buckets:
+            if not capacity:
+                continue
+            while True:
+                wait = _take(f"{prefix}:{bucket}", capacity, cost)
+                if not wait:
+                    break
+                _check_deadline(deadline, prefix, slot_id)
+                if concurrency:
+                    _try_slot(prefix, slot_id, concurrency)   # heartbeat while we wait
+                time.sleep(min(wait, 5))
+
+        yield ClaudePermit(prefix, limits, estimated_tokens)
+    finally:
+        if concurrency:
+            _release_slot(prefix, slot_id)
+
+
+def _take(key, capacity, cost, force=False):
+    """Take cost from a token bucket; return seconds to wait (0 = taken)."""
+    wait = frappe.cache().eval(_BUCKET_SCRIPT, 1, key, capacity, cost, 1 if force else 0)
+    return float(wait)
+
+
+def _try_slot(prefix, slot_id, limit):
+    return bool(frappe.cache().eval(
+        _SEMAPHORE_SCRIPT, 3,
+        f"{prefix}:slots", f"{prefix}:heartbeats", f"{prefix}:counter",
+        slot_id, limit, _SLOT_STALE_AFTER,
+    ))
+
+
+def _release_slot(prefix, slot_id):
+    cache = frappe.cache()
+    cache.zrem(f"{prefix}:slots", slot_id)
+    cache.zrem(f"{prefix}:heartbeats", slot_id)
+
+
+def _check_deadline(deadline, prefix, slot_id):
+    if time.time() > deadline:
+        _release_slot(prefix, slot_id)
+        raise RuntimeError("Timed out waiting for Claude API capacity.")
@@ -0,0 +1,188 @@
+"""Pluggable HTTP transport for Claude Messages API calls.
+
+Three modes, chosen by site_config ``claude_transport``:
+
+- ``live``    — POST to the API (default).
+- ``record``  — POST to the API and save every request/response pair.
+- ``replay``  — answer from saved pairs without network access, optionally
+  with injected latency and errors.
+
+Record a real pipeline run once, then replay it on an offline machine for
+deterministic benchmarks and concurrency tests of ``run_pulsecheck_analysis``.
+
+Kept free of Frappe imports so it can be unit tested standalone.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+
+
+MODES = ("live", "record", "replay")
+
+# Injected replay errors → (status, error type); "connection" raises instead
+_ERROR_KINDS = {
+    "overloaded": (529, "overloaded_error"),
+    "rate_limit": (429, "rate_limit_error"),
+}
+
+
+def request_key(path, payload):
+    """Stable identity of a request: sha1 of the path and canonical payload."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{path}\n{canonical}".encode()).hexdigest()
+
+
+class TransportResponse:
+    """Minimal stand-in for requests.Response, as used by the pipeline."""
+
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error (replayed)", response=self)
+
+
+class LiveTransport:
+    """POST to the real API."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def post(self, path, payload, headers, timeout):
+        return requests.post(
+            f"{self.base_url}{path}", headers=headers, json=payload, timeout=timeout,
+        )
+
+
+class RecordingTransport:
+    """Forward to another transport and save each request/response pair.
+
+    Pairs are written to ``<directory>/<request_key>.json``; a repeated
+    identical request overwrites the previous recording.
+    """
+
+    def __init__(self, inner, directory):
+        self.inner = inner
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def post(self, path, payload, headers, timeout):
+        start = time.perf_counter()
+        response = self.inner.post(path, payload, headers, timeout)
+        try:
+            body = response.json()
+        except ValueError:
+            return response        # non-JSON error page: not worth replaying
+
+        recording = {
+            "path":        path,
+            "request":     payload,
+            "status_code": response.status_code,
+            "headers":     {k.lower(): v for k, v in dict(response.headers).items()
+                            if k.lower() in ("retry-after", "request-id")},
+            "body":        body,
+            "elapsed":     round(time.perf_counter() - start, 3),
+        }
+        target = os.path.join(self.directory, f"{request_key(path, payload)}.json")
+        tmp = f"{target}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(recording, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, target)
+        return response
+
+
+class ReplayTransport:
+    """Answer requests from recordings, without network access.
+
+    Args:
+        directory: Folder written by RecordingTransport
+        latency: Seconds to sleep per call; "recorded" replays each
+            recording's original elapsed time
+        error_rate: Probability (0–1) of answering with an injected error
+        error_kind: "overloaded" (529), "rate_limit" (429) or "connection"
+            (raises requests.ConnectionError)
+        seed: Seed for the error draw, for reproducible runs. Each draw is
+            derived from (seed, request key, attempt number), so a run
+            injects the same errors whatever the call order
+    """
+
+    def __init__(self, directory, latency=0, error_rate=0, error_kind="overloaded", seed=None):
+        if error_kind not in _ERROR_KINDS and error_kind != "connection":
+            raise ValueError(f"Unknown replay error kind: {error_kind}")
+        self.directory = directory
+        self.latency = latency
+        self.error_rate = float(error_rate or 0)
+        self.error_kind = error_kind
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def post(self, path, payload, headers, timeout):
+        key = request_key(path, payload)
+        target = os.path.join(self.directory, f"{key}.json")
+        if not os.path.exists(target):
+            raise LookupError(
+                f"No recording for this {path} request (key {key}) in {self.directory}. "
+                "Record it first with claude_transport = record."
+            )
+        with open(target, encoding="utf-8") as f:
+            recording = json.load(f)
+
+        delay = recording.get("elapsed", 0) if self.latency == "recorded" else float(self.latency or 0)
+        if delay:
+            time.sleep(min(delay, timeout))
+
+        if self.error_rate and self._draw(key) < self.error_rate:
+            if self.error_kind == "connection":
+                raise requests.ConnectionError("Injected connection failure (replay)")
+            status, error_type = _ERROR_KINDS[self.error_kind]
+            return TransportResponse(
+                status,
+                {"type": "error", "error": {"type": error_type, "message": "Injected error (replay)"}},
+                {"retry-after": "0"},
+            )
+
+        return TransportResponse(recording["status_code"], recording["body"], recording.get("headers"))
+
+    def _draw(self, key):
+        """Uniform draw for the error decision of one call."""
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+            if self.seed is None:
+                return self._random.random()
+        return random.Random(f"{self.seed}:{key}:{attempt}").random()
+
+
+def make_transport(mode, base_url, directory=None, **replay_options):
+    """Build the transport for a mode.
+
+    Args:
+        mode: "live", "record" or "replay"
+        base_url: API base URL (live and record)
+        directory: Recordings folder (record and replay)
+        replay_options: latency, error_rate, error_kind, seed (replay only)
+    """
+    mode = mode or "live"
+    if mode not in MODES:
+        raise ValueError(f"Unknown Claude transport: {mode} (expected one of {', '.join(MODES)})")
+    if mode == "live":
+        return LiveTransport(base_url)
+    if not directory:
+        raise ValueError(f"Claude transport '{mode}' needs a recordings directory.")
+    if mode == "record":
+        return RecordingTransport(LiveTransport(base_url), directory)
+    return ReplayTransport(directory, **replay_options)
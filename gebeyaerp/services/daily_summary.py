@@ -1,126 +1,424 @@
 """Auto-generate Daily Summary records from Sales Invoice data.
 
-Called by the scheduler at end of each day.
+Called by the scheduler at end of each day. Every measure is computed for
+all companies at once with one grouped query (GROUP BY company,
+posting_date), and the resulting rows are bulk-inserted in one transaction,
+so the job's query count does not grow with the number of companies.
 """
 
+import hashlib
+import time
+from contextlib import contextmanager
+
 import frappe
-from frappe.utils import add_days, today, getdate
+from frappe.utils import add_days, cint, flt, getdate, now_datetime, today
+
+
+_NAME_SERIES = "GDS-.YYYY.-.MM.-.DD.-."
+_NAME_DIGITS = 4
+
+# Scheduled fan-out defaults (site_config daily_summary_*)
+_DEFAULT_BATCH_SIZE = 25
+_DEFAULT_WORKERS = 4
+_DEFAULT_TASK_TIMEOUT = 1800
+
+PAYMENT_FIELDS = {
+    "Cash":          "cash_collected",
+    "Mobile Money":  "mobile_money_collected",
+    "Bank Transfer": "bank_collected",
+    "Credit":        "credit_given",
+}
+
+_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by",
+    "date", "company", "total_sales", "total_invoices", "total_items_sold",
+    "top_selling_item", "new_customers",
+    "cash_collected", "mobile_money_collected", "bank_collected", "credit_given",
+]
 
 
 def generate_daily_summary():
-    """Generate a Daily Summary for yesterday's sales.
+    """Generate yesterday's Daily Summaries, fanned out over workers.
 
-    Creates a Daily Summary DocType record with aggregated data
-    from all submitted Sales Invoices for the previous day.
+    Companies are split into batches (site_config
+    ``daily_summary_batch_size``, default 25). Each batch is one task on the
+    fan-out dispatcher, so a failing or slow batch does not hold up the
+    others. Inside a batch every measure is still one grouped query.
 
     Called via scheduler_events -> daily_long in hooks.py
     """
-    target_date = add_days(today(), -1)
+    from gebeyaerp.services.fanout import dispatch
+
+    target_date = str(add_days(today(), -1))
+    companies = frappe.get_all("Company", filters={"is_group": 0}, pluck="name", order_by="name")
+    size = cint(frappe.conf.get("daily_summary_batch_size")) or _DEFAULT_BATCH_SIZE
+    dispatch(
+        "daily_summary",
+        "gebeyaerp.services.daily_summary.generate_for_companies",
+        [
+            {"target_date": target_date, "companies": companies[i:i + size]}
+            for i in range(0, len(companies), size)
+        ],
+        concurrency=cint(frappe.conf.get("daily_summary_workers")) or _DEFAULT_WORKERS,
+        task_timeout=cint(frappe.conf.get("daily_summary_task_timeout")) or _DEFAULT_TASK_TIMEOUT,
+    )
+
+
+def generate_for_companies(target_date, companies):
+    """Fan-out task: one day's summaries for a batch of companies."""
+    from gebeyaerp.services.live_summary import discard_live_summary
+
+    generate_summaries(target_date, target_date, companies)
 
-    companies = frappe.get_all("Company", fields=["name"], filters={"is_group": 0})
-    for row in companies:
-        _generate_for_company(target_date, row.name)
+    # The day's live (Redis) summary is superseded by the record just made
+    for company in companies:
+        discard_live_summary(company, getdate(target_date))
 
 
 def _generate_for_company(target_date, company):
-    """Generate (or regenerate) a Daily Summary for a single company."""
-    # Skip if already generated
-    existing = frappe.db.exists(
-        "Daily Summary",
-        {"date": target_date, "company": company},
-    )
-    if existing:
+    """Generate a Daily Summary for a single company (no-op if it exists)."""
+    generate_summaries(target_date, target_date, [company])
+
+
+def generate_summaries(from_date, to_date, companies):
+    """Create the missing Daily Summaries of companies for a date range.
+
+    Days that already have a summary, and days without submitted invoices,
+    are skipped, so the call is idempotent.
+
+    Args:
+        from_date, to_date: Inclusive date range
+        companies: Company names
+
+    Returns:
+        Number of Daily Summary rows inserted
+    """
+    if not companies:
+        return 0
+
+    timings = {}
+    params = {"from_date": from_date, "to_date": to_date, "companies": tuple(companies)}
+
+    with _phase(timings, "existing"):
+        existing = _existing_summaries(params)
+    with _phase(timings, "payments"):
+        summaries = _payment_totals(params, existing)
+    if summaries:
+        with _phase(timings, "items"):
+            _add_item_totals(params, summaries)
+        with _phase(timings, "customers"):
+            _add_new_customers(params, summaries)
+        with _phase(timings, "insert"):
+            _insert_summaries(summaries)
+        with _phase(timings, "rollups"):
+            from gebeyaerp.services.summary_rollups import refresh_rollups
+
+            refresh_rollups({d for _c, d in summaries}, {c for c, _d in summaries})
+    with _phase(timings, "baselines"):
+        # Also runs for days without any sales: those are anomalies too
+        from gebeyaerp.services.sales_anomalies import update_baselines
+
+        update_baselines(from_date, to_date, companies)
+    frappe.db.commit()
+
+    frappe.logger("daily_summary").info({
+        "event": "daily_summary_generated",
+        "from_date": str(from_date),
+        "to_date": str(to_date),
+        "companies": len(companies),
+        "inserted": len(summaries),
+        "skipped_existing": len(existing),
+        "phase_seconds": timings,
+    })
+    return len(summaries)
+
+
+# ─── Dirty-date reconciliation ───────────────────────────────────────────────
+
+_DIRTY_DOCTYPE = "Daily Summary Dirty Date"
+_RECONCILE_BATCH = 500
+
+
+def mark_dirty(company, posting_date, reason=None):
+    """Queue a past day for recomputation after an invoice changed it.
+
+    Called from Sales Invoice on_submit / on_cancel. Today is skipped: its
+    summary is only made tomorrow. One row per (company, date); marking
+    again refreshes its timestamp so a reconcile already in progress does
+    not drop the newer change.
+    """
+    if getdate(posting_date) >= getdate(today()):
         return
+    now = now_datetime()
+    user = frappe.session.user
+    frappe.db.sql(
+        """
+        INSERT INTO `tabDaily Summary Dirty Date`
+            (name, creation, modified, owner, modified_by, company, date, reason)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE modified = VALUES(modified), reason = VALUES(reason)
+        """,
+        (_dirty_name(company, posting_date), now, now, user, user, company, posting_date, reason),
+    )
+
+
+def _dirty_name(company, date):
+    """Deterministic name, so a (company, date) pair can only be queued once."""
+    return hashlib.sha1(f"{company}::{getdate(date)}".encode()).hexdigest()[:20]
+
+
+def reconcile_dirty_summaries():
+    """Recompute the Daily Summaries of dirty days.
+
+    Called every 15 minutes via scheduler_events -> cron in hooks.py. Each
+    day is replaced in its own transaction: the old summaries are deleted
+    and regenerated, and the markers are removed only if they were not
+    re-marked meanwhile.
+
+    Returns:
+        Number of days recomputed
+    """
+    from gebeyaerp.services.summary_rollups import refresh_rollups
+
+    dirty = frappe.get_all(
+        _DIRTY_DOCTYPE,
+        fields=["name", "company", "date", "modified"],
+        order_by="date asc",
+        limit_page_length=_RECONCILE_BATCH,
+    )
+    by_date = {}
+    for row in dirty:
+        by_date.setdefault(getdate(row.date), []).append(row)
+
+    for date, rows in by_date.items():
+        companies = [row.company for row in rows]
+        frappe.db.delete("Daily Summary", {"date": date, "company": ["in", companies]})
+        for row in rows:
+            frappe.db.delete(_DIRTY_DOCTYPE, {"name": row.name, "modified": ["<=", row.modified]})
+        generate_summaries(date, date, companies)
+        # Also covers companies whose day no longer has any sales
+        refresh_rollups([date], companies)
+        frappe.db.commit()
+    return len(by_date)
 
-    invoices = frappe.db.sql(
+
+# ─── Backfill ────────────────────────────────────────────────────────────────
+
+BACKFILL_CHUNK_DAYS = 31
+_BACKFILL_TIMEOUT = 3600
+
+
+@frappe.whitelist()
+def backfill_daily_summaries(company, from_date, to_date, chunk_days=BACKFILL_CHUNK_DAYS):
+    """Queue the missing Daily Summaries of a company for a date range.
+
+    The range is split into chunks, one RQ job each, so long histories are
+    spread across workers. Days that already have a summary are skipped:
+    running the backfill again after a failure only fills what is left.
+
+    Args:
+        company: Company name
+        from_date, to_date: Inclusive range; capped at yesterday
+        chunk_days: Days per job
+
+    Returns:
+        dict with from_date, to_date and the queued chunk ranges
+    """
+    frappe.has_permission("Daily Summary", "create", throw=True)
+    from_date, to_date = backfill_range(from_date, to_date)
+
+    chunks = date_chunks(from_date, to_date, cint(chunk_days) or BACKFILL_CHUNK_DAYS)
+    for chunk_from, chunk_to in chunks:
+        frappe.enqueue(
+            "gebeyaerp.services.daily_summary.generate_summaries",
+            queue="long",
+            timeout=_BACKFILL_TIMEOUT,
+            job_id=f"daily_summary_backfill::{company}::{chunk_from}",
+            deduplicate=True,
+            from_date=chunk_from,
+            to_date=chunk_to,
+            companies=[company],
+        )
+    return {
+        "from_date": str(from_date),
+        "to_date": str(to_date),
+        "chunks": [[str(a), str(b)] for a, b in chunks],
+    }
+
+
+def backfill_range(from_date, to_date):
+    """Validate a backfill range and cap it at yesterday (today is not over)."""
+    from_date = getdate(from_date)
+    to_date = min(getdate(to_date), getdate(add_days(today(), -1)))
+    if from_date > to_date:
+        frappe.throw("From Date must be on or before To Date (and before today).")
+    return from_date, to_date
+
+
+def date_chunks(from_date, to_date, days):
+    """Split an inclusive date range into consecutive ranges of at most `days` days."""
+    chunks = []
+    start = getdate(from_date)
+    end = getdate(to_date)
+    while start <= end:
+        chunk_end = min(getdate(add_days(start, days - 1)), end)
+        chunks.append((start, chunk_end))
+        start = getdate(add_days(chunk_end, 1))
+    return chunks
+
+
+# ─── Measures ────────────────────────────────────────────────────────────────
+
+def _existing_summaries(params):
+    rows = frappe.db.sql(
+        """
+        SELECT company, date
+        FROM `tabDaily Summary`
+        WHERE date BETWEEN %(from_date)s AND %(to_date)s
+          AND company IN %(companies)s
+        """,
+        params,
+    )
+    return {(company, getdate(date)) for company, date in rows}
+
+
+def _payment_totals(params, existing):
+    """Return {(company, date): summary dict} with sales and payment totals.
+
+    Unknown or empty payment methods count as Cash.
+    """
+    rows = frappe.db.sql(
         """
         SELECT
-            name,
-            grand_total,
-            outstanding_amount,
-            custom_payment_method
+            company,
+            posting_date,
+            custom_payment_method AS method,
+            COUNT(*) AS invoices,
+            COALESCE(SUM(grand_total), 0) AS amount
         FROM `tabSales Invoice`
         WHERE docstatus = 1
-          AND company = %s
-          AND posting_date = %s
+          AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+          AND company IN %(companies)s
+        GROUP BY company, posting_date, custom_payment_method
         """,
-        (company, target_date),
+        params,
         as_dict=True,
     )
 
-    if not invoices:
-        return
+    summaries = {}
+    for row in rows:
+        key = (row.company, getdate(row.posting_date))
+        if key in existing:
+            continue
+        summary = summaries.setdefault(key, {
+            "date": key[1],
+            "company": row.company,
+            "total_sales": 0.0,
+            "total_invoices": 0,
+            "total_items_sold": 0,
+            "top_selling_item": None,
+            "new_customers": 0,
+            **{field: 0.0 for field in PAYMENT_FIELDS.values()},
+        })
+        amount = flt(row.amount)
+        summary["total_sales"] += amount
+        summary["total_invoices"] += cint(row.invoices)
+        summary[PAYMENT_FIELDS.get(row.method or "Cash", "cash_collected")] += amount
+    return summaries
 
-    total_sales = sum(inv.grand_total or 0 for inv in invoices)
-    total_invoices = len(invoices)
-
-    payment_totals = {
-        "Cash": 0.0,
-        "Mobile Money": 0.0,
-        "Bank Transfer": 0.0,
-        "Credit": 0.0,
-    }
-    for inv in invoices:
-        method = inv.custom_payment_method or "Cash"
-        amount = inv.grand_total or 0
-        if method in payment_totals:
-            payment_totals[method] += amount
-        else:
-            payment_totals["Cash"] += amount
-
-    total_items_sold, top_selling_item = _get_items_summary(company, target_date)
-    new_customers = _count_new_customers(company, target_date)
-
-    doc = frappe.get_doc(
-        {
-            "doctype": "Daily Summary",
-            "date": target_date,
-            "company": company,
-            "total_sales": total_sales,
-            "total_invoices": total_invoices,
-            "total_items_sold": total_items_sold,
-            "top_selling_item": top_selling_item,
-            "new_customers": new_customers,
-            "cash_collected": payment_totals["Cash"],
-            "mobile_money_collected": payment_totals["Mobile Money"],
-            "bank_collected": payment_totals["Bank Transfer"],
-            "credit_given": payment_totals["Credit"],
-        }
-    )
-    doc.insert(ignore_permissions=True)
-    frappe.db.commit()
 
+def _add_item_totals(params, summaries):
+    """Set total_items_sold and top_selling_item from Item Sales Fact.
 
-def _get_items_summary(company, target_date):
-    """Return (total_items_sold, top_selling_item_name) for the date."""
+    The facts already hold one row per company, day and item, so this is
+    one row per company and day without touching the invoice tables.
+    """
     rows = frappe.db.sql(
         """
-        SELECT sii.item_name, SUM(sii.qty) AS total_qty
-        FROM `tabSales Invoice Item` sii
-        INNER JOIN `tabSales Invoice` si ON si.name = sii.parent
-        WHERE si.docstatus = 1
-          AND si.company = %s
-          AND si.posting_date = %s
-        GROUP BY sii.item_code
-        ORDER BY total_qty DESC
+        SELECT company, posting_date, item_name, day_qty
+        FROM (
+            SELECT
+                company,
+                posting_date,
+                item_name,
+                SUM(qty) OVER (PARTITION BY company, posting_date) AS day_qty,
+                ROW_NUMBER() OVER (
+                    PARTITION BY company, posting_date ORDER BY qty DESC
+                ) AS qty_rank
+            FROM `tabItem Sales Fact`
+            WHERE posting_date BETWEEN %(from_date)s AND %(to_date)s
+              AND company IN %(companies)s
+        ) ranked
+        WHERE qty_rank = 1
         """,
-        (company, target_date),
+        params,
         as_dict=True,
     )
-
-    total_qty = int(sum(r.total_qty or 0 for r in rows))
-    top_item = rows[0].item_name if rows else None
-    return total_qty, top_item
+    for row in rows:
+        summary = summaries.get((row.company, getdate(row.posting_date)))
+        if summary:
+            summary["total_items_sold"] = cint(row.day_qty)
+            summary["top_selling_item"] = row.item_name
 
 
-def _count_new_customers(company, target_date):
-    """Count customers created on the target date for this company."""
-    result = frappe.db.sql(
+def _add_new_customers(params, summaries):
+    """Set new_customers: customers created that day (customers are not per company)."""
+    rows = frappe.db.sql(
         """
-        SELECT COUNT(*)
+        SELECT DATE(creation) AS day, COUNT(*) AS customers
         FROM `tabCustomer`
-        WHERE DATE(creation) = %s
+        WHERE creation >= %(from_date)s
+          AND creation < %(day_after)s
+        GROUP BY DATE(creation)
         """,
-        (target_date,),
+        {**params, "day_after": add_days(params["to_date"], 1)},
+    )
+    by_day = {getdate(day): cint(count) for day, count in rows}
+    for (_company, date), summary in summaries.items():
+        summary["new_customers"] = by_day.get(date, 0)
+
+
+# ─── Insert ──────────────────────────────────────────────────────────────────
+
+def _insert_summaries(summaries):
+    """Bulk-insert summaries, with names from the series (caller commits)."""
+    now = now_datetime()
+    user = frappe.session.user
+    ordered = sorted(summaries.values(), key=lambda s: (s["date"], s["company"]))
+    names = _reserve_names(len(ordered))
+    rows = [
+        (name, now, now, user, user, *(summary[field] for field in _FIELDS[5:]))
+        for name, summary in zip(names, ordered)
+    ]
+    frappe.db.bulk_insert("Daily Summary", _FIELDS, rows)
+
+
+def _reserve_names(count):
+    """Reserve `count` consecutive names of the Daily Summary naming series."""
+    from frappe.model.naming import parse_naming_series
+
+    prefix = parse_naming_series(_NAME_SERIES)
+    current = frappe.db.sql(
+        "SELECT `current` FROM `tabSeries` WHERE `name` = %s FOR UPDATE", (prefix,)
     )
-    return result[0][0] if result else 0
+    if current:
+        start = cint(current[0][0])
+        frappe.db.sql(
+            "UPDATE `tabSeries` SET `current` = `current` + %s WHERE `name` = %s",
+            (count, prefix),
+        )
+    else:
+        start = 0
+        frappe.db.sql(
+            "INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)", (prefix, count)
+        )
+    return [f"{prefix}{n:0{_NAME_DIGITS}d}" for n in range(start + 1, start + count + 1)]
+
+
+@contextmanager
+def _phase(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - start, 3)
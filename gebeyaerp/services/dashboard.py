@@ -12,6 +12,8 @@ Provides whitelisted methods to fetch dashboard metrics:
 import frappe
 from frappe.utils import today, getdate, get_first_day, get_last_day
 
+from gebeyaerp.services.live_summary import read_live_summary
+
 
 @frappe.whitelist()
 def get_dashboard_data(company=None):
@@ -31,16 +33,12 @@ def get_dashboard_data(company=None):
     month_start = get_first_day(date_today)
     month_end = get_last_day(date_today)
 
-    todays_sales = frappe.db.sql(
-        """
-        SELECT COALESCE(SUM(grand_total), 0)
-        FROM `tabSales Invoice`
-        WHERE docstatus = 1
-          AND company = %s
-          AND posting_date = %s
-        """,
-        (company, date_today),
-    )[0][0] or 0
+    # Today's figures come from the live summary kept up to date on every
+    # invoice submit/cancel, instead of scanning today's invoices.
+    live = read_live_summary(company)
+    todays_sales = live["total_sales"]
+    invoices_today = live["total_invoices"]
+    top_item = live["top_selling_item"]
 
     monthly_sales = frappe.db.sql(
         """
@@ -53,17 +51,6 @@ def get_dashboard_data(company=None):
         (company, month_start, month_end),
     )[0][0] or 0
 
-    invoices_today = frappe.db.sql(
-        """
-        SELECT COUNT(*)
-        FROM `tabSales Invoice`
-        WHERE docstatus = 1
-          AND company = %s
-          AND posting_date = %s
-        """,
-        (company, date_today),
-    )[0][0] or 0
-
     low_stock_count = frappe.db.sql(
         """
         SELECT COUNT(DISTINCT b.item_code)
@@ -97,22 +84,6 @@ def get_dashboard_data(company=None):
         (company,),
     )[0][0] or 0
 
-    top_item_row = frappe.db.sql(
-        """
-        SELECT sii.item_name, SUM(sii.qty) AS total_qty
-        FROM `tabSales Invoice Item` sii
-        INNER JOIN `tabSales Invoice` si ON si.name = sii.parent
-        WHERE si.docstatus = 1
-          AND si.company = %s
-          AND si.posting_date = %s
-        GROUP BY sii.item_code
-        ORDER BY total_qty DESC
-        LIMIT 1
-        """,
-        (company, date_today),
-    )
-    top_item = top_item_row[0][0] if top_item_row else None
-
     return {
         "todays_sales": float(todays_sales),
         "monthly_sales": float(monthly_sales),
@@ -0,0 +1,180 @@
+"""Fan scheduled work out to parallel RQ workers.
+
+``dispatch`` puts a list of tasks (keyword-argument dicts for one method)
+on a Redis list and starts ``concurrency`` lanes. Each lane is a chain of RQ
+jobs, one task per job, so every task gets its own RQ timeout. When a
+task finishes, fails or times out, its job enqueues the lane's next task.
+One slow or failing company therefore never blocks the others, and at
+most ``concurrency`` tasks run at once.
+
+Per-run status (total, done, failed, busy time, failures) is kept in a
+Redis hash for two days; see ``get_fanout_status``.
+
+Keys are prefixed once by ``_key``, and every command on them goes through
+``_redis`` (a raw pipeline): the RedisWrapper list and hash helpers would
+prefix them a second time and pickle the values.
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+_TTL = 2 * 24 * 3600
+_MAX_FAILURES_KEPT = 50
+
+
+def dispatch(job, method, tasks, concurrency=2, task_timeout=1800, queue="long"):
+    """Run method(**task) for every task, at most `concurrency` at a time.
+
+    Args:
+        job: Short name of the scheduled job, e.g. "daily_summary"
+        method: Dotted path of the function to call per task
+        tasks: list of JSON-serialisable kwargs dicts
+        concurrency: Maximum tasks running at once
+        task_timeout: RQ timeout of each task, in seconds
+        queue: RQ queue
+
+    Returns:
+        Run id (pass to get_fanout_status), or None if there were no tasks
+    """
+    if not tasks:
+        return None
+
+    run_id = f"{job}:{now_datetime().strftime('%Y%m%d%H%M%S')}:{frappe.generate_hash(length=6)}"
+    pipe = frappe.cache().pipeline()
+    pipe.rpush(_key(run_id, "queue"), *[frappe.as_json(task) for task in tasks])
+    pipe.hset(_key(run_id, "status"), mapping={
+        "job": job,
+        "method": method,
+        "queue": queue,
+        "task_timeout": cint(task_timeout),
+        "concurrency": cint(concurrency),
+        "total": len(tasks),
+        "done": 0,
+        "failed": 0,
+        "busy_seconds": 0,
+        "started_at": str(now_datetime()),
+        "finished_at": "",
+    })
+    pipe.set(_key(job, "latest"), run_id, ex=_TTL)
+    for name in ("queue", "status", "failures"):
+        pipe.expire(_key(run_id, name), _TTL)
+    pipe.execute()
+
+    for _lane in range(max(1, min(cint(concurrency), len(tasks)))):
+        _start_next(run_id)
+    return run_id
+
+
+def run_task(run_id, task):
+    """RQ entry point: run one task, record the outcome, start the next one."""
+    status = _status(run_id)
+    start = time.perf_counter()
+    try:
+        frappe.get_attr(status["method"])(**task)
+        frappe.db.commit()
+        _redis("hincrby", _key(run_id, "status"), "done", 1)
+    except Exception as exc:
+        # Includes RQ's JobTimeoutException, raised inside the task on timeout
+        frappe.db.rollback()
+        failures = _key(run_id, "failures")
+        _redis("hincrby", _key(run_id, "status"), "failed", 1)
+        _redis("rpush", failures, frappe.as_json({"task": task, "error": repr(exc)}))
+        _redis("ltrim", failures, -_MAX_FAILURES_KEPT, -1)
+        frappe.log_error(frappe.get_traceback(), f"{status['job']}: task failed {task}")
+    finally:
+        _redis("hincrbyfloat", _key(run_id, "status"), "busy_seconds", time.perf_counter() - start)
+        _start_next(run_id)
+
+
+@frappe.whitelist()
+def get_fanout_status(run_id=None, job=None):
+    """Aggregate status of a run, or of the latest run of a job.
+
+    Returns:
+        dict with job, total, done, failed, pending, running, busy_seconds,
+        wall_seconds, started_at, finished_at and failures (latest 50)
+    """
+    frappe.only_for("System Manager")
+    if not run_id:
+        run_id = frappe.safe_decode(_redis("get", _key(job, "latest")) or b"")
+    if not run_id:
+        return None
+
+    status = _status(run_id)
+    if not status:
+        return None
+    pending = _redis("llen", _key(run_id, "queue"))
+    total, done, failed = cint(status["total"]), cint(status["done"]), cint(status["failed"])
+    finished = status.get("finished_at") or None
+    end = frappe.utils.get_datetime(finished) if finished else now_datetime()
+    return {
+        "run_id": run_id,
+        "job": status["job"],
+        "total": total,
+        "done": done,
+        "failed": failed,
+        "pending": pending,
+        "running": max(0, total - done - failed - pending),
+        "busy_seconds": round(float(status["busy_seconds"]), 1),
+        "wall_seconds": round((end - frappe.utils.get_datetime(status["started_at"])).total_seconds(), 1),
+        "started_at": status["started_at"],
+        "finished_at": finished,
+        "failures": [
+            frappe.parse_json(frappe.safe_decode(f))
+            for f in _redis("lrange", _key(run_id, "failures"), 0, -1)
+        ],
+    }
+
+
+# ─── Internal helpers ────────────────────────────────────────────────────────
+
+def _start_next(run_id):
+    """Enqueue the next task of a run, or mark the run finished."""
+    item = _redis("lpop", _key(run_id, "queue"))
+    status = _status(run_id)
+    if not item:
+        if cint(status.get("done")) + cint(status.get("failed")) >= cint(status.get("total")):
+            _finish(run_id, status)
+        return
+
+    frappe.enqueue(
+        "gebeyaerp.services.fanout.run_task",
+        queue=status["queue"],
+        timeout=cint(status["task_timeout"]),
+        run_id=run_id,
+        task=frappe.parse_json(frappe.safe_decode(item)),
+    )
+
+
+def _finish(run_id, status):
+    # Several lanes may see the end at once; only the first one logs
+    if not _redis("set", _key(run_id, "finished"), 1, nx=True, ex=_TTL):
+        return
+    _redis("hset", _key(run_id, "status"), "finished_at", str(now_datetime()))
+    frappe.logger("fanout").info({
+        "event": "fanout_finished",
+        "run_id": run_id,
+        "total": cint(status["total"]),
+        "done": cint(status["done"]),
+        "failed": cint(status["failed"]),
+        "busy_seconds": round(float(status["busy_seconds"]), 1),
+    })
+
+
+def _status(run_id):
+    raw = _redis("hgetall", _key(run_id, "status"))
+    return {frappe.safe_decode(k): frappe.safe_decode(v) for k, v in raw.items()}
+
+
+def _key(name, part):
+    """Site-prefixed key; only ever pass it to _redis or a pipeline."""
+    return frappe.cache().make_key(f"gebeyaerp:fanout:{name}:{part}")
+
+
+def _redis(command, *args, **kwargs):
+    """Run one raw Redis command on an already prefixed key."""
+    pipe = frappe.cache().pipeline()
+    getattr(pipe, command)(*args, **kwargs)
+    return pipe.execute()[0]
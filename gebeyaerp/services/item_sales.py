@@ -0,0 +1,207 @@
+"""Item × day sales facts.
+
+One Item Sales Fact row per (company, posting_date, item_code) holds the
+submitted quantity, net amount and valuation cost. Sales Invoice submit and
+cancel adjust it in the invoice's own transaction. Top sellers, item
+velocity and margin by item are read from these rows instead of joining
+Sales Invoice Item to Sales Invoice on every request.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import cint, date_diff, flt, getdate, now_datetime
+
+FACT_DOCTYPE = "Item Sales Fact"
+_MAX_LIMIT = 200
+
+
+def fact_name(company, posting_date, item_code):
+    """Deterministic row name; matches the SQL expression used by rebuilds."""
+    key = f"{company}::{getdate(posting_date)}::{item_code}"
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def apply_invoice(doc, sign):
+    """Add (+1, on submit) or remove (-1, on cancel) an invoice's item lines."""
+    lines = {}
+    for item in doc.items:
+        qty, amount, cost, _name = lines.get(item.item_code, (0, 0, 0, item.item_name))
+        lines[item.item_code] = (
+            qty + flt(item.qty),
+            amount + flt(item.base_net_amount),
+            cost + flt(item.valuation_rate) * flt(item.qty),
+            item.item_name,
+        )
+    if not lines:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    values = [
+        (fact_name(doc.company, doc.posting_date, code), now, now, user, user,
+         doc.company, doc.posting_date, code, name, qty * sign, amount * sign, cost * sign)
+        for code, (qty, amount, cost, name) in lines.items()
+    ]
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(values))
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabItem Sales Fact`
+            (name, creation, modified, owner, modified_by,
+             company, posting_date, item_code, item_name, qty, amount, cost)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE
+            qty = qty + VALUES(qty),
+            amount = amount + VALUES(amount),
+            cost = cost + VALUES(cost),
+            item_name = VALUES(item_name),
+            modified = VALUES(modified)
+        """,
+        [v for row in values for v in row],
+    )
+
+
+def rebuild_item_sales_facts(company=None, from_date=None, to_date=None):
+    """Recompute facts from submitted invoices, optionally for a company/range.
+
+    Runs as one DELETE and one INSERT … SELECT … GROUP BY on the database.
+    """
+    conditions, params = ["si.docstatus = 1"], {}
+    fact_conditions = []
+    if company:
+        conditions.append("si.company = %(company)s")
+        fact_conditions.append("company = %(company)s")
+        params["company"] = company
+    if from_date:
+        conditions.append("si.posting_date >= %(from_date)s")
+        fact_conditions.append("posting_date >= %(from_date)s")
+        params["from_date"] = from_date
+    if to_date:
+        conditions.append("si.posting_date <= %(to_date)s")
+        fact_conditions.append("posting_date <= %(to_date)s")
+        params["to_date"] = to_date
+    params["now"] = now_datetime()
+    params["user"] = frappe.session.user
+
+    frappe.db.sql(
+        "DELETE FROM `tabItem Sales Fact` WHERE " + (" AND ".join(fact_conditions) or "1 = 1"),
+        params,
+    )
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabItem Sales Fact`
+            (name, creation, modified, owner, modified_by,
+             company, posting_date, item_code, item_name, qty, amount, cost)
+        SELECT
+            LEFT(SHA1(CONCAT(si.company, '::', si.posting_date, '::', sii.item_code)), 20),
+            %(now)s, %(now)s, %(user)s, %(user)s,
+            si.company, si.posting_date, sii.item_code, MAX(sii.item_name),
+            SUM(sii.qty), SUM(sii.base_net_amount), SUM(sii.valuation_rate * sii.qty)
+        FROM `tabSales Invoice Item` sii
+        INNER JOIN `tabSales Invoice` si ON si.name = sii.parent
+        WHERE {" AND ".join(conditions)}
+        GROUP BY si.company, si.posting_date, sii.item_code
+        """,
+        params,
+    )
+
+
+# ─── Queries ─────────────────────────────────────────────────────────────────
+
+@frappe.whitelist()
+def get_top_items(company, from_date, to_date, limit=10, order_by="qty"):
+    """Best-selling items of a company over a date range.
+
+    Args:
+        company: Company name
+        from_date, to_date: Inclusive range
+        limit: Number of items (max 200)
+        order_by: "qty" or "amount"
+
+    Returns:
+        list of {item_code, item_name, qty, amount}
+    """
+    frappe.has_permission("Sales Invoice", "read", throw=True)
+    column = "amount" if order_by == "amount" else "qty"
+    return frappe.db.sql(
+        f"""
+        SELECT item_code, MAX(item_name) AS item_name,
+               SUM(qty) AS qty, SUM(amount) AS amount
+        FROM `tabItem Sales Fact`
+        WHERE company = %s AND posting_date BETWEEN %s AND %s
+        GROUP BY item_code
+        HAVING SUM(qty) > 0
+        ORDER BY {column} DESC
+        LIMIT %s
+        """,
+        (company, from_date, to_date, _limit(limit)),
+        as_dict=True,
+    )
+
+
+@frappe.whitelist()
+def get_item_velocity(company, from_date, to_date, item_code=None, limit=20):
+    """Units sold per day over a range, for one item or the fastest movers.
+
+    Returns:
+        list of {item_code, item_name, qty, days_sold, units_per_day}
+    """
+    frappe.has_permission("Sales Invoice", "read", throw=True)
+    days = date_diff(to_date, from_date) + 1
+    item_filter = "AND item_code = %(item_code)s" if item_code else ""
+    rows = frappe.db.sql(
+        f"""
+        SELECT item_code, MAX(item_name) AS item_name, SUM(qty) AS qty,
+               SUM(qty > 0) AS days_sold
+        FROM `tabItem Sales Fact`
+        WHERE company = %(company)s
+          AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+          {item_filter}
+        GROUP BY item_code
+        HAVING SUM(qty) > 0
+        ORDER BY qty DESC
+        LIMIT %(limit)s
+        """,
+        {"company": company, "from_date": from_date, "to_date": to_date,
+         "item_code": item_code, "limit": _limit(limit)},
+        as_dict=True,
+    )
+    for row in rows:
+        row.days_sold = cint(row.days_sold)
+        row.units_per_day = round(flt(row.qty) / days, 2) if days > 0 else 0
+    return rows
+
+
+@frappe.whitelist()
+def get_item_margins(company, from_date, to_date, limit=20):
+    """Gross margin by item over a range, largest gross profit first.
+
+    Cost is the valuation on the invoice lines, so items sold without
+    stock update (no valuation rate) show a 100% margin.
+
+    Returns:
+        list of {item_code, item_name, qty, amount, cost, margin, margin_pct}
+    """
+    frappe.has_permission("Sales Invoice", "read", throw=True)
+    rows = frappe.db.sql(
+        """
+        SELECT item_code, MAX(item_name) AS item_name, SUM(qty) AS qty,
+               SUM(amount) AS amount, SUM(cost) AS cost,
+               SUM(amount) - SUM(cost) AS margin
+        FROM `tabItem Sales Fact`
+        WHERE company = %s AND posting_date BETWEEN %s AND %s
+        GROUP BY item_code
+        HAVING SUM(amount) > 0
+        ORDER BY margin DESC
+        LIMIT %s
+        """,
+        (company, from_date, to_date, _limit(limit)),
+        as_dict=True,
+    )
+    for row in rows:
+        row.margin_pct = round(flt(row.margin) / flt(row.amount) * 100, 1) if flt(row.amount) else 0
+    return rows
+
+
+def _limit(limit):
+    return max(1, min(cint(limit) or 10, _MAX_LIMIT))
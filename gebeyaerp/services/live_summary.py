@@ -0,0 +1,282 @@
+"""Live Daily Summary for today, maintained incrementally in Redis.
+
+Each Sales Invoice submitted or cancelled for today adjusts three Redis keys
+per company, after its transaction commits:
+
+- a hash of running totals (sales, invoices, items, one bucket per payment
+  method),
+- a sorted set of item quantities, whose highest member is the top item,
+- a hash of item names.
+
+Reads are O(1) apart from the top-item lookup, which is O(log n). Missing
+keys (the first read of the day, or a Redis flush) are rebuilt from
+today's invoices with grouped queries. The authoritative record is still
+the Daily Summary made from SQL after midnight, and it discards the live keys.
+
+While the totals key is missing, deltas are appended to a journal instead
+of being dropped. A rebuild reconciles the journal with its SQL snapshot:
+an entry is added on top unless the snapshot already shows that invoice's
+submit (docstatus 1 or 2) or cancel (docstatus 2). The keys are written in
+one script that fails if the journal grew meanwhile, and the rebuild then
+reconciles the new entries and tries again.
+"""
+
+import json
+
+import frappe
+from frappe.utils import cint, flt, getdate, now_datetime, today
+
+from gebeyaerp.services.daily_summary import PAYMENT_FIELDS
+
+
+_TTL = 2 * 24 * 3600
+_JOURNAL_TTL = 600
+_BUILD_LOCK_TTL = 60
+_BUILD_ATTEMPTS = 5
+TOTAL_FIELDS = ("total_sales", "total_invoices", "total_items_sold", *PAYMENT_FIELDS.values())
+
+# Apply deltas to a summary that exists; journal them while it is missing.
+# KEYS: totals, items, names, journal
+# ARGV: journal entry, journal ttl, n, (field, delta) * n, m,
+#       (item_code, qty, item_name) * m
+_APPLY_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    redis.call('rpush', KEYS[4], ARGV[1])
+    redis.call('expire', KEYS[4], ARGV[2])
+    return 0
+end
+local n = tonumber(ARGV[3])
+for i = 0, n - 1 do
+    redis.call('hincrbyfloat', KEYS[1], ARGV[4 + i * 2], ARGV[5 + i * 2])
+end
+local base = 4 + n * 2
+local m = tonumber(ARGV[base])
+for i = 0, m - 1 do
+    local code = ARGV[base + 1 + i * 3]
+    local qty = redis.call('zincrby', KEYS[2], ARGV[base + 2 + i * 3], code)
+    if tonumber(qty) <= 0 then
+        redis.call('zrem', KEYS[2], code)
+    end
+    redis.call('hset', KEYS[3], code, ARGV[base + 3 + i * 3])
+end
+return 1
+"""
+
+# Write a rebuilt summary, unless the journal grew since it was read.
+# KEYS: totals, items, names, journal, build lock
+# ARGV: journal length read, ttl, n, (field, value) * n, m,
+#       (item_code, qty, item_name) * m
+_FINISH_SCRIPT = """
+if redis.call('llen', KEYS[4]) ~= tonumber(ARGV[1]) then return 0 end
+redis.call('del', KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5])
+local n = tonumber(ARGV[3])
+for i = 0, n - 1 do
+    redis.call('hset', KEYS[1], ARGV[4 + i * 2], ARGV[5 + i * 2])
+end
+local base = 4 + n * 2
+local m = tonumber(ARGV[base])
+for i = 0, m - 1 do
+    redis.call('zadd', KEYS[2], ARGV[base + 2 + i * 3], ARGV[base + 1 + i * 3])
+    redis.call('hset', KEYS[3], ARGV[base + 1 + i * 3], ARGV[base + 3 + i * 3])
+end
+for i = 1, 3 do
+    redis.call('expire', KEYS[i], ARGV[2])
+end
+return 1
+"""
+
+# Totals, top item and its name in one round trip
+_READ_SCRIPT = """
+local totals = redis.call('hgetall', KEYS[1])
+local top = redis.call('zrevrange', KEYS[2], 0, 0, 'withscores')
+local name = false
+if top[1] then
+    name = redis.call('hget', KEYS[3], top[1])
+end
+return {totals, top, name}
+"""
+
+
+def on_invoice_change(doc, sign):
+    """Queue today's deltas of a submitted (+1) or cancelled (-1) invoice.
+
+    Backdated invoices are ignored here; the dirty-date queue covers them.
+    """
+    if getdate(doc.posting_date) != getdate(today()):
+        return
+
+    amount = flt(doc.grand_total) * sign
+    deltas = {
+        "total_sales": amount,
+        "total_invoices": sign,
+        PAYMENT_FIELDS.get(doc.custom_payment_method or "Cash", "cash_collected"): amount,
+    }
+    items = {}
+    for item in doc.items:
+        qty, _name = items.get(item.item_code, (0, item.item_name))
+        items[item.item_code] = (qty + flt(item.qty) * sign, item.item_name)
+    deltas["total_items_sold"] = sum(qty for qty, _name in items.values())
+
+    company, date, invoice = doc.company, getdate(doc.posting_date), doc.name
+    frappe.db.after_commit.add(lambda: _apply(company, date, invoice, sign, deltas, items))
+
+
+@frappe.whitelist()
+def get_live_summary(company=None):
+    """Return today's running summary for a company (Sales Invoice readers)."""
+    frappe.has_permission("Sales Invoice", "read", throw=True)
+    return read_live_summary(company)
+
+
+def read_live_summary(company=None):
+    """Return today's running summary for a company, without a permission check.
+
+    Returns:
+        dict with date, company, total_sales, total_invoices,
+        total_items_sold, the payment buckets (cash_collected, ...),
+        top_selling_item and top_item_qty
+    """
+    if not company:
+        company = frappe.defaults.get_user_default("Company")
+    date = getdate(today())
+
+    totals, top, name = _read(company, date)
+    if not totals:
+        totals, top, name = _rebuild(company, date)
+
+    summary = {"date": str(date), "company": company}
+    for field in TOTAL_FIELDS:
+        summary[field] = flt(totals.get(field), 2)
+    summary["total_invoices"] = cint(summary["total_invoices"])
+    summary["total_items_sold"] = cint(summary["total_items_sold"])
+    summary["top_selling_item"] = frappe.safe_decode(name or top[0]) if top else None
+    summary["top_item_qty"] = flt(frappe.safe_decode(top[1])) if top else 0
+    return summary
+
+
+def discard_live_summary(company, date):
+    """Drop a day's live keys once its Daily Summary has been made."""
+    frappe.cache().delete(*_keys(company, date))
+
+
+# ─── Internal helpers ────────────────────────────────────────────────────────
+
+def _keys(company, date):
+    """Prefixed keys: totals, items, names, journal, build lock."""
+    make_key = frappe.cache().make_key
+    base = f"gebeyaerp:live_summary:{company}:{date}"
+    return (
+        make_key(base), make_key(f"{base}:items"), make_key(f"{base}:names"),
+        make_key(f"{base}:journal"), make_key(f"{base}:building"),
+    )
+
+
+def _read(company, date):
+    """Return (totals dict, [top item code, qty] or [], top item name)."""
+    flat, top, name = frappe.cache().eval(_READ_SCRIPT, 3, *_keys(company, date)[:3])
+    totals = {
+        frappe.safe_decode(flat[i]): frappe.safe_decode(flat[i + 1])
+        for i in range(0, len(flat), 2)
+    }
+    return totals, top, name
+
+
+def _apply(company, date, invoice, sign, deltas, items):
+    entry = json.dumps({"invoice": invoice, "sign": sign, "deltas": deltas, "items": items})
+    args = [entry, _JOURNAL_TTL, len(deltas)]
+    for field, delta in deltas.items():
+        args += [field, delta]
+    args.append(len(items))
+    for code, (qty, name) in items.items():
+        args += [code, qty, name or code]
+    try:
+        frappe.cache().eval(_APPLY_SCRIPT, 4, *_keys(company, date)[:4], *args)
+    except Exception:
+        # Never fail a sale over the live view; the next rebuild corrects it
+        frappe.log_error(frappe.get_traceback(), "Live Daily Summary: update failed")
+
+
+def _rebuild(company, date):
+    """Recreate a day's live keys from submitted invoices plus the journal.
+
+    Only one request rebuilds at a time; others compute the same figures
+    without writing them.
+
+    Returns:
+        (totals, top, name) in the shape returned by _read
+    """
+    from gebeyaerp.services.daily_summary import _payment_totals
+
+    keys = _keys(company, date)
+    building = frappe.cache().set(keys[4], 1, nx=True, ex=_BUILD_LOCK_TTL)
+
+    params = {"from_date": date, "to_date": date, "companies": (company,)}
+    summary = _payment_totals(params, set()).get((company, date), {})
+    snapshot_items = frappe.db.sql(
+        """
+        SELECT item_code, item_name, qty
+        FROM `tabItem Sales Fact`
+        WHERE company = %s AND posting_date = %s
+        """,
+        (company, date),
+    )
+    docstatus = {}
+
+    for _attempt in range(_BUILD_ATTEMPTS):
+        totals = {field: flt(summary.get(field)) for field in TOTAL_FIELDS}
+        totals["total_items_sold"] = sum(flt(qty) for _code, _name, qty in snapshot_items)
+        items = {code: [flt(qty), name or code] for code, name, qty in snapshot_items}
+
+        pipe = frappe.cache().pipeline()
+        pipe.lrange(keys[3], 0, -1)
+        journal = [json.loads(frappe.safe_decode(e)) for e in pipe.execute()[0]]
+        _add_missing_docstatus(docstatus, {e["invoice"] for e in journal})
+        for entry in journal:
+            if _in_snapshot(entry, docstatus):
+                continue
+            for field, delta in entry["deltas"].items():
+                totals[field] = flt(totals.get(field)) + flt(delta)
+            for code, (qty, name) in entry["items"].items():
+                items.setdefault(code, [0, name or code])[0] += flt(qty)
+
+        positive = {code: (qty, name) for code, (qty, name) in items.items() if qty > 0}
+        if not building:
+            break
+        totals["built_at"] = str(now_datetime())
+        args = [len(journal), _TTL, len(totals)]
+        for field, value in totals.items():
+            args += [field, value]
+        args.append(len(positive))
+        for code, (qty, name) in positive.items():
+            args += [code, qty, name]
+        if frappe.cache().eval(_FINISH_SCRIPT, 5, *keys, *args):
+            break
+    else:
+        # The journal kept growing; let the next read try again
+        frappe.cache().delete(keys[4])
+
+    top = max(positive.items(), key=lambda kv: kv[1][0], default=None)
+    return (
+        {field: str(value) for field, value in totals.items()},
+        [top[0], str(top[1][0])] if top else [],
+        top[1][1] if top else None,
+    )
+
+
+def _add_missing_docstatus(docstatus, invoices):
+    """Read docstatus of invoices not seen yet, in the rebuild's snapshot."""
+    missing = [name for name in invoices if name not in docstatus]
+    if not missing:
+        return
+    found = dict(frappe.db.sql(
+        "SELECT name, docstatus FROM `tabSales Invoice` WHERE name IN %(names)s",
+        {"names": tuple(missing)},
+    ))
+    for name in missing:
+        docstatus[name] = cint(found.get(name))
+
+
+def _in_snapshot(entry, docstatus):
+    """Whether the SQL snapshot already reflects a journaled submit or cancel."""
+    status = docstatus.get(entry["invoice"], 0)
+    return status == 2 if entry["sign"] < 0 else status in (1, 2)
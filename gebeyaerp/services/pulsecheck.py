@@ -115,7 +115,9 @@ def get_marketing_snapshot(company, from_date, to_date):
     Returns:
         dict with keys: revenue, gross_profit, gross_margin,
         marketing_spend, customers_start, customers_end,
-        new_customers, arpu, expansion_revenue
+        new_customers, arpu, expansion_revenue, plus cohort-based
+        churn_rate, net_revenue_retention, customers_base,
+        customers_retained and retention_matrix
     """
     revenue = _sql1("""
         SELECT COALESCE(SUM(net_total), 0)
@@ -157,6 +159,16 @@ def get_marketing_snapshot(company, from_date, to_date):
     # ARPU for the period
     arpu = flt(revenue) / cint(customers_end) if cint(customers_end) > 0 else flt(revenue)
 
+    # Observed churn/NRR from monthly acquisition cohorts
+    from gebeyaerp.services.pulsecheck_cohorts import (
+        churn_inputs,
+        month_key,
+        month_range,
+        retention_matrix,
+    )
+    activity = get_customer_activity(company, to_date)
+    cohorts = churn_inputs(activity, month_range(month_key(from_date), month_key(to_date)))
+
     return {
         "revenue":           flt(revenue),
         "gross_profit":      flt(gross_profit),
@@ -167,9 +179,103 @@ def get_marketing_snapshot(company, from_date, to_date):
         "new_customers":     new_customers,
         "arpu":              flt(arpu),
         "expansion_revenue": 0,
+        "churn_rate":            cohorts["churn_rate"],
+        "net_revenue_retention": cohorts["net_revenue_retention"],
+        "customers_base":        cohorts["customers_base"],
+        "customers_retained":    cohorts["customers_retained"],
+        "retention_matrix":      retention_matrix(activity),
     }
 
 
+_COHORT_CACHE = "pulsecheck_cohort_months"
+# Backstop for changes the invoice hooks miss (e.g. direct DB edits)
+_COHORT_CACHE_TTL = 7 * 24 * 3600
+
+
+def get_customer_activity(company, to_date):
+    """Return {"YYYY-MM": {customer: revenue}} for every month up to to_date.
+
+    Closed months (ended on or before to_date and before the current month)
+    are cached in Redis per company and month; only uncached months — normally
+    just the current one — are read, in a single GROUP BY query.
+    """
+    from frappe.utils import get_last_day, getdate, today
+    from gebeyaerp.services.pulsecheck_cohorts import month_key, month_range
+
+    first = _sql1("""
+        SELECT MIN(posting_date)
+        FROM `tabSales Invoice`
+        WHERE docstatus = 1 AND company = %s
+          AND customer != 'Walk-in Customer'
+    """, (company,))
+    if not first or getdate(first) > getdate(to_date):
+        return {}
+
+    cache = frappe.cache()
+    this_month = month_key(today())
+    activity, missing = {}, []
+    for month in month_range(month_key(first), month_key(to_date)):
+        cached = cache.hget(_COHORT_CACHE, f"{company}::{month}")
+        if cached is not None:
+            activity[month] = cached
+        else:
+            missing.append(month)
+    if not missing:
+        return activity
+
+    if frappe.flags.pulsecheck_query_count is not None:
+        frappe.flags.pulsecheck_query_count += 1
+    rows = frappe.db.sql("""
+        SELECT DATE_FORMAT(posting_date, '%%Y-%%m') AS month, customer,
+               SUM(net_total) AS revenue
+        FROM `tabSales Invoice`
+        WHERE docstatus = 1 AND company = %s
+          AND customer != 'Walk-in Customer'
+          AND posting_date BETWEEN %s AND %s
+        GROUP BY month, customer
+    """, (company, f"{missing[0]}-01", to_date))
+
+    fetched = {month: {} for month in missing}
+    for month, customer, revenue in rows:
+        if month in fetched:
+            fetched[month][customer] = flt(revenue)
+
+    for month, customers in fetched.items():
+        activity[month] = customers
+        closed = month < this_month and getdate(get_last_day(f"{month}-01")) <= getdate(to_date)
+        if closed:
+            cache.hset(_COHORT_CACHE, f"{company}::{month}", customers)
+            # Expire the whole hash a fixed time after it was started
+            raw_key = cache.make_key(_COHORT_CACHE)
+            if cache.ttl(raw_key) < 0:
+                cache.expire(raw_key, _COHORT_CACHE_TTL)
+    return activity
+
+
+def invalidate_cohort_month(company, posting_date):
+    """Drop a company's cached month once an invoice in it commits.
+
+    Called from the Sales Invoice submit/cancel hooks, so back-dated and
+    cancelled invoices reach churn and NRR.
+    """
+    from gebeyaerp.services.pulsecheck_cohorts import month_key
+
+    field = f"{company}::{month_key(posting_date)}"
+    frappe.db.after_commit.add(lambda: frappe.cache().hdel(_COHORT_CACHE, field))
+
+
+def clear_cohort_cache(company=None):
+    """Drop cached closed months, e.g. after back-dated invoices were amended."""
+    cache = frappe.cache()
+    if not company:
+        cache.delete_key(_COHORT_CACHE)
+        return
+    for key in cache.hkeys(_COHORT_CACHE):
+        key = frappe.safe_decode(key)
+        if key.startswith(f"{company}::"):
+            cache.hdel(_COHORT_CACHE, key)
+
+
 @frappe.whitelist()
 def get_operating_snapshot(company, from_date, to_date):
     """Extract operational data.
@@ -257,5 +363,7 @@ def get_operating_snapshot(company, from_date, to_date):
 
 def _sql1(query, values=None):
     """Run a SQL query and return the first column of the first row."""
+    if frappe.flags.pulsecheck_query_count is not None:
+        frappe.flags.pulsecheck_query_count += 1
     result = frappe.db.sql(query, values or ())
     return result[0][0] if result else 0
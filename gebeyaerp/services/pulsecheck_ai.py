@@ -6,11 +6,21 @@ Handles all Claude API calls including:
 - Pipeline orchestration
 """
 
+import hashlib
 import json
 import time
 
 import frappe
 import requests
+from frappe.utils import cint, now_datetime
+
+from gebeyaerp.services.claude_limiter import claude_permit, estimate_request_tokens
+from gebeyaerp.services.claude_transport import make_transport
+from gebeyaerp.services.pulsecheck_compact import DEFAULT_CONSULTANT_BUDGET, build_consultant_input
+from gebeyaerp.services.pulsecheck_local import generate_local_analysis, generate_local_report
+from gebeyaerp.services.pulsecheck_metrics import apply_usage, record_stage_metric, track_stage
+from gebeyaerp.services.pulsecheck_render import HTML_FIELDS, get_cached_html, refresh_cache
+from gebeyaerp.services.pulsecheck_storage import compress_text, decompress_text
 
 
 # ─── Specialist Prompts (ported from prompts.js) ─────────────────────────────
@@ -71,9 +81,23 @@ PROMPTS = {
     ),
 }
 
-_API_URL = "https://api.anthropic.com/v1/messages"
+_API_BASE_URL = "https://api.anthropic.com"
 _DEFAULT_MODEL = "claude-sonnet-4-6"
 
+_RETRY_STATUSES = (429, 503, 529)
+_MAX_RETRIES = 4
+
+_INTELLIGENCE_TTL_HOURS = 24
+_INTELLIGENCE_EMPTY = "No market intelligence gathered."
+_INTELLIGENCE_FAILED = "Market intelligence unavailable (web search failed)."
+_INTELLIGENCE_OFFLINE = "Market intelligence not gathered (offline analysis)."
+
+# Model recorded for stages produced by the local rule engine
+LOCAL_MODEL = "local-rules"
+
+# Failures that mean Claude is unreachable, not that the request was bad
+_NETWORK_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
 
 # ─── Config ──────────────────────────────────────────────────────────────────
 
@@ -94,6 +118,80 @@ def get_claude_config():
     return api_key, model or _DEFAULT_MODEL
 
 
+def get_intelligence_ttl():
+    """Return the market intelligence cache TTL in seconds.
+
+    site_config ``pulsecheck_intelligence_ttl_hours`` wins, then Shop
+    Settings, then the 24 h default. In either source 0 disables the cache.
+    """
+    hours = frappe.conf.get("pulsecheck_intelligence_ttl_hours")
+    if hours is None:
+        try:
+            # Raw Singles read: get_single_value turns "not set" into 0
+            hours = frappe.db.get_value(
+                "Singles",
+                {"doctype": "Shop Settings", "field": "intelligence_cache_hours"},
+                "value",
+            )
+        except Exception:
+            hours = None
+        if hours is None or hours == "":
+            hours = _INTELLIGENCE_TTL_HOURS
+    return max(cint(hours), 0) * 3600
+
+
+def get_api_base_url():
+    """Anthropic API base URL; site_config ``claude_api_base_url`` points
+    PulseCheck at a proxy or a local stand-in server."""
+    return (frappe.conf.get("claude_api_base_url") or _API_BASE_URL).rstrip("/")
+
+
+_TRANSPORTS = {}
+
+
+def get_transport():
+    """Transport for Messages API calls, per site_config ``claude_transport``.
+
+    ``record`` saves request/response pairs and ``replay`` serves them back
+    offline (see claude_transport). Recordings live in
+    ``claude_transport_dir``, default ``<site>/private/claude_recordings``.
+    Replay options: ``claude_replay_latency`` (seconds or "recorded"),
+    ``claude_replay_error_rate``, ``claude_replay_error_kind`` and
+    ``claude_replay_seed``.
+    """
+    conf = frappe.conf
+    mode = conf.get("claude_transport") or "live"
+    directory = conf.get("claude_transport_dir") or frappe.get_site_path(
+        "private", "claude_recordings"
+    )
+    replay_options = {}
+    if mode == "replay":
+        replay_options = {
+            "latency":    conf.get("claude_replay_latency") or 0,
+            "error_rate": conf.get("claude_replay_error_rate") or 0,
+            "error_kind": conf.get("claude_replay_error_kind") or "overloaded",
+            "seed":       conf.get("claude_replay_seed"),
+        }
+    # One transport per process and configuration, so replay keeps its
+    # per-request attempt counts (and error draws) across calls
+    cache_key = (frappe.local.site, mode, get_api_base_url(), directory, tuple(sorted(replay_options.items())))
+    transport = _TRANSPORTS.get(cache_key)
+    if transport is None:
+        transport = _TRANSPORTS[cache_key] = make_transport(
+            mode, get_api_base_url(), directory, **replay_options
+        )
+    return transport
+
+
+def get_consultant_budget():
+    """Token budget for the specialist digests in the consultant prompt.
+
+    site_config ``pulsecheck_consultant_budget``; 0 sends the full reports.
+    """
+    budget = frappe.conf.get("pulsecheck_consultant_budget")
+    return DEFAULT_CONSULTANT_BUDGET if budget is None else max(cint(budget), 0)
+
+
 def _headers(api_key):
     return {
         "Content-Type": "application/json",
@@ -104,7 +202,7 @@ def _headers(api_key):
 
 # ─── Claude API wrappers ──────────────────────────────────────────────────────
 
-def call_claude(system, user, api_key, model):
+def call_claude(system, user, api_key, model, metrics=None):
     """Make a single Claude API call.
 
     Args:
@@ -112,36 +210,84 @@ def call_claude(system, user, api_key, model):
         user: User message (context + KPIs)
         api_key: Anthropic API key
         model: Claude model identifier
+        metrics: Optional dict that receives token usage, retries and model
 
     Returns:
         str: Claude's response text
     """
-    payload = {
+    payload = build_messages_payload(system, user, model)
+    data = _post_messages(payload, api_key, timeout=180, metrics=metrics)
+    if "error" in data:
+        raise RuntimeError(data["error"]["message"])
+    return extract_text(data)
+
+
+def build_messages_payload(system, user, model):
+    """Messages API request body for a specialist call."""
+    return {
         "model": model,
         "max_tokens": 10000,
         "system": system,
         "messages": [{"role": "user", "content": user}],
     }
-    response = requests.post(
-        _API_URL,
-        headers=_headers(api_key),
-        json=payload,
-        timeout=180,
-    )
-    response.raise_for_status()
-    data = response.json()
-    if "error" in data:
-        raise RuntimeError(data["error"]["message"])
+
+
+def extract_text(data):
+    """Return the first text block of a Messages API response."""
     return (data.get("content") or [{}])[0].get("text") or "No response."
 
 
-def gather_intelligence(profile, api_key, model):
+def _post_messages(payload, api_key, timeout, metrics=None):
+    """POST to the Messages API behind the bench-wide rate limiter.
+
+    Throttled (429) and overloaded (529/503) responses are retried with
+    backoff, honouring the retry-after header. The request goes through the
+    configured transport (live, record or replay).
+
+    Returns:
+        dict: Parsed JSON response
+    """
+    estimated = estimate_request_tokens(payload)
+    transport = get_transport()
+    retries = 0
+    while True:
+        with claude_permit(api_key, estimated) as permit:
+            response = transport.post("/v1/messages", payload, _headers(api_key), timeout)
+            if response.status_code in _RETRY_STATUSES and retries < _MAX_RETRIES:
+                retries += 1
+                delay = _retry_delay(response, retries)
+            else:
+                response.raise_for_status()
+                data = response.json()
+                usage = data.get("usage") or {}
+                permit.settle(
+                    (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
+                )
+                break
+        time.sleep(delay)
+
+    if metrics is not None:
+        apply_usage(metrics, data)
+        metrics.update(model=data.get("model") or payload.get("model"), retries=retries)
+    return data
+
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying a throttled request."""
+    try:
+        return min(float(response.headers.get("retry-after")), 60)
+    except (TypeError, ValueError):
+        return min(2 ** attempt, 30)
+
+
+def gather_intelligence(profile, api_key, model, metrics=None):
     """Gather live market intelligence via Claude web search.
 
     Args:
         profile: Business profile dict
         api_key: Anthropic API key
         model: Claude model identifier
+        metrics: Optional dict that receives token usage, retries and model
 
     Returns:
         str: Market intelligence brief as markdown
@@ -166,23 +312,66 @@ def gather_intelligence(profile, api_key, model):
         "messages": [{"role": "user", "content": prompt}],
     }
     try:
-        response = requests.post(
-            _API_URL,
-            headers=_headers(api_key),
-            json=payload,
-            timeout=60,
-        )
-        response.raise_for_status()
-        data = response.json()
+        data = _post_messages(payload, api_key, timeout=60, metrics=metrics)
         text = "\n".join(
             block.get("text", "")
             for block in (data.get("content") or [])
             if block.get("type") == "text"
         )
-        return text.strip() or "No market intelligence gathered."
+        return text.strip() or _INTELLIGENCE_EMPTY
     except Exception:
         frappe.log_error(frappe.get_traceback(), "PulseCheck: web search failed")
-        return "Market intelligence unavailable (web search failed)."
+        return _INTELLIGENCE_FAILED
+
+
+def get_market_intelligence(profile, api_key, model, metrics=None):
+    """Return the market intelligence brief, served from cache when fresh.
+
+    The brief depends only on industry and competitors, so it is cached in
+    the bench-wide (shared) Redis namespace: shops of the same type on a
+    multi-site deployment reuse one web search. Failed or empty searches
+    are never cached.
+
+    Args:
+        profile: Business profile dict
+        api_key: Anthropic API key
+        model: Claude model identifier
+        metrics: Optional dict that receives from_cache and token usage
+
+    Returns:
+        tuple: (brief, gathered_at, from_cache)
+    """
+    ttl = get_intelligence_ttl()
+    key = _intelligence_cache_key(profile)
+
+    if ttl:
+        cached = frappe.cache().get_value(key, shared=True)
+        if cached:
+            if metrics is not None:
+                metrics["from_cache"] = 1
+            return cached["brief"], cached["gathered_at"], True
+
+    brief = gather_intelligence(profile, api_key, model, metrics)
+    gathered_at = str(now_datetime())
+
+    if ttl and brief not in (_INTELLIGENCE_EMPTY, _INTELLIGENCE_FAILED):
+        frappe.cache().set_value(
+            key,
+            {"brief": brief, "gathered_at": gathered_at},
+            expires_in_sec=ttl,
+            shared=True,
+        )
+    return brief, gathered_at, False
+
+
+def _intelligence_cache_key(profile):
+    """Cache key derived from the only inputs of the intelligence prompt."""
+    inputs = {
+        "industry": (profile.get("industry") or "retail").strip().lower(),
+        "competitors": (profile.get("competitors") or "").strip().lower(),
+    }
+    digest = hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+    return f"pulsecheck:intelligence:{digest}"
 
 
 def build_context_block(profile, intelligence_brief):
@@ -204,7 +393,7 @@ def build_context_block(profile, intelligence_brief):
 # ─── Main pipeline ────────────────────────────────────────────────────────────
 
 @frappe.whitelist()
-def run_pulsecheck_analysis(company, from_date, to_date, overrides=None):
+def run_pulsecheck_analysis(company, from_date, to_date, overrides=None, force=0):
     """Run the full PulseCheck analysis pipeline.
 
     Creates a PulseCheck Report document and runs:
@@ -213,23 +402,78 @@ def run_pulsecheck_analysis(company, from_date, to_date, overrides=None):
     3. Market intelligence gathering (web search)
     4. Four specialist AI analyses (CFO, CMO, COO, Consultant)
 
+    Without an API key, or when Claude cannot be reached, the specialist
+    sections come from the local rule engine (pulsecheck_local) instead, so
+    a report is always produced.
+
+    Runs are idempotent: a request with the same company, period, extracted
+    data and model returns the existing Complete report, and a request made
+    while an identical run is in flight returns that run's report (still
+    Processing) instead of starting a second pipeline.
+
     Args:
         company: Company name
         from_date: Analysis period start (YYYY-MM-DD)
         to_date: Analysis period end (YYYY-MM-DD)
         overrides: Optional JSON string of user-overridden data fields
+        force: Truthy to re-run even if an identical Complete report exists
 
     Returns:
-        str: Name of the created PulseCheck Report document
+        str: Name of the PulseCheck Report document
     """
     api_key, model = get_claude_config()
     if not api_key:
-        frappe.throw(
-            "Claude API key not configured. "
-            "Please set it in Shop Settings or add claude_api_key to site_config.json."
+        model = LOCAL_MODEL
+
+    # ── 1. Extract raw data ──────────────────────────────────────────────────
+    (fin_data, mkt_data, ops_data), extraction_metric = extract_data_with_metric(
+        company, from_date, to_date, overrides
+    )
+    run_key = make_run_key(company, from_date, to_date, (fin_data, mkt_data, ops_data), model)
+
+    if not cint(force):
+        existing = find_complete_report(run_key)
+        if existing:
+            return existing
+
+    lock_token = frappe.generate_hash(length=12)
+    if not _acquire_run_lock(run_key, lock_token):
+        return _wait_for_inflight_run(run_key)
+
+    try:
+        if not cint(force):
+            # An identical run may have completed between the check and the lock
+            existing = find_complete_report(run_key)
+            if existing:
+                return existing
+
+        return _execute_run(
+            company, from_date, to_date, model, api_key, run_key,
+            fin_data, mkt_data, ops_data, extraction_metric,
         )
+    finally:
+        _release_run_lock(run_key, lock_token)
 
-    start_time = time.time()
+
+def _execute_run(company, from_date, to_date, model, api_key, run_key,
+                 fin_data, mkt_data, ops_data, extraction_metric=None):
+    """Create the PulseCheck Report and run the AI stages for it."""
+    report = create_report(
+        company, from_date, to_date, model, run_key,
+        fin_data, mkt_data, ops_data, extraction_metric,
+    )
+    _run_stages(report, api_key, model)
+    return report.name
+
+
+def create_report(company, from_date, to_date, model, run_key,
+                  fin_data, mkt_data, ops_data, extraction_metric=None):
+    """Insert a Processing PulseCheck Report holding the extracted data.
+
+    Extracted data is persisted up front so a resume never re-extracts.
+    """
+    # ── 2. Build business profile from Shop Settings ─────────────────────────
+    profile = _build_profile(company)
 
     # Create the report doc in Processing state so the UI can poll it
     report = frappe.get_doc({
@@ -239,122 +483,442 @@ def run_pulsecheck_analysis(company, from_date, to_date, overrides=None):
         "to_date": to_date,
         "status": "Processing",
         "claude_model": model,
+        "run_key": run_key,
+        "profile_data": json.dumps(profile, ensure_ascii=False),
+        "financial_data": json.dumps(fin_data, ensure_ascii=False),
+        "marketing_data": json.dumps(mkt_data, ensure_ascii=False),
+        "operating_data": json.dumps(ops_data, ensure_ascii=False),
     })
     report.insert(ignore_permissions=True)
     frappe.db.commit()
 
+    if extraction_metric:
+        record_stage_metric(report, extraction_metric)
+    return report
+
+
+@frappe.whitelist()
+def resume_pulsecheck_analysis(report_name):
+    """Continue a failed PulseCheck Report from its first missing stage.
+
+    Every completed stage is checkpointed on the report, so a run that failed
+    at the consultant stage costs one API call to finish, not five.
+
+    Args:
+        report_name: Name of the PulseCheck Report in Error state
+
+    Returns:
+        str: Name of the (now Complete) PulseCheck Report
+    """
+    report = frappe.get_doc("PulseCheck Report", report_name)
+    frappe.has_permission("PulseCheck Report", "write", doc=report, throw=True)
+    if report.status != "Error":
+        frappe.throw(f"Only reports in Error state can be resumed (status: {report.status}).")
+
+    api_key, model = get_claude_config()
+    if not api_key:
+        model = LOCAL_MODEL
+    elif report.claude_model and report.claude_model != LOCAL_MODEL:
+        # Finish with the model the report was started with
+        model = report.claude_model
+
+    lock_key = report.run_key or report.name
+    lock_token = frappe.generate_hash(length=12)
+    if not _acquire_run_lock(lock_key, lock_token):
+        return _wait_for_inflight_run(lock_key)
+
     try:
-        # ── 1. Extract raw data ──────────────────────────────────────────────
-        from gebeyaerp.services.pulsecheck import (
-            get_financial_snapshot,
-            get_marketing_snapshot,
-            get_operating_snapshot,
-        )
-        fin_data = get_financial_snapshot(company, from_date, to_date)
-        mkt_data = get_marketing_snapshot(company, from_date, to_date)
-        ops_data = get_operating_snapshot(company, from_date, to_date)
-
-        # Apply user overrides (allows correcting auto-extracted numbers)
-        if overrides:
-            ov = json.loads(overrides) if isinstance(overrides, str) else overrides
-            fin_data.update(ov.get("financial", {}))
-            mkt_data.update(ov.get("marketing", {}))
-            ops_data.update(ov.get("operating", {}))
-
-        # ── 2. Compute KPIs ──────────────────────────────────────────────────
-        from gebeyaerp.services.pulsecheck_kpis import (
-            calc_financial_kpis,
-            calc_marketing_kpis,
-            calc_operating_kpis,
-        )
-        fin_kpis = calc_financial_kpis(fin_data)
-        mkt_kpis = calc_marketing_kpis(mkt_data)
-        ops_kpis = calc_operating_kpis(ops_data)
-
-        # ── 3. Build business profile from Shop Settings ─────────────────────
-        settings = frappe.get_single("Shop Settings")
-        profile = {
-            "companyName":       settings.shop_name or company,
-            "industry":          settings.shop_type or "Retail",
-            "businessModel":     "Retail",
-            "stage":             "SME",
-            "strategicPriority": "Operational Efficiency",
-            "mission":           "",
-            "vision":            "",
-            "competitors":       "",
+        report.db_set({"status": "Processing", "failed_stage": None}, commit=True)
+        _run_stages(report, api_key, model)
+    finally:
+        _release_run_lock(lock_key, lock_token)
+
+    return report.name
+
+
+@frappe.whitelist()
+def get_pulsecheck_preview(company, from_date, to_date, overrides=None):
+    """Instant rule-based analysis of the period, without calling Claude.
+
+    Shown on the PulseCheck page while the AI pipeline runs. Nothing is saved.
+
+    Args:
+        company: Company name
+        from_date: Analysis period start (YYYY-MM-DD)
+        to_date: Analysis period end (YYYY-MM-DD)
+        overrides: Optional JSON string of user-overridden data fields
+
+    Returns:
+        dict of {"cfo"|"cmo"|"coo"|"consultant": markdown, "kpis": KPI sets}
+    """
+    frappe.has_permission("PulseCheck Report", "read", throw=True)
+
+    from gebeyaerp.services.pulsecheck_kpis import (
+        calc_financial_kpis,
+        calc_marketing_kpis,
+        calc_operating_kpis,
+    )
+    fin_data, mkt_data, ops_data = _extract_data(company, from_date, to_date, overrides)
+    kpis = {
+        "financial": calc_financial_kpis(fin_data),
+        "marketing": calc_marketing_kpis(mkt_data),
+        "operating": calc_operating_kpis(ops_data),
+    }
+    data = {"financial": fin_data, "marketing": mkt_data, "operating": ops_data}
+    preview = generate_local_analysis(kpis, _build_profile(company), data)
+    preview["kpis"] = kpis
+    return preview
+
+
+# Report field written by each AI stage, in pipeline order
+STAGE_FIELDS = {
+    "intelligence": "intelligence_brief",
+    "cfo":          "cfo_report",
+    "cmo":          "cmo_report",
+    "coo":          "coo_report",
+    "consultant":   "consultant_report",
+}
+
+
+# Claude stages that follow KPIs and intelligence, in pipeline order
+SPECIALIST_STAGES = ("cfo", "cmo", "coo", "consultant")
+
+
+def _run_stages(report, api_key, model):
+    """Run every stage whose result is not yet on the report.
+
+    Each stage result is written and committed as soon as it completes, so a
+    failure only loses the stage that was running.
+    """
+    start_time = time.time()
+    previous_duration = report.run_duration or 0
+    offline = not api_key
+    stage = "kpis"
+
+    try:
+        # ── 3. Compute KPIs ──────────────────────────────────────────────────
+        ensure_kpis(report)
+
+        # ── 4. Gather market intelligence (cached by industry/competitors) ───
+        stage = "intelligence"
+        if offline:
+            if not report.intelligence_brief:
+                _checkpoint(report, intelligence_brief=_INTELLIGENCE_OFFLINE)
+        else:
+            ensure_intelligence(report, api_key, model)
+
+        # ── 5. Run specialist analyses sequentially ──────────────────────────
+        for stage in SPECIALIST_STAGES:
+            field = STAGE_FIELDS[stage]
+            if report.get(field):
+                continue
+            if not offline:
+                try:
+                    system, user = build_stage_prompt(report, stage)
+                    with track_stage(report, stage) as metric:
+                        text = call_claude(system, user, api_key, model, metric)
+                except _NETWORK_ERRORS:
+                    frappe.log_error(
+                        frappe.get_traceback(),
+                        "PulseCheck: Claude unreachable, using local analysis",
+                    )
+                    offline = True
+            if offline:
+                with track_stage(report, stage, model=LOCAL_MODEL):
+                    text = generate_local_report(
+                        stage, get_report_kpis(report), _load_json(report.profile_data),
+                        _report_data(report),
+                    )
+            values = {field: text}
+            if not offline and report.claude_model != model:
+                # A resumed offline report: record the model that now writes it
+                values["claude_model"] = model
+            _checkpoint(report, **values)
+
+        # ── 6. Mark complete ─────────────────────────────────────────────────
+        report.db_set({
+            "status":          "Complete",
+            "analysis_engine": _analysis_engine(report),
+            "run_duration":    round(previous_duration + time.time() - start_time, 1),
+            "error_log":       None,
+        }, commit=True)
+
+        from gebeyaerp.services.pulsecheck_pdf import enqueue_board_pack
+        enqueue_board_pack(report.name)
+
+    except Exception:
+        frappe.db.rollback()
+        report.db_set({
+            "status":       "Error",
+            "failed_stage": stage,
+            "error_log":    frappe.get_traceback(),
+            "run_duration": round(previous_duration + time.time() - start_time, 1),
+        }, commit=True)
+        raise
+
+
+def get_report_kpis(report):
+    """The report's three KPI sets, keyed financial / marketing / operating."""
+    return {
+        "financial": _load_json(report.financial_kpis),
+        "marketing": _load_json(report.marketing_kpis),
+        "operating": _load_json(report.operating_kpis),
+    }
+
+
+def _report_data(report):
+    """The inputs the report's KPI sets were calculated from."""
+    return {
+        "financial": _load_json(report.financial_data),
+        "marketing": _load_json(report.marketing_data),
+        "operating": _load_json(report.operating_data),
+    }
+
+
+def _analysis_engine(report):
+    """Which engine wrote the specialist sections, from the stage metrics."""
+    engines = {
+        "Local" if row.model == LOCAL_MODEL else "Claude"
+        for row in report.get("stage_metrics") or []
+        if row.stage in SPECIALIST_STAGES and not row.failed
+    }
+    if len(engines) > 1:
+        return "Claude + Local"
+    return engines.pop() if engines else "Claude"
+
+
+def ensure_kpis(report):
+    """Compute and checkpoint the three KPI sets if they are missing."""
+    if report.financial_kpis and report.marketing_kpis and report.operating_kpis:
+        return
+
+    from gebeyaerp.services.pulsecheck_kpis import (
+        calc_financial_kpis,
+        calc_marketing_kpis,
+        calc_operating_kpis,
+    )
+    with track_stage(report, "kpis"):
+        kpis = {
+            "financial_kpis": calc_financial_kpis(_load_json(report.financial_data)),
+            "marketing_kpis": calc_marketing_kpis(_load_json(report.marketing_data)),
+            "operating_kpis": calc_operating_kpis(_load_json(report.operating_data)),
         }
+    _checkpoint(report, **{
+        field: json.dumps(value, ensure_ascii=False) for field, value in kpis.items()
+    })
 
-        # ── 4. Gather market intelligence ────────────────────────────────────
-        intelligence = gather_intelligence(profile, api_key, model)
+    from gebeyaerp.services.pulsecheck_kpi_store import record_kpi_facts
+    try:
+        record_kpi_facts(report, {f.replace("_kpis", ""): v for f, v in kpis.items()})
+    except Exception:
+        # History is a convenience: never fail the analysis over it
+        frappe.log_error(frappe.get_traceback(), "PulseCheck: KPI history write failed")
 
-        # ── 5. Build shared context block ────────────────────────────────────
-        context = build_context_block(profile, intelligence)
 
-        # ── 6. Run specialist analyses sequentially ──────────────────────────
-        fin_kpis_str = json.dumps(fin_kpis, indent=2, ensure_ascii=False)
-        mkt_kpis_str = json.dumps(mkt_kpis, indent=2, ensure_ascii=False)
-        ops_kpis_str = json.dumps(ops_kpis, indent=2, ensure_ascii=False)
+def ensure_intelligence(report, api_key, model):
+    """Fetch and checkpoint the market intelligence brief if it is missing."""
+    if report.intelligence_brief:
+        return
 
-        cfo_report = call_claude(
-            PROMPTS["cfo"],
-            f"{context}FINANCIAL KPIs:\n{fin_kpis_str}",
-            api_key, model,
+    with track_stage(report, "intelligence") as metric:
+        intelligence, gathered_at, from_cache = get_market_intelligence(
+            _load_json(report.profile_data), api_key, model, metric
         )
-        cmo_report = call_claude(
-            PROMPTS["cmo"],
-            f"{context}MARKETING KPIs:\n{mkt_kpis_str}",
-            api_key, model,
-        )
-        coo_report = call_claude(
-            PROMPTS["coo"],
-            f"{context}OPERATING KPIs:\n{ops_kpis_str}",
-            api_key, model,
+    _checkpoint(
+        report,
+        intelligence_brief=intelligence,
+        intelligence_gathered_at=gathered_at,
+        intelligence_cached=1 if from_cache else 0,
+    )
+
+
+def build_stage_prompt(report, stage):
+    """Return (system, user) for a specialist stage from the report's checkpoints.
+
+    The consultant prompt needs the CFO, CMO and COO reports to be present;
+    unless compaction is disabled it gets their key sections and flattened
+    KPIs instead of the full texts (see pulsecheck_compact).
+    """
+    context = build_context_block(_load_json(report.profile_data), report.intelligence_brief)
+    fin_kpis_str = json.dumps(_load_json(report.financial_kpis), indent=2, ensure_ascii=False)
+    mkt_kpis_str = json.dumps(_load_json(report.marketing_kpis), indent=2, ensure_ascii=False)
+    ops_kpis_str = json.dumps(_load_json(report.operating_kpis), indent=2, ensure_ascii=False)
+
+    if stage == "cfo":
+        user = f"{context}FINANCIAL KPIs:\n{fin_kpis_str}"
+    elif stage == "cmo":
+        user = f"{context}MARKETING KPIs:\n{mkt_kpis_str}"
+    elif stage == "coo":
+        user = f"{context}OPERATING KPIs:\n{ops_kpis_str}"
+    elif get_consultant_budget():
+        user = build_consultant_input(
+            context,
+            get_report_kpis(report),
+            {"cfo": report.cfo_report, "cmo": report.cmo_report, "coo": report.coo_report},
+            budget=get_consultant_budget(),
         )
-        consultant_user = (
+    else:
+        user = (
             f"{context}"
             f"FINANCIAL KPIs:\n{fin_kpis_str}\n\n"
             f"MARKETING KPIs:\n{mkt_kpis_str}\n\n"
             f"OPERATING KPIs:\n{ops_kpis_str}\n\n"
-            f"--- CFO REPORT ---\n{cfo_report}\n\n"
-            f"--- CMO REPORT ---\n{cmo_report}\n\n"
-            f"--- COO REPORT ---\n{coo_report}"
-        )
-        consultant_report = call_claude(
-            PROMPTS["consultant"], consultant_user, api_key, model
+            f"--- CFO REPORT ---\n{report.cfo_report}\n\n"
+            f"--- CMO REPORT ---\n{report.cmo_report}\n\n"
+            f"--- COO REPORT ---\n{report.coo_report}"
         )
+    return PROMPTS[stage], user
 
-        # ── 7. Persist results ───────────────────────────────────────────────
-        report.status             = "Complete"
-        report.run_duration       = round(time.time() - start_time, 1)
-        report.profile_data       = json.dumps(profile, ensure_ascii=False)
-        report.financial_data     = json.dumps(fin_data, ensure_ascii=False)
-        report.marketing_data     = json.dumps(mkt_data, ensure_ascii=False)
-        report.operating_data     = json.dumps(ops_data, ensure_ascii=False)
-        report.financial_kpis     = json.dumps(fin_kpis, ensure_ascii=False)
-        report.marketing_kpis     = json.dumps(mkt_kpis, ensure_ascii=False)
-        report.operating_kpis     = json.dumps(ops_kpis, ensure_ascii=False)
-        report.intelligence_brief = intelligence
-        report.cfo_report         = cfo_report
-        report.cmo_report         = cmo_report
-        report.coo_report         = coo_report
-        report.consultant_report  = consultant_report
-        report.save(ignore_permissions=True)
-        frappe.db.commit()
 
-    except Exception:
-        report.status       = "Error"
-        report.error_log    = frappe.get_traceback()
-        report.run_duration = round(time.time() - start_time, 1)
-        report.save(ignore_permissions=True)
-        frappe.db.commit()
-        raise
+def _checkpoint(report, **values):
+    """Persist stage results immediately so they survive a later failure."""
+    report.db_set(values, commit=True)
 
-    return report.name
+
+def _build_profile(company):
+    """Build the business profile dict from Shop Settings."""
+    settings = frappe.get_single("Shop Settings")
+    return {
+        "companyName":       settings.shop_name or company,
+        "industry":          settings.shop_type or "Retail",
+        "businessModel":     "Retail",
+        "stage":             "SME",
+        "strategicPriority": "Operational Efficiency",
+        "mission":           "",
+        "vision":            "",
+        "competitors":       "",
+    }
+
+
+def _load_json(value):
+    """Parse a JSON field that may already be deserialised."""
+    if not value:
+        return {}
+    return json.loads(value) if isinstance(value, str) else value
+
+
+# ─── Run identity & in-flight deduplication ──────────────────────────────────
+
+_RUN_LOCK_TTL = 900        # longer than the slowest possible pipeline
+_RUN_WAIT_TIMEOUT = 30      # only until the other run has inserted its report
+_RUN_WAIT_INTERVAL = 2
+
+
+def extract_data_with_metric(company, from_date, to_date, overrides=None):
+    """Extract snapshots and return ((fin, mkt, ops), extraction_metric)."""
+    start = time.perf_counter()
+    frappe.flags.pulsecheck_query_count = 0
+    try:
+        snapshots = _extract_data(company, from_date, to_date, overrides)
+    finally:
+        metric = {
+            "stage":       "extraction",
+            "duration":    round(time.perf_counter() - start, 3),
+            "query_count": frappe.flags.pulsecheck_query_count,
+        }
+        frappe.flags.pulsecheck_query_count = None
+    return snapshots, metric
+
+
+def _extract_data(company, from_date, to_date, overrides=None):
+    """Extract the three PulseCheck snapshots and apply user overrides."""
+    from gebeyaerp.services.pulsecheck import (
+        get_financial_snapshot,
+        get_marketing_snapshot,
+        get_operating_snapshot,
+    )
+    fin_data = get_financial_snapshot(company, from_date, to_date)
+    mkt_data = get_marketing_snapshot(company, from_date, to_date)
+    ops_data = get_operating_snapshot(company, from_date, to_date)
+
+    # Apply user overrides (allows correcting auto-extracted numbers)
+    if overrides:
+        ov = json.loads(overrides) if isinstance(overrides, str) else overrides
+        fin_data.update(ov.get("financial", {}))
+        mkt_data.update(ov.get("marketing", {}))
+        ops_data.update(ov.get("operating", {}))
+
+    return fin_data, mkt_data, ops_data
+
+
+def make_run_key(company, from_date, to_date, snapshots, model):
+    """Return the identity of a run: (company, period, snapshot hash, model)."""
+    snapshot_hash = hashlib.sha1(
+        json.dumps(snapshots, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    identity = json.dumps(
+        [company, str(from_date), str(to_date), snapshot_hash, model]
+    )
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def find_complete_report(run_key):
+    """Return the newest Complete report for run_key, if any."""
+    return frappe.db.get_value(
+        "PulseCheck Report",
+        {"run_key": run_key, "status": "Complete"},
+        "name",
+        order_by="creation desc",
+    )
+
+
+def _run_lock_key(run_key):
+    return frappe.cache().make_key(f"pulsecheck:run_lock:{run_key}")
+
+
+def _acquire_run_lock(run_key, token):
+    """Take the in-flight lock for run_key. Returns False if already held."""
+    return bool(
+        frappe.cache().set(_run_lock_key(run_key), token, nx=True, ex=_RUN_LOCK_TTL)
+    )
+
+
+def _release_run_lock(run_key, token):
+    """Release the lock only if we still own it."""
+    frappe.cache().eval(
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) end return 0",
+        1, _run_lock_key(run_key), token,
+    )
+
+
+def _wait_for_inflight_run(run_key):
+    """Attach to an identical run in progress and return its report name.
+
+    Returns as soon as the other run's report exists; the PulseCheck page
+    polls a Processing report until it finishes, so the request only waits
+    out the moment between that run taking the lock and inserting its report.
+    """
+    key = _run_lock_key(run_key)
+    deadline = time.time() + _RUN_WAIT_TIMEOUT
+    while True:
+        # Read committed rows written by the other worker
+        frappe.db.rollback()
+        report = frappe.db.get_value(
+            "PulseCheck Report", {"run_key": run_key}, ["name", "status"],
+            as_dict=True, order_by="creation desc",
+        )
+        if report and report.status != "Error":
+            return report.name
+        # Raw GET on the prefixed key (RedisWrapper.exists would prefix it again)
+        if frappe.cache().get(key) is None or time.time() >= deadline:
+            break
+        time.sleep(_RUN_WAIT_INTERVAL)
+
+    if report:
+        frappe.throw(
+            f"The identical PulseCheck run {report.name} failed. "
+            "Open it on the PulseCheck page and resume it."
+        )
+    frappe.throw("An identical PulseCheck run is still in progress. Please try again shortly.")
 
 
 @frappe.whitelist()
 def get_pulsecheck_report(report_name):
-    """Fetch a PulseCheck Report for the UI.
+    """Fetch a whole PulseCheck Report, every section included.
+
+    The PulseCheck page uses get_pulsecheck_report_meta and
+    get_pulsecheck_section instead, which load one section at a time.
 
     Args:
         report_name: Name of the PulseCheck Report document
@@ -372,7 +936,10 @@ def get_pulsecheck_report(report_name):
         "status":             doc.status,
         "run_duration":       doc.run_duration,
         "claude_model":       doc.claude_model,
+        "analysis_engine":    doc.analysis_engine,
         "intelligence_brief": doc.intelligence_brief,
+        "intelligence_gathered_at": str(doc.intelligence_gathered_at or ""),
+        "intelligence_cached": doc.intelligence_cached,
         "cfo_report":         doc.cfo_report,
         "cmo_report":         doc.cmo_report,
         "coo_report":         doc.coo_report,
@@ -381,4 +948,105 @@ def get_pulsecheck_report(report_name):
         "marketing_kpis":     doc.marketing_kpis,
         "operating_kpis":     doc.operating_kpis,
         "error_log":          doc.error_log,
+        "failed_stage":       doc.failed_stage,
+    }
+
+
+# Light fields of a report, for the page header and history
+_REPORT_META_FIELDS = (
+    "name", "company", "from_date", "to_date", "status", "run_duration", "claude_model",
+    "analysis_engine", "intelligence_gathered_at", "intelligence_cached", "failed_stage",
+)
+
+# Report page section → PulseCheck Report fields it needs
+REPORT_SECTIONS = {
+    "consultant": ("consultant_report",),
+    "cfo":        ("cfo_report",),
+    "cmo":        ("cmo_report",),
+    "coo":        ("coo_report",),
+    "intel":      ("intelligence_brief",),
+    "kpis":       ("financial_kpis", "marketing_kpis", "operating_kpis"),
+    "error":      ("error_log",),
+}
+
+
+@frappe.whitelist()
+def get_pulsecheck_report_meta(report_name):
+    """Fetch a report's header fields and which sections have content.
+
+    No Long Text field is read; the page fetches each section on demand
+    with get_pulsecheck_section.
+
+    Returns:
+        dict: The fields in _REPORT_META_FIELDS plus ``sections`` (list of
+        REPORT_SECTIONS keys that are non-empty)
+    """
+    frappe.has_permission("PulseCheck Report", "read", doc=report_name, throw=True)
+    meta = frappe.db.get_value("PulseCheck Report", report_name, _REPORT_META_FIELDS, as_dict=True)
+    if not meta:
+        frappe.throw(f"PulseCheck Report {report_name} not found", frappe.DoesNotExistError)
+
+    fields = [f for section in REPORT_SECTIONS.values() for f in section]
+    lengths = frappe.db.sql(
+        "SELECT {} FROM `tabPulseCheck Report` WHERE name = %s".format(
+            ", ".join(f"IFNULL(LENGTH(`{f}`), 0) AS `{f}`" for f in fields)
+        ),
+        report_name,
+        as_dict=True,
+    )[0]
+
+    meta.update({
+        "from_date": str(meta.from_date),
+        "to_date": str(meta.to_date),
+        "intelligence_gathered_at": str(meta.intelligence_gathered_at or ""),
+        "sections": [
+            section for section, section_fields in REPORT_SECTIONS.items()
+            if any(lengths[f] for f in section_fields)
+        ],
+    })
+    return meta
+
+
+@frappe.whitelist()
+def get_pulsecheck_section(report_name, section):
+    """Fetch the text of one report section.
+
+    Args:
+        report_name: Name of the PulseCheck Report document
+        section: A key of REPORT_SECTIONS (consultant, cfo, cmo, coo, intel, kpis, error)
+
+    Returns:
+        dict of {fieldname: plain text}; markdown sections also carry
+        ``html``: {fieldname: sanitized HTML} from the render cache
+    """
+    if section not in REPORT_SECTIONS:
+        frappe.throw(f"Unknown PulseCheck section: {section}")
+    frappe.has_permission("PulseCheck Report", "read", doc=report_name, throw=True)
+
+    fields = REPORT_SECTIONS[section]
+    markdown_fields = [f for f in fields if f in HTML_FIELDS]
+    values = frappe.db.get_value(
+        "PulseCheck Report", report_name,
+        list(fields) + (["html_cache"] if markdown_fields else []),
+        as_dict=True,
+    ) or {}
+    result = {field: decompress_text(values.get(field)) for field in fields}
+    if not markdown_fields:
+        return result
+
+    html_cache = decompress_text(values.get("html_cache"))
+    result["html"] = {
+        field: get_cached_html(html_cache, field, result[field]) for field in markdown_fields
     }
+    stale = {field: result[field] for field, html in result["html"].items() if html is None}
+    if stale:
+        # Rendered before the cache existed, or edited since: render once and keep it
+        html_cache = refresh_cache(html_cache, stale)
+        if html_cache is not None:
+            frappe.db.set_value(
+                "PulseCheck Report", report_name, "html_cache", compress_text(html_cache),
+                update_modified=False,
+            )
+        for field in stale:
+            result["html"][field] = get_cached_html(html_cache, field, result[field])
+    return result
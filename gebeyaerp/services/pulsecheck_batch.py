@@ -0,0 +1,302 @@
+"""Batch execution mode for fleet-wide PulseCheck runs.
+
+Instead of four synchronous Claude calls per company, all specialist
+requests for many companies go out as one asynchronous Message Batch (half
+the per-token price, no per-request rate limiting):
+
+1. ``run_pulsecheck_batch`` queues ``prepare_pulsecheck_batch`` on the long
+   queue, which extracts data, computes KPIs and the (cached) intelligence
+   brief for every company, then submits the CFO/CMO/COO requests of all
+   companies as one batch.
+2. ``poll_pulsecheck_batches`` (scheduler, every 5 minutes) fans finished
+   results back into each PulseCheck Report and submits the consultant
+   requests as a second batch; when those land the reports are Complete.
+
+Reports carry the id of the batch they are waiting on in ``batch_id``. A
+request that fails inside a batch marks only its report as Error, which can
+then be finished with the normal resume action.
+"""
+
+import hashlib
+from datetime import datetime
+
+import frappe
+from frappe.utils import cint, now_datetime, time_diff_in_seconds
+
+from gebeyaerp.services.claude_batch import (
+    get_batch,
+    iter_batch_results,
+    result_error,
+    submit_batch,
+)
+from gebeyaerp.services.pulsecheck_ai import (
+    STAGE_FIELDS,
+    build_messages_payload,
+    build_stage_prompt,
+    create_report,
+    ensure_intelligence,
+    ensure_kpis,
+    extract_data_with_metric,
+    extract_text,
+    find_complete_report,
+    get_api_base_url,
+    get_claude_config,
+    make_run_key,
+)
+from gebeyaerp.services.pulsecheck_metrics import apply_usage, record_stage_metric
+from gebeyaerp.services.pulsecheck_pdf import enqueue_board_pack
+
+
+_CUSTOM_ID_SEP = "--"      # custom_id must match ^[a-zA-Z0-9_-]{1,64}$
+_PREPARE_TIMEOUT = 4 * 3600
+
+
+@frappe.whitelist()
+def run_pulsecheck_batch(from_date, to_date, companies=None, force=0):
+    """Queue a batch PulseCheck run for many companies.
+
+    Preparation (extraction, KPIs, intelligence) runs on the long queue, so
+    a fleet does not hold a web request; an identical run already queued is
+    not queued again.
+
+    Args:
+        from_date: Analysis period start (YYYY-MM-DD)
+        to_date: Analysis period end (YYYY-MM-DD)
+        companies: Optional JSON list of company names (default: all non-group)
+        force: Truthy to re-run companies that already have a Complete report
+
+    Returns:
+        dict with keys: run_id (the RQ job id), companies
+    """
+    frappe.has_permission("PulseCheck Report", "create", throw=True)
+
+    api_key, model = get_claude_config()
+    if not api_key:
+        frappe.throw(
+            "Claude API key not configured. "
+            "Please set it in Shop Settings or add claude_api_key to site_config.json."
+        )
+
+    if companies:
+        companies = frappe.parse_json(companies)
+    else:
+        companies = frappe.get_all("Company", filters={"is_group": 0}, pluck="name")
+
+    identity = frappe.as_json([sorted(companies), cint(force)])
+    run_id = (
+        f"pulsecheck_batch::{from_date}::{to_date}::"
+        f"{hashlib.sha1(identity.encode()).hexdigest()[:10]}"
+    )
+    frappe.enqueue(
+        "gebeyaerp.services.pulsecheck_batch.prepare_pulsecheck_batch",
+        queue="long",
+        timeout=_PREPARE_TIMEOUT,
+        job_id=run_id,
+        deduplicate=True,
+        from_date=from_date,
+        to_date=to_date,
+        companies=companies,
+        force=cint(force),
+    )
+    return {"run_id": run_id, "companies": len(companies)}
+
+
+def prepare_pulsecheck_batch(from_date, to_date, companies, force=0):
+    """Prepare every company's report and submit the specialist batch.
+
+    Runs as a background job (see run_pulsecheck_batch); the outcome is
+    logged to pulsecheck_batch.log.
+
+    A company that fails is left out of the batch: before its report exists
+    it is only logged, after that its report is marked Error so it can be
+    resumed.
+
+    Returns:
+        dict with keys: batch_id, reports, skipped (companies with a
+        Complete report), failed (companies that could not be prepared)
+    """
+    api_key, model = get_claude_config()
+    reports, skipped, failed = [], [], []
+    for company in companies:
+        report = None
+        try:
+            (fin_data, mkt_data, ops_data), extraction_metric = extract_data_with_metric(
+                company, from_date, to_date
+            )
+            run_key = make_run_key(
+                company, from_date, to_date, (fin_data, mkt_data, ops_data), model
+            )
+            if not cint(force) and find_complete_report(run_key):
+                skipped.append(company)
+                continue
+
+            report = create_report(
+                company, from_date, to_date, model, run_key,
+                fin_data, mkt_data, ops_data, extraction_metric,
+            )
+            ensure_kpis(report)
+            ensure_intelligence(report, api_key, model)
+        except Exception:
+            frappe.db.rollback()
+            if report is None:
+                # Nothing to resume: the company simply stays out of the batch
+                frappe.log_error(frappe.get_traceback(), f"PulseCheck: batch preparation failed for {company}")
+            else:
+                stage = "intelligence" if report.financial_kpis else "kpis"
+                _mark_error(report, stage, frappe.get_traceback())
+            failed.append(company)
+            continue
+        reports.append(report)
+
+    batch_id = _submit_stages(reports, ("cfo", "cmo", "coo"), api_key, model)
+    result = {
+        "batch_id": batch_id,
+        "reports":  [r.name for r in reports],
+        "skipped":  skipped,
+        "failed":   failed,
+    }
+    frappe.logger("pulsecheck_batch").info({"event": "pulsecheck_batch_submitted", **result})
+    return result
+
+
+def poll_pulsecheck_batches():
+    """Collect ended batches and advance their reports.
+
+    Called every 5 minutes via scheduler_events -> cron in hooks.py.
+    """
+    batch_ids = frappe.get_all(
+        "PulseCheck Report",
+        filters={"status": "Processing", "batch_id": ["is", "set"]},
+        pluck="batch_id",
+        distinct=True,
+    )
+    if not batch_ids:
+        return
+
+    api_key, model = get_claude_config()
+    for batch_id in set(batch_ids):
+        try:
+            _collect_batch(batch_id, api_key, model)
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(frappe.get_traceback(), f"PulseCheck: batch {batch_id} poll failed")
+
+
+def _collect_batch(batch_id, api_key, model):
+    """Fan an ended batch's results into its reports and submit the next stage."""
+    base_url = get_api_base_url()
+    batch = get_batch(batch_id, api_key, base_url)
+    if batch.get("processing_status") != "ended":
+        return
+
+    names = frappe.get_all(
+        "PulseCheck Report",
+        filters={"batch_id": batch_id, "status": "Processing"},
+        pluck="name",
+    )
+    reports = {name: frappe.get_doc("PulseCheck Report", name) for name in names}
+    duration = _batch_duration(batch)
+
+    for custom_id, result in iter_batch_results(batch, api_key, base_url):
+        name, _sep, stage = custom_id.rpartition(_CUSTOM_ID_SEP)
+        report = reports.get(name)
+        if not report or report.status != "Processing" or stage not in STAGE_FIELDS:
+            continue
+        # Already filed by an earlier poll of this batch that did not finish
+        if report.get(STAGE_FIELDS[stage]):
+            continue
+
+        # The stage result and its metric row are committed together, so a
+        # re-read of the batch never records the metric twice
+        if result.get("type") == "succeeded":
+            message = result["message"]
+            metric = {"stage": stage, "duration": duration, "model": message.get("model"), "retries": 0}
+            apply_usage(metric, message)
+            report.db_set(STAGE_FIELDS[stage], extract_text(message))
+            record_stage_metric(report, metric)
+        else:
+            _mark_error(report, stage, result_error(result), commit=False)
+            record_stage_metric(report, {"stage": stage, "duration": duration, "failed": 1})
+
+    needs_consultant = []
+    for report in reports.values():
+        if report.status != "Processing":
+            continue
+        if report.consultant_report:
+            report.db_set({
+                "status":       "Complete",
+                "batch_id":     None,
+                "error_log":    None,
+                "run_duration": round(time_diff_in_seconds(now_datetime(), report.creation), 1),
+            }, commit=True)
+            enqueue_board_pack(report.name)
+        elif report.cfo_report and report.cmo_report and report.coo_report:
+            needs_consultant.append(report)
+        else:
+            missing = next(s for s in ("cfo", "cmo", "coo") if not report.get(STAGE_FIELDS[s]))
+            _mark_error(report, missing, f"Batch {batch_id} returned no result for this stage.")
+
+    _submit_stages(needs_consultant, ("consultant",), api_key, model)
+
+
+def _submit_stages(reports, stages, api_key, model):
+    """Submit one batch with every missing stage of every report.
+
+    A report whose prompt cannot be built is marked Error and left out;
+    the others are still submitted.
+
+    Returns:
+        str or None: The batch id, or None if there was nothing to submit
+    """
+    batch_requests, submitted = [], []
+    for report in reports:
+        report_requests = []
+        for stage in stages:
+            if report.get(STAGE_FIELDS[stage]):
+                continue
+            try:
+                system, user = build_stage_prompt(report, stage)
+            except Exception:
+                _mark_error(report, stage, frappe.get_traceback())
+                report_requests = []
+                break
+            report_requests.append({
+                "custom_id": f"{report.name}{_CUSTOM_ID_SEP}{stage}",
+                "params":    build_messages_payload(system, user, report.claude_model or model),
+            })
+        if report_requests:
+            batch_requests.extend(report_requests)
+            submitted.append(report)
+    if not batch_requests:
+        return None
+
+    try:
+        batch = submit_batch(batch_requests, api_key, get_api_base_url())
+    except Exception:
+        for report in submitted:
+            _mark_error(report, stages[0], frappe.get_traceback())
+        raise
+
+    for report in submitted:
+        report.db_set("batch_id", batch["id"])
+    frappe.db.commit()
+    return batch["id"]
+
+
+def _mark_error(report, stage, error_log, commit=True):
+    report.db_set({
+        "status":       "Error",
+        "failed_stage": stage,
+        "error_log":    error_log,
+        "batch_id":     None,
+    }, commit=commit)
+
+
+def _batch_duration(batch):
+    """Wall-clock seconds between batch creation and end (0 if unknown)."""
+    try:
+        created = datetime.fromisoformat(batch["created_at"].replace("Z", "+00:00"))
+        ended = datetime.fromisoformat(batch["ended_at"].replace("Z", "+00:00"))
+        return round((ended - created).total_seconds(), 3)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return 0
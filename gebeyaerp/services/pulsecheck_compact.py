@@ -0,0 +1,182 @@
+"""Context compaction for the PulseCheck consultant stage.
+
+The consultant only needs the conclusions of the CFO, CMO and COO reports,
+not their full prose, and the KPI numbers without JSON indentation. This
+module shrinks the consultant's input to a token budget:
+
+- specialist reports are split into their bold-heading sections and kept
+  in order of importance (verdict, red flags, directives first);
+- KPI dicts are flattened to one line per category;
+- if the result is still over budget, the lowest-priority sections are
+  dropped, then the remaining ones are cut at a sentence boundary.
+
+Pure Python — no Frappe imports — so it can be unit tested standalone.
+"""
+
+import math
+import re
+
+
+DEFAULT_CONSULTANT_BUDGET = 6000     # tokens for the three specialist digests
+MIN_SECTION_TOKENS = 60
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s*)?\*\*(.+?)\*\*\s*[—:\-–]*\s*(.*)$|^\s*#{1,6}\s+(.+)$")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Section keyword → priority (1 = always keep). Keywords are matched
+# case-insensitively against the section heading; unmatched sections get 3.
+SECTION_PRIORITY = {
+    "cfo": (
+        ("executive summary", 1), ("red flag", 1), ("directive", 1),
+        ("green flag", 2), ("benchmark", 3),
+    ),
+    "cmo": (
+        ("growth engine", 1), ("retention", 1), ("strateg", 1),
+        ("growth vs", 2), ("revenue impact", 2),
+    ),
+    "coo": (
+        ("health check", 1), ("bottleneck", 1), ("directive", 1),
+        ("strength", 2), ("roadmap", 3),
+    ),
+}
+_DEFAULT_PRIORITY = 3
+
+
+def estimate_tokens(text):
+    """Estimate the Claude token count of text without a tokenizer.
+
+    Each word costs one token per ~4 characters and every punctuation mark
+    costs one, which tracks the real tokenizer within ~10–15% for English
+    prose, markdown and JSON — close enough for budgeting.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _WORD_RE.findall(str(text)):
+        tokens += max(1, math.ceil(len(piece) / 4)) if piece[0].isalnum() or piece[0] == "_" else 1
+    return tokens
+
+
+def split_sections(markdown):
+    """Split a specialist report into [(heading, body)] by its bold headings.
+
+    Text before the first heading is returned with an empty heading.
+    """
+    sections = []
+    heading, lines = "", []
+    for line in (markdown or "").splitlines():
+        match = _HEADING_RE.match(line)
+        if match:
+            if heading or any(l.strip() for l in lines):
+                sections.append((heading, "\n".join(lines).strip()))
+            heading = (match.group(1) or match.group(3) or "").strip()
+            lines = [match.group(2)] if match.group(2) else []
+        else:
+            lines.append(line)
+    if heading or any(l.strip() for l in lines):
+        sections.append((heading, "\n".join(lines).strip()))
+    return sections
+
+
+def section_priority(role, heading):
+    """Priority of a section heading for a specialist role (1 = essential)."""
+    lowered = heading.lower()
+    for keyword, priority in SECTION_PRIORITY.get(role, ()):
+        if keyword in lowered:
+            return priority
+    return _DEFAULT_PRIORITY
+
+
+def compact_report(markdown, role, budget):
+    """Reduce one specialist report to at most ``budget`` estimated tokens.
+
+    Sections keep their original order. Lowest-priority sections are
+    dropped first; if the essential ones alone exceed the budget, each is
+    cut at a sentence boundary to its share of the budget.
+    """
+    sections = [
+        (heading, body, section_priority(role, heading))
+        for heading, body in split_sections(markdown)
+        if heading       # preamble ("Here is my analysis…") carries no content
+    ]
+    if not sections:
+        return truncate_to_tokens((markdown or "").strip(), budget)
+
+    def render(parts):
+        return "\n".join(f"**{h}** — {b}" if b else f"**{h}**" for h, b, _p in parts)
+
+    kept = list(sections)
+    tiers = sorted({p for _h, _b, p in sections})
+    for cutoff in reversed(tiers[1:]):      # never drop the most important tier
+        if estimate_tokens(render(kept)) <= budget:
+            break
+        kept = [s for s in kept if s[2] < cutoff]
+
+    if estimate_tokens(render(kept)) <= budget:
+        return render(kept)
+
+    share = max(budget // max(len(kept), 1), MIN_SECTION_TOKENS)
+    return render([(h, truncate_to_tokens(b, share), p) for h, b, p in kept])
+
+
+def truncate_to_tokens(text, budget):
+    """Cut text to at most ``budget`` estimated tokens at a sentence boundary."""
+    if estimate_tokens(text) <= budget:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_END_RE.split(text):
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if not kept:       # a single very long sentence: cut on words
+        words = text.split()
+        while words and estimate_tokens(" ".join(words)) > budget - 1:
+            words = words[: max(len(words) * 3 // 4, len(words) - 50)]
+        return " ".join(words) + " …"
+    return " ".join(kept) + " …"
+
+
+def flatten_kpis(kpis):
+    """Render a nested KPI dict as one ``Category: name value; …`` line per category."""
+    lines = []
+    for category, metrics in (kpis or {}).items():
+        if isinstance(metrics, dict):
+            pairs = "; ".join(f"{name} {value}" for name, value in metrics.items())
+            lines.append(f"{category}: {pairs}")
+        else:
+            lines.append(f"{category}: {metrics}")
+    return "\n".join(lines)
+
+
+def build_consultant_input(context, kpis, reports, budget=DEFAULT_CONSULTANT_BUDGET):
+    """Build the consultant user prompt from compacted parts.
+
+    Args:
+        context: Business context block (profile + market intelligence)
+        kpis: dict of {"financial"|"marketing"|"operating": nested KPI dict}
+        reports: dict of {"cfo"|"cmo"|"coo": markdown report}
+        budget: Token budget shared by the three specialist digests
+
+    Returns:
+        str: The user message for the consultant stage
+    """
+    kpi_block = "\n".join(
+        f"[{label.upper()}]\n{flatten_kpis(values)}" for label, values in kpis.items() if values
+    )
+
+    roles = [role for role in ("cfo", "cmo", "coo") if reports.get(role)]
+    sizes = {role: estimate_tokens(reports[role]) for role in roles}
+    # Short reports keep everything; their unused share goes to the long ones.
+    remaining, digests = budget, {}
+    for i, role in enumerate(sorted(roles, key=sizes.get)):
+        share = remaining // (len(roles) - i)
+        digests[role] = compact_report(reports[role], role, share)
+        remaining -= min(estimate_tokens(digests[role]), share)
+
+    parts = [f"{context}KEY KPIs:\n{kpi_block}"]
+    for role in roles:
+        parts.append(f"--- {role.upper()} REPORT (key sections) ---\n{digests[role]}")
+    return "\n\n".join(parts)
@@ -0,0 +1,150 @@
+"""PulseCheck KPI history store.
+
+Every computed KPI is also written as one typed row of PulseCheck KPI Fact,
+a narrow table indexed on (company, kpi_code, to_date). Trend charts and
+period-over-period deltas read it with a single indexed query each, without
+loading and parsing the JSON KPI fields of PulseCheck Report documents.
+"""
+
+import json
+
+import frappe
+from frappe.utils import add_days, date_diff, getdate, now_datetime
+
+from gebeyaerp.services.pulsecheck_kpis import kpi_facts
+
+FACT_DOCTYPE = "PulseCheck KPI Fact"
+KPI_GROUPS = ("financial", "marketing", "operating")
+
+
+def record_kpi_facts(report, kpis=None):
+    """Replace the KPI facts of a report's company and period.
+
+    Args:
+        report: PulseCheck Report doc
+        kpis: {"financial"|"marketing"|"operating": KPI dict}; read from the
+            report's *_kpis fields when omitted
+
+    Returns:
+        Number of facts written
+    """
+    if kpis is None:
+        kpis = {group: _load(report.get(f"{group}_kpis")) for group in KPI_GROUPS}
+    facts = kpi_facts(kpis)
+
+    # One row per (company, period, kpi): a re-run of the same period replaces
+    # the previous run's values instead of doubling the trend points.
+    frappe.db.delete(FACT_DOCTYPE, {
+        "company": report.company,
+        "from_date": report.from_date,
+        "to_date": report.to_date,
+    })
+    if not facts:
+        return 0
+
+    period_days = date_diff(report.to_date, report.from_date) + 1
+    now = now_datetime()
+    user = frappe.session.user
+    fields = [
+        "name", "creation", "modified", "owner", "modified_by",
+        "company", "from_date", "to_date", "period_days",
+        "kpi_code", "kpi_group", "value", "display_value", "report",
+    ]
+    rows = [
+        (frappe.generate_hash(length=10), now, now, user, user,
+         report.company, report.from_date, report.to_date, period_days,
+         code, group, value, display[:140], report.name)
+        for code, group, value, display in facts
+    ]
+    frappe.db.bulk_insert(FACT_DOCTYPE, fields, rows)
+    return len(rows)
+
+
+@frappe.whitelist()
+def get_kpi_trend(company, kpi_code, limit=12, period_days=None):
+    """Return the latest values of one KPI, oldest first, for a trend chart.
+
+    Args:
+        company: Company name
+        kpi_code: "group.Category.KPI", e.g. "financial.Profitability.Gross_Margin"
+        limit: Number of periods (max 120)
+        period_days: Only periods of this length (e.g. 30), so monthly and
+            quarterly runs are not mixed on one chart
+
+    Returns:
+        list of {"from_date", "to_date", "value", "display_value"}
+    """
+    frappe.has_permission("PulseCheck Report", "read", throw=True)
+    filters = {"company": company, "kpi_code": kpi_code}
+    if period_days:
+        filters["period_days"] = int(period_days)
+
+    rows = frappe.get_all(
+        FACT_DOCTYPE,
+        filters=filters,
+        fields=["from_date", "to_date", "value", "display_value"],
+        order_by="to_date desc",
+        limit_page_length=min(int(limit or 12), 120),
+    )
+    rows.reverse()
+    return rows
+
+
+@frappe.whitelist()
+def get_kpi_deltas(company, from_date, to_date):
+    """Compare every KPI of a period with the preceding period of equal length.
+
+    Args:
+        company: Company name
+        from_date, to_date: The current period
+
+    Returns:
+        {"current": {from_date, to_date}, "previous": {from_date, to_date},
+         "kpis": {kpi_code: {"value", "display_value", "previous", "delta",
+                             "delta_pct"}}}
+    """
+    frappe.has_permission("PulseCheck Report", "read", throw=True)
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    prev_to = add_days(from_date, -1)
+    prev_from = add_days(prev_to, -date_diff(to_date, from_date))
+
+    rows = frappe.get_all(
+        FACT_DOCTYPE,
+        filters={
+            "company": company,
+            "from_date": ["in", [from_date, prev_from]],
+            "to_date": ["in", [to_date, prev_to]],
+        },
+        fields=["from_date", "to_date", "kpi_code", "value", "display_value"],
+    )
+    current = {r.kpi_code: r for r in rows if getdate(r.to_date) == to_date and getdate(r.from_date) == from_date}
+    previous = {r.kpi_code: r.value for r in rows if getdate(r.to_date) == prev_to and getdate(r.from_date) == prev_from}
+
+    kpis = {}
+    for code, row in current.items():
+        before = previous.get(code)
+        delta = None if before is None else row.value - before
+        kpis[code] = {
+            "value": row.value,
+            "display_value": row.display_value,
+            "previous": before,
+            "delta": delta,
+            "delta_pct": round(delta / abs(before) * 100, 1) if delta is not None and before else None,
+        }
+
+    return {
+        "current": {"from_date": str(from_date), "to_date": str(to_date)},
+        "previous": {"from_date": str(prev_from), "to_date": str(prev_to)},
+        "kpis": kpis,
+    }
+
+
+def _load(value):
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return value
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return {}
@@ -4,6 +4,11 @@ Ported from PulseCheck's JavaScript kpi.js.
 All formulas are identical to the original implementation.
 """
 
+import re
+
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
 
 def safe_div(numerator, denominator, default=0):
     """Safely divide two numbers, returning default if denominator is 0."""
@@ -23,6 +28,41 @@ def pct(value):
         return "0.0%"
 
 
+def parse_kpi_value(value):
+    """Return a KPI display value as a float: "15.3%" → 15.3, "ETB 1,200" → 1200.0.
+
+    Returns None for values with no number (e.g. "Healthy").
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.search(str(value or "").replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def kpi_facts(kpis_by_group):
+    """Flatten KPI sets into (kpi_code, group, value, display_value) rows.
+
+    Args:
+        kpis_by_group: {"financial"|"marketing"|"operating": nested KPI dict}
+
+    Returns:
+        list of tuples; kpi_code is "group.Category.KPI". Non-numeric KPIs
+        (e.g. Unit_Economics.Status) are skipped.
+    """
+    facts = []
+    for group, kpis in kpis_by_group.items():
+        for category, metrics in (kpis or {}).items():
+            if not isinstance(metrics, dict):
+                continue
+            for name, display in metrics.items():
+                value = parse_kpi_value(display)
+                if value is not None:
+                    facts.append((f"{group}.{category}.{name}", group, value, str(display)))
+    return facts
+
+
 def _g(d, key, default=0):
     """Get a numeric value from dict d, defaulting to 0 on None/missing."""
     v = d.get(key, default)
@@ -101,6 +141,10 @@ def calc_marketing_kpis(d):
 
     Categories: Acquisition (3), Retention (3), Unit Economics (4).
 
+    Churn and NRR come from the cohort engine when the snapshot carries them
+    (``churn_rate``/``net_revenue_retention``, 0–1 ratios); otherwise they
+    are estimated from the start/end customer counts.
+
     Args:
         d: dict with marketing data fields
 
@@ -124,6 +168,12 @@ def calc_marketing_kpis(d):
     start_rev = customers_start * arpu
     nrr = safe_div(start_rev + expansion_revenue - (lost * arpu), start_rev)
 
+    if (d or {}).get("churn_rate") is not None:
+        churn = float(d["churn_rate"])
+        retention = 1 - churn
+    if (d or {}).get("net_revenue_retention") is not None:
+        nrr = float(d["net_revenue_retention"])
+
     ltv     = safe_div(arpu * gross_margin, churn) if churn > 0 else 0
     ltv_cac = safe_div(ltv, cac)
     payback = safe_div(cac, arpu * gross_margin) if (arpu * gross_margin) > 0 else 0
@@ -0,0 +1,388 @@
+"""Local, rule-based PulseCheck analyst.
+
+Produces the CFO, CMO, COO and consultant sections from the KPI dicts alone,
+using retail benchmark thresholds and templated findings. It needs no API
+key and no network and runs in milliseconds, so it serves both as an
+instant preview while the Claude pipeline runs and as a complete offline
+fallback.
+
+Sections use the same bold headings as the Claude prompts, so the report
+page and the consultant compaction treat both engines alike.
+
+Pure Python — no Frappe imports — so it can be unit tested standalone.
+"""
+
+from gebeyaerp.services.pulsecheck_kpis import parse_kpi_value
+
+
+ENGINE_NOTE = "_Offline analysis: generated from benchmark thresholds, without AI._"
+
+# (category, kpi, label, higher_is_better, good, watch, directive)
+# A value at least as good as `good` is a strength, one worse than `watch`
+# is a red flag, anything between is a watch item.
+RULES = {
+    "cfo": (
+        ("Liquidity", "Current_Ratio", "Current ratio", True, 1.5, 1.0,
+         "Rebuild working capital: clear aged stock and stagger supplier payments until current assets cover 1.5× current liabilities."),
+        ("Liquidity", "Quick_Ratio", "Quick ratio", True, 1.0, 0.5,
+         "Hold a cash reserve of at least one month of supplier payments so obligations do not depend on selling stock."),
+        ("Liquidity", "Cash_Ratio", "Cash ratio", True, 0.5, 0.2,
+         "Sweep daily takings to the bank and set a minimum cash balance before any discretionary spend."),
+        ("Solvency", "Debt_Ratio", "Debt ratio", False, 0.5, 0.7,
+         "Stop new borrowing and direct surplus cash to the most expensive liabilities first."),
+        ("Profitability", "Gross_Margin", "Gross margin", True, 30, 20,
+         "Review the bottom 20% of items by margin: reprice, renegotiate cost, or delist."),
+        ("Profitability", "Net_Profit_Margin", "Net profit margin", True, 5, 2,
+         "Set a monthly operating-expense ceiling and review every cost line above 2% of revenue."),
+        ("Profitability", "ROA", "Return on assets", True, 5, 2,
+         "Release idle assets, starting with slow-moving inventory, to lift returns on what the shop owns."),
+        ("Profitability", "ROE", "Return on equity", True, 15, 8,
+         "Prioritise the product lines with the highest margin per shelf metre before adding new capital."),
+        ("DuPont", "Asset_Turnover", "Asset turnover", True, 2.0, 1.0,
+         "Shrink the asset base to what sales need: fewer SKUs, faster replenishment."),
+    ),
+    "cmo": (
+        ("Retention", "Churn_Rate", "Customer churn", False, 10, 25,
+         "Contact lapsed regular customers within 30 days of their last visit with a personal offer."),
+        ("Retention", "Net_Revenue_Retention", "Net revenue retention", True, 100, 90,
+         "Grow spend per returning customer with bundles and loyalty pricing on staple items."),
+        ("Unit_Economics", "LTV_CAC_Ratio", "LTV:CAC ratio", True, 3, 1,
+         "Cut acquisition channels that do not return three times their cost in customer lifetime value."),
+        ("Unit_Economics", "Payback_Period_Months", "CAC payback (months)", False, 12, 24,
+         "Shorten payback by steering new customers to high-margin first purchases."),
+        ("Acquisition", "Marketing_Efficiency", "Revenue per marketing birr", True, 5, 2,
+         "Track sales by promotion and move spend to the two best-performing channels."),
+    ),
+    "coo": (
+        ("Cash_Conversion", "Inventory_Turnover", "Inventory turnover", True, 8, 4,
+         "Reorder by sales velocity: weekly top-up for fast movers, no reorders for items idle 60+ days."),
+        ("Cash_Conversion", "Days_Sales_Inventory", "Days of inventory", False, 45, 90,
+         "Run a clearance on stock older than 90 days and cap order quantities to six weeks of sales."),
+        ("Cash_Conversion", "Days_Sales_Outstanding", "Days sales outstanding", False, 15, 45,
+         "Limit credit sales to approved customers and chase balances older than 30 days weekly."),
+        ("Cash_Conversion", "Cash_Conversion_Cycle", "Cash conversion cycle (days)", False, 30, 60,
+         "Negotiate longer supplier terms while reducing stock days to shorten the cash cycle."),
+        ("Quality", "On_Time_Delivery", "On-time fulfilment", True, 95, 85,
+         "Fix the top cause of late orders and publish the on-time rate to staff every week."),
+        ("Quality", "Defect_Rate", "Returns / defect rate", False, 2, 5,
+         "Log every return with a reason code and drop suppliers with repeat quality issues."),
+    ),
+}
+
+_STAGE_KPIS = {"cfo": "financial", "cmo": "marketing", "coo": "operating"}
+
+
+def _any(data, *fields):
+    """True if any of the input fields holds a non-zero number."""
+    return any(parse_kpi_value(data.get(field)) for field in fields)
+
+
+def _all(data, *fields):
+    return all(parse_kpi_value(data.get(field)) for field in fields)
+
+
+def _ltv_measured(data):
+    # The KPI engine reports LTV as 0 when there is no churn to divide by
+    churn = parse_kpi_value(data.get("churn_rate"))
+    if churn is None and _any(data, "customers_start"):
+        start = parse_kpi_value(data.get("customers_start"))
+        lost = start + (parse_kpi_value(data.get("new_customers")) or 0) - (parse_kpi_value(data.get("customers_end")) or 0)
+        churn = lost / start
+    return bool(churn and churn > 0) and _all(data, "marketing_spend", "new_customers", "arpu", "gross_margin")
+
+
+_ASSETS = ("cash_equivalents", "accounts_receivable", "inventory", "fixed_assets_ppe", "intangible_assets")
+
+# kpi → whether the period's inputs let it be measured. The KPI engine
+# returns 0 for a ratio whose denominator was not recorded; such zeros are
+# skipped, while a 0 from recorded inputs (no receivables, no churn) is a
+# real finding.
+MEASURED = {
+    "Current_Ratio":          lambda d: _any(d, "accounts_payable", "accrued_expenses"),
+    "Quick_Ratio":            lambda d: _any(d, "accounts_payable", "accrued_expenses"),
+    "Cash_Ratio":             lambda d: _any(d, "accounts_payable", "accrued_expenses"),
+    "Debt_Ratio":             lambda d: _any(d, *_ASSETS),
+    "Gross_Margin":           lambda d: _any(d, "Revenue"),
+    "Net_Profit_Margin":      lambda d: _any(d, "Revenue"),
+    "ROA":                    lambda d: _any(d, *_ASSETS),
+    "ROE":                    lambda d: _any(d, "shareholders_equity"),
+    "Asset_Turnover":         lambda d: _any(d, *_ASSETS),
+    "Churn_Rate":             lambda d: d.get("churn_rate") is not None or _any(d, "customers_start"),
+    "Net_Revenue_Retention":  lambda d: d.get("net_revenue_retention") is not None or _all(d, "customers_start", "arpu"),
+    "LTV_CAC_Ratio":          _ltv_measured,
+    "Payback_Period_Months":  lambda d: _all(d, "marketing_spend", "new_customers", "arpu", "gross_margin"),
+    "Marketing_Efficiency":   lambda d: _any(d, "marketing_spend"),
+    "Inventory_Turnover":     lambda d: _any(d, "inventory"),
+    "Days_Sales_Inventory":   lambda d: _any(d, "COGS"),
+    "Days_Sales_Outstanding": lambda d: _any(d, "Revenue"),
+    "Cash_Conversion_Cycle":  lambda d: _all(d, "Revenue", "COGS"),
+    "On_Time_Delivery":       lambda d: _any(d, "orders_total"),
+    "Defect_Rate":            lambda d: _any(d, "units_produced"),
+}
+
+# Pairs of weak KPIs that explain each other, for the consultant synthesis
+INTERDEPENDENCIES = (
+    ("Days of inventory", "Current ratio",
+     "Slow-moving stock is absorbing the cash the balance sheet is short of; clearing inventory fixes both."),
+    ("Gross margin", "Customer churn",
+     "Thin margins leave no room for retention offers, so customers drift away and volume falls further."),
+    ("Days sales outstanding", "Cash ratio",
+     "Credit sales are being funded from the till; collecting receivables is the fastest source of cash."),
+    ("Inventory turnover", "Return on assets",
+     "Capital sits on shelves instead of earning; faster turns lift returns without new investment."),
+    ("Net profit margin", "LTV:CAC ratio",
+     "Acquisition spend is not paying back in profit; growth is currently buying revenue, not earnings."),
+)
+
+_STATUS_POINTS = {"good": 2, "watch": 1, "bad": 0}
+
+
+# ─── Evaluation ──────────────────────────────────────────────────────────────
+
+def evaluate(stage, kpis, data=None):
+    """Score one specialist's KPIs against the benchmark rules.
+
+    Args:
+        stage: "cfo", "cmo" or "coo"
+        kpis: Nested KPI dict for that specialist
+        data: The input dict the KPIs were calculated from. When given, KPIs
+            whose inputs were not recorded are skipped (see MEASURED);
+            otherwise only missing or non-numeric KPIs are.
+
+    Returns:
+        list of dicts with keys: label, display, value, status
+        ("good" | "watch" | "bad"), benchmark, directive
+    """
+    findings = []
+    for category, kpi, label, higher, good, watch, directive in RULES[stage]:
+        display = ((kpis or {}).get(category) or {}).get(kpi)
+        value = parse_kpi_value(display)
+        if value is None or (data is not None and not MEASURED[kpi](data)):
+            continue
+        unit = "%" if str(display).endswith("%") else ""
+        if higher:
+            status = "good" if value >= good else "watch" if value >= watch else "bad"
+            benchmark = f"≥ {good:g}{unit}"
+        else:
+            status = "good" if value <= good else "watch" if value <= watch else "bad"
+            benchmark = f"≤ {good:g}{unit}"
+        findings.append({
+            "label": label, "display": display, "value": value,
+            "status": status, "benchmark": benchmark, "directive": directive,
+        })
+    return findings
+
+
+def health_score(findings):
+    """Share of benchmark points earned (0–1), or None without findings."""
+    if not findings:
+        return None
+    return sum(_STATUS_POINTS[f["status"]] for f in findings) / (2 * len(findings))
+
+
+def health_rating(score):
+    if score is None:
+        return "Insufficient data"
+    if score >= 0.75:
+        return "Strong"
+    if score >= 0.5:
+        return "Stable"
+    if score >= 0.25:
+        return "Under pressure"
+    return "Critical"
+
+
+# ─── Report generation ───────────────────────────────────────────────────────
+
+def generate_local_analysis(kpis, profile=None, data=None):
+    """Generate all four specialist sections.
+
+    Args:
+        kpis: dict of {"financial"|"marketing"|"operating": nested KPI dict}
+        profile: Business profile dict (companyName, industry, strategicPriority)
+        data: dict of {"financial"|"marketing"|"operating": KPI input dict},
+            used to tell unrecorded KPIs from real zeros
+
+    Returns:
+        dict of {"cfo"|"cmo"|"coo"|"consultant": markdown}
+    """
+    findings = {
+        stage: evaluate(stage, kpis.get(group), None if data is None else data.get(group) or {})
+        for stage, group in _STAGE_KPIS.items()
+    }
+    return {
+        "cfo":        _cfo_report(findings["cfo"], profile or {}),
+        "cmo":        _cmo_report(findings["cmo"], profile or {}),
+        "coo":        _coo_report(findings["coo"], kpis.get("operating") or {}, profile or {}),
+        "consultant": _consultant_report(findings, profile or {}),
+    }
+
+
+def generate_local_report(stage, kpis, profile=None, data=None):
+    """Generate a single stage's section (see generate_local_analysis)."""
+    return generate_local_analysis(kpis, profile, data)[stage]
+
+
+def _cfo_report(findings, profile):
+    rating = health_rating(health_score(findings))
+    bad = [f for f in findings if f["status"] == "bad"]
+    good = [f for f in findings if f["status"] == "good"]
+    summary = (
+        f"{_company(profile)}'s financial position is **{rating.lower()}** against "
+        f"{_industry(profile)} benchmarks, with {len(good)} of {len(findings)} measured ratios "
+        f"at healthy levels and {len(bad)} in the red."
+    ) if findings else "Not enough financial data was recorded in this period to assess financial health."
+    return _render((
+        ("Executive Summary", summary),
+        ("Red Flags", _bullets(f for f in findings if f["status"] != "good")),
+        ("Green Flags", _bullets(good)),
+        ("3 CFO Directives", _directives(findings)),
+        ("Benchmark Context", _benchmark_table(findings)),
+    ))
+
+
+def _cmo_report(findings, profile):
+    score = health_score(findings)
+    growth_score = round(1 + 9 * score) if score is not None else None
+    ltv_cac = next((f for f in findings if f["label"] == "LTV:CAC ratio"), None)
+    churn = next((f for f in findings if f["label"] == "Customer churn"), None)
+    return _render((
+        ("Growth Engine Score", (
+            f"**{growth_score}/10** — based on {len(findings)} measured retention and unit-economics KPIs."
+            + (f" LTV:CAC is {ltv_cac['display']}." if ltv_cac else
+               " Marketing spend is not tracked, so LTV:CAC and payback cannot be scored.")
+        ) if growth_score is not None else "Not scored: no customer or marketing data was recorded in this period."),
+        ("Growth vs. Burn", (
+            "Acquisition spend is not recorded separately; growth is organic. "
+            "Track promotion spend to judge whether to invest more."
+            if not ltv_cac else
+            "Spend is paying back." if ltv_cac["value"] >= 3 else
+            "Spend is not yet paying back; optimise before scaling."
+        )),
+        ("Retention Health", (
+            f"Churn is {churn['display']} against a benchmark of {churn['benchmark']} — "
+            + {"good": "the customer base is holding.", "watch": "watch the drift.",
+               "bad": "the bucket is leaking."}[churn["status"]]
+        ) if churn else "Repeat-customer data is insufficient to measure churn (walk-in sales are excluded)."),
+        ("3 CMO Strategies", _directives(findings, fallback=(
+            "Capture customer phone numbers at checkout so repeat purchases can be measured.",
+            "Record promotion spend in the books so acquisition cost can be tracked.",
+            "Reward the top 20% of customers by spend with a simple loyalty offer.",
+        ))),
+        ("Revenue Impact", (
+            "If weak retention metrics are fixed, returning-customer revenue should rise within two quarters; "
+            "if not, expect flat or falling net income as acquisition replaces lost customers."
+        )),
+    ))
+
+
+def _coo_report(findings, kpis, profile):
+    rating = health_rating(health_score(findings))
+    revenue_per_employee = (kpis.get("Workforce") or {}).get("Revenue_Per_Employee")
+    return _render((
+        ("Operational Health Check", (
+            f"**{rating}** — {sum(f['status'] == 'good' for f in findings)} of {len(findings)} "
+            f"operating KPIs meet {_industry(profile)} norms."
+            + (f" Revenue per employee: {revenue_per_employee}." if parse_kpi_value(revenue_per_employee) else "")
+        )),
+        ("Bottlenecks and Risks", _bullets(f for f in findings if f["status"] != "good")),
+        ("Operational Strengths", _bullets(f for f in findings if f["status"] == "good")),
+        ("3 COO Directives", _directives(findings)),
+        ("30/60/90 Day Roadmap", _roadmap(findings)),
+    ))
+
+
+def _consultant_report(findings, profile):
+    scores = {stage: health_score(items) for stage, items in findings.items()}
+    measured = [s for s in scores.values() if s is not None]
+    overall = sum(measured) / len(measured) if measured else None
+    labels = {"cfo": "Finance", "cmo": "Marketing", "coo": "Operations"}
+
+    weak = {f["label"] for items in findings.values() for f in items if f["status"] != "good"}
+    links = [text for a, b, text in INTERDEPENDENCIES if a in weak and b in weak]
+
+    fin, ops = scores["cfo"], scores["coo"]
+    if fin is not None and fin < 0.4:
+        recommendation = ("Capital Restructuring",
+                          "liquidity and profitability must be repaired before any expansion")
+    elif (ops is not None and ops < 0.5) or overall is None or overall < 0.6:
+        recommendation = ("Operational Efficiency",
+                          "the fastest gains come from turning stock and cash faster, not from selling more")
+    else:
+        recommendation = ("Aggressive Growth",
+                          "the fundamentals are sound enough to invest in reaching more customers")
+
+    all_findings = [f for items in findings.values() for f in items]
+    return _render((
+        ("Company Verdict", (
+            f"**{_company(profile)} is {health_rating(overall).lower()}**: "
+            f"{sum(f['status'] == 'bad' for f in all_findings)} red flags across "
+            f"{len(all_findings)} benchmarked KPIs."
+        ) if overall is not None else "**Not enough data recorded in this period for a verdict.**"),
+        ("Alignment Audit", "\n".join(
+            f"- **{labels[stage]}:** {health_rating(score)}" for stage, score in scores.items()
+        ) + (f"\n\nStated priority: {profile['strategicPriority']}." if profile.get("strategicPriority") else "")),
+        ("Critical Interdependencies", "\n".join(f"- {text}" for text in links)
+         or "No reinforcing weaknesses across functions were detected."),
+        ("Strategic Recommendation", f"**{recommendation[0]}** — {recommendation[1]}."),
+        ("3 Board Directives", _directives(all_findings)),
+        ("12-Month Outlook", (
+            "If the directives are followed, expect the red-flag KPIs to reach at least the watch band "
+            "within two quarters and the benchmark within a year. If not, the weakest metrics will "
+            "continue to drag on cash and profit."
+        )),
+    ))
+
+
+# ─── Formatting helpers ──────────────────────────────────────────────────────
+
+def _render(sections):
+    return ENGINE_NOTE + "\n\n" + "\n\n".join(f"**{title}** — {body}" if "\n" not in body
+                                               else f"**{title}**\n{body}"
+                                               for title, body in sections)
+
+
+def _bullets(findings):
+    lines = [f"- {f['label']}: **{f['display']}** (benchmark {f['benchmark']})" for f in findings]
+    return "\n".join(lines) or "None detected among the measured KPIs."
+
+
+def _directives(findings, fallback=()):
+    """Directives of the three worst findings, worst first."""
+    ranked = sorted(
+        (f for f in findings if f["status"] != "good"),
+        key=lambda f: _STATUS_POINTS[f["status"]],
+    )
+    directives = [f["directive"] for f in ranked][:3]
+    for extra in fallback:
+        if len(directives) >= 3:
+            break
+        directives.append(extra)
+    if not findings and not directives:
+        return "Record complete sales, stock and expense data so the KPIs can be benchmarked."
+    if not directives:
+        return "Maintain current practices; every measured KPI meets its benchmark."
+    return "\n".join(f"{i}. {text}" for i, text in enumerate(directives, 1))
+
+
+def _benchmark_table(findings):
+    if not findings:
+        return "No ratios could be benchmarked."
+    rows = [f"| {f['label']} | {f['display']} | {f['benchmark']} | {f['status'].title()} |" for f in findings]
+    return "\n".join(["| KPI | Value | Benchmark | Status |", "|---|---|---|---|"] + rows)
+
+
+def _roadmap(findings):
+    ranked = [f for f in sorted(findings, key=lambda f: _STATUS_POINTS[f["status"]]) if f["status"] != "good"]
+    steps = [f["directive"] for f in ranked] + [
+        "Review the operating KPIs monthly and keep them inside the benchmark band."
+    ] * 3
+    return "\n".join(f"- **{days} days:** {step}" for days, step in zip((30, 60, 90), steps))
+
+
+def _company(profile):
+    return profile.get("companyName") or "The business"
+
+
+def _industry(profile):
+    return (profile.get("industry") or "retail").lower()
@@ -0,0 +1,134 @@
+"""PulseCheck stage timing and token accounting.
+
+Every pipeline stage records one PulseCheck Stage Metric row on its report:
+duration, database query count (extraction), and for Claude calls the
+input/output/cache tokens, retries and model. The summary endpoint
+aggregates these rows across reports so slow runs can be attributed to the
+database, the network or the model.
+"""
+
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import flt
+
+
+_TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_creation_tokens", "cache_read_tokens")
+
+
+@contextmanager
+def track_stage(report, stage, **fields):
+    """Time a stage and record it on the report when it ends.
+
+    Yields the metric dict so the stage can add token counts etc. The row is
+    recorded even if the stage raises, flagged as failed.
+    """
+    metric = {"stage": stage, **fields}
+    start = time.perf_counter()
+    try:
+        yield metric
+    except Exception:
+        metric["failed"] = 1
+        raise
+    finally:
+        metric["duration"] = round(time.perf_counter() - start, 3)
+        record_stage_metric(report, metric)
+
+
+def record_stage_metric(report, metric):
+    """Append a PulseCheck Stage Metric row to report and commit it."""
+    row = report.append("stage_metrics", metric)
+    row.db_insert()
+    frappe.db.commit()
+
+
+def apply_usage(metric, data):
+    """Copy token usage from a Claude Messages API response into metric."""
+    usage = (data or {}).get("usage") or {}
+    metric["input_tokens"] = usage.get("input_tokens") or 0
+    metric["output_tokens"] = usage.get("output_tokens") or 0
+    metric["cache_creation_tokens"] = usage.get("cache_creation_input_tokens") or 0
+    metric["cache_read_tokens"] = usage.get("cache_read_input_tokens") or 0
+
+
+@frappe.whitelist()
+def get_stage_performance_summary(from_date=None, to_date=None, company=None):
+    """Aggregate stage metrics across PulseCheck Reports.
+
+    Args:
+        from_date: Only reports created on or after this date (optional)
+        to_date: Only reports created on or before this date (optional)
+        company: Only reports for this company (optional)
+
+    Returns:
+        list of dicts, one per stage, with keys: stage, runs, failures,
+        p50_duration, p95_duration, max_duration, avg_input_tokens,
+        avg_output_tokens, total_tokens, cache_read_tokens, retries,
+        avg_query_count
+    """
+    frappe.has_permission("PulseCheck Report", "read", throw=True)
+
+    conditions = ["m.parenttype = 'PulseCheck Report'"]
+    values = {}
+    if from_date:
+        conditions.append("DATE(r.creation) >= %(from_date)s")
+        values["from_date"] = from_date
+    if to_date:
+        conditions.append("DATE(r.creation) <= %(to_date)s")
+        values["to_date"] = to_date
+    if company:
+        conditions.append("r.company = %(company)s")
+        values["company"] = company
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            m.stage, m.duration, m.failed, m.query_count, m.retries,
+            m.input_tokens, m.output_tokens,
+            m.cache_creation_tokens, m.cache_read_tokens
+        FROM `tabPulseCheck Stage Metric` m
+        INNER JOIN `tabPulseCheck Report` r ON r.name = m.parent
+        WHERE {" AND ".join(conditions)}
+        """,
+        values,
+        as_dict=True,
+    )
+
+    by_stage = {}
+    for row in rows:
+        by_stage.setdefault(row.stage, []).append(row)
+
+    summary = []
+    for stage, stage_rows in by_stage.items():
+        durations = sorted(flt(r.duration) for r in stage_rows)
+        runs = len(stage_rows)
+        summary.append({
+            "stage":             stage,
+            "runs":              runs,
+            "failures":          sum(r.failed or 0 for r in stage_rows),
+            "p50_duration":      round(percentile(durations, 50), 3),
+            "p95_duration":      round(percentile(durations, 95), 3),
+            "max_duration":      durations[-1],
+            "avg_input_tokens":  round(sum(r.input_tokens or 0 for r in stage_rows) / runs),
+            "avg_output_tokens": round(sum(r.output_tokens or 0 for r in stage_rows) / runs),
+            "total_tokens":      sum(
+                sum(r.get(f) or 0 for f in _TOKEN_FIELDS) for r in stage_rows
+            ),
+            "cache_read_tokens": sum(r.cache_read_tokens or 0 for r in stage_rows),
+            "retries":           sum(r.retries or 0 for r in stage_rows),
+            "avg_query_count":   round(sum(r.query_count or 0 for r in stage_rows) / runs, 1),
+        })
+
+    summary.sort(key=lambda s: s["p95_duration"], reverse=True)
+    return summary
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list (0 if empty)."""
+    if not sorted_values:
+        return 0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
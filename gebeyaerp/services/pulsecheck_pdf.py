@@ -0,0 +1,144 @@
+"""Board-pack PDF export of PulseCheck reports.
+
+Rendering a long multi-section report to PDF takes several seconds of
+wkhtmltopdf time, so it never happens in a web request: a background job
+builds the PDF when a report completes and attaches it to the report as a
+private File. Later downloads are served from that file. The report keeps
+a hash of everything the PDF was built from, and the PDF is only rebuilt
+when that hash changes.
+"""
+
+import hashlib
+import json
+
+import frappe
+from frappe.utils import now_datetime
+from frappe.utils.pdf import get_pdf
+
+from gebeyaerp.services.pulsecheck_render import get_cached_html, render_markdown
+
+
+_TEMPLATE = "gebeyaerp/templates/pulsecheck_board_pack.html"
+_TEMPLATE_VERSION = 1      # bump when the template changes to rebuild every PDF
+
+# (report field, section title) in board-pack order
+_PDF_SECTIONS = (
+    ("consultant_report",  "Board Report"),
+    ("cfo_report",         "Finance (CFO)"),
+    ("cmo_report",         "Marketing (CMO)"),
+    ("coo_report",         "Operations (COO)"),
+    ("intelligence_brief", "Market Intelligence"),
+)
+_KPI_FIELDS = (
+    ("financial_kpis", "Financial"),
+    ("marketing_kpis", "Marketing"),
+    ("operating_kpis", "Operations"),
+)
+
+
+def enqueue_board_pack(report_name):
+    """Queue board-pack generation for a report (no-op if already queued)."""
+    frappe.enqueue(
+        "gebeyaerp.services.pulsecheck_pdf.generate_board_pack",
+        queue="long",
+        job_id=f"pulsecheck_board_pack::{report_name}",
+        deduplicate=True,
+        report_name=report_name,
+    )
+
+
+@frappe.whitelist()
+def get_board_pack(report_name):
+    """Return the board-pack PDF of a report, queueing it if out of date.
+
+    Returns:
+        dict: {"status": "ready", "file_url": ...} or {"status": "queued"}
+    """
+    report = frappe.get_doc("PulseCheck Report", report_name)
+    frappe.has_permission("PulseCheck Report", "read", doc=report, throw=True)
+    if report.status != "Complete":
+        frappe.throw("The board pack is available once the report is Complete.")
+
+    if report.board_pack and report.board_pack_hash == board_pack_hash(report):
+        return {"status": "ready", "file_url": report.board_pack}
+
+    enqueue_board_pack(report.name)
+    return {"status": "queued"}
+
+
+def generate_board_pack(report_name):
+    """Build and attach the board-pack PDF unless the current one is up to date."""
+    report = frappe.get_doc("PulseCheck Report", report_name)
+    if report.status != "Complete":
+        return
+
+    source_hash = board_pack_hash(report)
+    if report.board_pack and report.board_pack_hash == source_hash:
+        return
+
+    pdf = get_pdf(build_board_pack_html(report), {"page-size": "A4", "margin-top": "15mm"})
+
+    previous = report.board_pack
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": f"{report.name}-board-pack.pdf",
+        "attached_to_doctype": "PulseCheck Report",
+        "attached_to_name": report.name,
+        "attached_to_field": "board_pack",
+        "is_private": 1,
+        "content": pdf,
+    }).insert(ignore_permissions=True)
+
+    report.db_set({"board_pack": file_doc.file_url, "board_pack_hash": source_hash}, commit=True)
+
+    if previous and previous != file_doc.file_url:
+        for name in frappe.get_all(
+            "File",
+            filters={"file_url": previous, "attached_to_name": report.name},
+            pluck="name",
+        ):
+            frappe.delete_doc("File", name, ignore_permissions=True)
+        frappe.db.commit()
+
+
+def board_pack_hash(report):
+    """Hash of everything the PDF shows; changes whenever the report does."""
+    parts = [str(_TEMPLATE_VERSION), report.company, str(report.from_date), str(report.to_date)]
+    parts += [report.get(field) or "" for field, _title in _PDF_SECTIONS]
+    parts += [json.dumps(_kpis(report, field), sort_keys=True) for field, _title in _KPI_FIELDS]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def build_board_pack_html(report):
+    """Render the board-pack HTML, reusing the report's pre-rendered sections."""
+    sections = []
+    for field, title in _PDF_SECTIONS:
+        markdown = report.get(field)
+        if not markdown:
+            continue
+        html = get_cached_html(report.html_cache, field, markdown) or render_markdown(markdown)
+        sections.append({"title": title, "html": html})
+
+    kpi_groups = []
+    for field, label in _KPI_FIELDS:
+        for category, metrics in _kpis(report, field).items():
+            if isinstance(metrics, dict):
+                kpi_groups.append({
+                    "title": f"{label} — {category.replace('_', ' ')}",
+                    "rows": [(name.replace("_", " "), value) for name, value in metrics.items()],
+                })
+
+    return frappe.render_template(_TEMPLATE, {
+        "report": report,
+        "company_name": _kpis(report, "profile_data").get("companyName") or report.company,
+        "sections": sections,
+        "kpi_groups": kpi_groups,
+        "generated_on": now_datetime(),
+    })
+
+
+def _kpis(report, field):
+    value = report.get(field)
+    if not value:
+        return {}
+    return json.loads(value) if isinstance(value, str) else value
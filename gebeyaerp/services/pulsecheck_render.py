@@ -0,0 +1,70 @@
+"""Server-side HTML rendering of PulseCheck report sections.
+
+Each markdown section is converted to sanitized HTML once, when it is
+written to the report, and kept in the report's ``html_cache`` field keyed
+by a hash of the markdown it came from. The page is served that HTML
+directly instead of converting markdown in the browser; an entry is only
+re-rendered when its markdown changes.
+"""
+
+import hashlib
+import json
+
+import frappe
+from frappe.utils import md_to_html
+from frappe.utils.html_utils import sanitize_html
+
+
+# Report fields holding markdown that the page displays
+HTML_FIELDS = (
+    "intelligence_brief", "cfo_report", "cmo_report", "coo_report", "consultant_report",
+)
+
+
+def render_markdown(text):
+    """Markdown → sanitized HTML ('' for empty text)."""
+    if not text:
+        return ""
+    return sanitize_html(str(md_to_html(text) or ""), always_sanitize=True)
+
+
+def markdown_hash(text):
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def load_cache(value):
+    """Parse an html_cache field value into a dict."""
+    if not value:
+        return {}
+    try:
+        cache = json.loads(value) if isinstance(value, str) else dict(value)
+    except (TypeError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def refresh_cache(cache_value, markdown_by_field):
+    """Return the updated html_cache value, or None if nothing changed.
+
+    Args:
+        cache_value: Current html_cache field value (JSON string or dict)
+        markdown_by_field: {field: markdown} for the fields to check
+    """
+    cache = load_cache(cache_value)
+    changed = False
+    for field, text in markdown_by_field.items():
+        digest = markdown_hash(text)
+        if not text:
+            changed = cache.pop(field, None) is not None or changed
+        elif (cache.get(field) or {}).get("hash") != digest:
+            cache[field] = {"hash": digest, "html": render_markdown(text)}
+            changed = True
+    return json.dumps(cache, ensure_ascii=False) if changed else None
+
+
+def get_cached_html(cache_value, field, text):
+    """Cached HTML for field if it was rendered from exactly this markdown."""
+    entry = load_cache(cache_value).get(field) or {}
+    if text and entry.get("hash") == markdown_hash(text):
+        return entry.get("html")
+    return None
@@ -0,0 +1,100 @@
+"""Off-peak PulseCheck pre-computation.
+
+A nightly cron job (see hooks.py) checks whether a weekly or monthly run is
+due according to Shop Settings, then fans the non-group companies out over
+RQ workers (see services.fanout): one task per company, never more than
+the configured worker count at once. The Claude rate limiter paces the
+API calls inside each pipeline.
+"""
+
+import frappe
+from frappe.utils import add_days, add_months, cint, get_first_day, get_last_day, getdate, today
+
+
+_DEFAULT_WORKERS = 2
+_JOB_TIMEOUT = 4 * 3600
+
+
+def schedule_pulsecheck_reports():
+    """Queue PulseCheck runs for all companies when a period has just closed.
+
+    Called daily via scheduler_events -> cron in hooks.py.
+    """
+    settings = frappe.get_single("Shop Settings")
+    period = get_due_period(settings.pulsecheck_schedule, today())
+    if not period:
+        return
+
+    from gebeyaerp.services.pulsecheck_ai import get_claude_config
+
+    api_key, _model = get_claude_config()
+    if not api_key:
+        return
+
+    from_date, to_date = period
+    companies = frappe.get_all("Company", filters={"is_group": 0}, pluck="name")
+    due = [c for c in companies if _needs_run(c, from_date, to_date)]
+    if not due:
+        return
+
+    from gebeyaerp.services.fanout import dispatch
+
+    dispatch(
+        "pulsecheck_precompute",
+        "gebeyaerp.services.pulsecheck_scheduler.run_scheduled_report",
+        [{"company": c, "from_date": str(from_date), "to_date": str(to_date)} for c in due],
+        concurrency=cint(settings.pulsecheck_workers) or _DEFAULT_WORKERS,
+        task_timeout=_JOB_TIMEOUT,
+    )
+
+
+def get_due_period(schedule, date):
+    """Return (from_date, to_date) of the period that closed before date.
+
+    Weekly runs are due on Mondays (covering the previous Monday–Sunday),
+    monthly runs on the 1st (covering the previous month).
+    """
+    date = getdate(date)
+    if schedule == "Weekly" and date.weekday() == 0:
+        return add_days(date, -7), add_days(date, -1)
+    if schedule == "Monthly" and date.day == 1:
+        previous = add_months(date, -1)
+        return get_first_day(previous), get_last_day(previous)
+    return None
+
+
+def run_scheduled_report(company, from_date, to_date):
+    """Fan-out task: one company's scheduled PulseCheck run."""
+    from gebeyaerp.services.pulsecheck_ai import run_pulsecheck_analysis
+
+    run_pulsecheck_analysis(company, from_date, to_date)
+
+
+def _needs_run(company, from_date, to_date):
+    """Skip companies with no sales in the period, or whose latest Complete
+    report for the period is newer than every invoice change in it."""
+    last_change = frappe.db.sql(
+        """
+        SELECT MAX(modified)
+        FROM `tabSales Invoice`
+        WHERE docstatus > 0
+          AND company = %s
+          AND posting_date BETWEEN %s AND %s
+        """,
+        (company, from_date, to_date),
+    )[0][0]
+    if not last_change:
+        return False
+
+    last_report = frappe.db.get_value(
+        "PulseCheck Report",
+        {
+            "company": company,
+            "from_date": from_date,
+            "to_date": to_date,
+            "status": "Complete",
+        },
+        "creation",
+        order_by="creation desc",
+    )
+    return not last_report or last_report < last_change
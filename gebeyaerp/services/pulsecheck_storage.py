@@ -0,0 +1,42 @@
+"""Compressed storage for large PulseCheck Report text fields.
+
+Markdown reports, the intelligence brief and the error log are stored as
+``zlib+b64:<base64 of zlib-compressed UTF-8>`` once they exceed a size
+threshold; markdown shrinks to roughly a third. Values without the prefix
+are plain text, so rows written before compression still read correctly.
+
+Kept free of Frappe imports so it can be unit tested standalone.
+"""
+
+import base64
+import zlib
+
+
+PREFIX = "zlib+b64:"
+COMPRESS_THRESHOLD = 2048      # characters; smaller values are not worth it
+
+# PulseCheck Report fields that may be stored compressed. Only Long Text
+# fields: JSON columns are validated by the database and must stay JSON.
+COMPRESSED_FIELDS = (
+    "intelligence_brief", "cfo_report", "cmo_report", "coo_report", "consultant_report",
+    "error_log", "html_cache",
+)
+
+
+def compress_text(value, threshold=COMPRESS_THRESHOLD):
+    """Return value in stored form: compressed if large enough to benefit."""
+    if not isinstance(value, str) or len(value) < threshold or value.startswith(PREFIX):
+        return value
+    packed = PREFIX + base64.b64encode(zlib.compress(value.encode("utf-8"), 6)).decode("ascii")
+    return packed if len(packed) < len(value) else value
+
+
+def decompress_text(value):
+    """Return the plain text of a stored value (plain values pass through)."""
+    if not isinstance(value, str) or not value.startswith(PREFIX):
+        return value
+    return zlib.decompress(base64.b64decode(value[len(PREFIX):])).decode("utf-8")
+
+
+def is_compressed(value):
+    return isinstance(value, str) and value.startswith(PREFIX)
@@ -0,0 +1,85 @@
+"""Periods used by Daily Summary rollups.
+
+For a date, ``periods_for`` returns every rollup period containing it:
+ISO week, Gregorian month, and fiscal month, quarter and year. Fiscal
+periods follow Shop Settings ``fiscal_year_start``. "July (Ethiopian)" uses
+Ethiopian months from Hamle (see utils.ethiopian_calendar); "January
+(Gregorian)" uses calendar months.
+
+Pure Python, no Frappe imports.
+"""
+
+import calendar
+from datetime import date, timedelta
+
+from gebeyaerp.utils import ethiopian_calendar as ec
+
+ETHIOPIAN = "July (Ethiopian)"
+PERIOD_TYPES = ("Week", "Month", "Fiscal Month", "Fiscal Quarter", "Fiscal Year")
+
+
+def periods_for(value, fiscal_year_start=ETHIOPIAN):
+    """Return [(period_type, period_key, from_date, to_date)] containing a date."""
+    day = ec.as_date(value)
+    return [
+        ("Week", *week_period(day)),
+        ("Month", *month_period(day)),
+        *(("Fiscal " + kind, *period) for kind, period in fiscal_periods(day, fiscal_year_start)),
+    ]
+
+
+def week_period(day):
+    iso_year, week, weekday = day.isocalendar()
+    start = day - timedelta(days=weekday - 1)
+    return f"{iso_year}-W{week:02d}", start, start + timedelta(days=6)
+
+
+def month_period(day):
+    last = calendar.monthrange(day.year, day.month)[1]
+    return f"{day.year}-{day.month:02d}", day.replace(day=1), day.replace(day=last)
+
+
+def fiscal_periods(day, fiscal_year_start=ETHIOPIAN):
+    """Return [("Month"|"Quarter"|"Year", (key, from_date, to_date))]."""
+    if fiscal_year_start == ETHIOPIAN:
+        fy, quarter, month = ec.fiscal_position(day)
+        month_range = ec.fiscal_month_range(fy, month)
+        quarter_range = ec.fiscal_quarter_range(fy, quarter)
+        year_range = ec.fiscal_year_range(fy)
+    else:
+        fy, month = day.year, day.month
+        quarter = (month - 1) // 3 + 1
+        month_range = month_period(day)[1:]
+        first_month = 3 * quarter - 2
+        quarter_range = (
+            date(fy, first_month, 1),
+            date(fy, first_month + 2, calendar.monthrange(fy, first_month + 2)[1]),
+        )
+        year_range = (date(fy, 1, 1), date(fy, 12, 31))
+    return [
+        ("Month", (f"FY{fy}-M{month:02d}", *month_range)),
+        ("Quarter", (f"FY{fy}-Q{quarter}", *quarter_range)),
+        ("Year", (f"FY{fy}", *year_range)),
+    ]
+
+
+def same_period_last_year(period_type, value, fiscal_year_start=ETHIOPIAN):
+    """Return (period_key, from_date, to_date) one year before a date's period.
+
+    Weeks match by ISO week number (week 53 falls back to 52), months and
+    fiscal periods by their number within the year.
+    """
+    day = ec.as_date(value)
+    if period_type == "Week":
+        iso_year, week, _weekday = day.isocalendar()
+        try:
+            target = date.fromisocalendar(iso_year - 1, week, 1)
+        except ValueError:
+            target = date.fromisocalendar(iso_year - 1, 52, 1)
+        return week_period(target)
+    if period_type == "Month" or (period_type.startswith("Fiscal") and fiscal_year_start != ETHIOPIAN):
+        target = day.replace(year=day.year - 1, day=1)
+    else:
+        year, month, _day = ec.from_gregorian(day)
+        target = ec.to_gregorian(year - 1, month, 1)
+    return next(p[1:] for p in periods_for(target, fiscal_year_start) if p[0] == period_type)
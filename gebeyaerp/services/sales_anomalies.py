@@ -0,0 +1,264 @@
+"""Daily sales anomaly detection on top of Daily Summary.
+
+Whenever Daily Summaries are generated, every company's Sales Baseline rows
+(one per metric in sales_baselines.METRICS) are advanced over the days
+after their last_date, in date order. Each day costs O(1) per metric;
+Daily Summary history is never rescanned.
+
+Only confirmed days are learned from: days with a summary, and days
+without one that the current generation run covered (a confirmed day
+without sales, so a shop that stops selling is flagged too). A day that
+was never summarised (a missed scheduler run) or is queued as a Daily
+Summary Dirty Date stops the walk; the baselines resume once a backfill
+or the reconciler has covered it.
+
+Every flagged day is kept as a Sales Anomaly row, read back by
+``get_sales_anomalies``. Anomalies on recent days are also published to
+the dashboard as the realtime event ``gebeya_sales_anomaly``.
+"""
+
+import hashlib
+import json
+
+import frappe
+from frappe.utils import add_days, date_diff, flt, getdate, now_datetime, today
+
+from gebeyaerp.services.sales_baselines import METRICS, metric_values, new_state, update
+
+BASELINE_DOCTYPE = "Sales Baseline"
+ANOMALY_DOCTYPE = "Sales Anomaly"
+REALTIME_EVENT = "gebeya_sales_anomaly"
+# Only days this recent raise realtime alerts (not backfills)
+_ALERT_DAYS = 2
+_SUMMARY_FIELDS = (
+    "company", "date", "total_sales", "total_invoices",
+    "cash_collected", "mobile_money_collected", "bank_collected", "credit_given",
+)
+
+
+def baseline_name(company, metric):
+    """Deterministic row name: one Sales Baseline per company and metric."""
+    return hashlib.sha1(f"{company}::{metric}".encode()).hexdigest()[:20]
+
+
+def anomaly_name(company, date, metric):
+    """Deterministic row name: one Sales Anomaly per company, day and metric."""
+    return hashlib.sha1(f"{company}::{getdate(date)}::{metric}".encode()).hexdigest()[:20]
+
+
+def update_baselines(from_date, to_date, companies):
+    """Advance the baselines of companies through to_date.
+
+    A company with baselines continues from the day after its last_date;
+    days already seen (recomputed or late backfills) are skipped. A company
+    without baselines starts at its first summary on or after from_date.
+    Days without a summary count as zero sales only inside from_date …
+    to_date (the range just generated); the walk stops at any other
+    missing day, and at dirty days.
+
+    Does not commit; callers commit together with the summaries.
+
+    Returns:
+        list of anomaly dicts (company, date, metric, value, expected,
+        score, change) found on the days processed
+    """
+    if not companies:
+        return []
+    to_date = getdate(to_date)
+    states, starts = _load_states(companies)
+    for company in companies:
+        starts.setdefault(company, getdate(from_date))
+    pending = [c for c in companies if starts[c] <= to_date]
+    if not pending:
+        return []
+
+    from_date = getdate(from_date)
+    first = min(starts[c] for c in pending)
+    dirty = {
+        (row.company, getdate(row.date))
+        for row in frappe.get_all(
+            "Daily Summary Dirty Date",
+            filters={"company": ["in", pending], "date": ["between", [first, to_date]]},
+            fields=["company", "date"],
+        )
+    }
+    summaries = {}
+    for row in frappe.get_all(
+        "Daily Summary",
+        filters={
+            "company": ["in", pending],
+            "date": ["between", [first, to_date]],
+        },
+        fields=list(_SUMMARY_FIELDS),
+    ):
+        summaries[(row.company, getdate(row.date))] = row
+
+    anomalies, rows = [], []
+    for company in pending:
+        company_states = states.get(company, {})
+        day = starts[company]
+        while day <= to_date:
+            summary = summaries.get((company, day))
+            if (company, day) in dirty or (not summary and day < from_date):
+                # Not final yet, or never summarised: wait for it
+                break
+            # Before a company's first sale there is nothing to learn
+            if summary or company_states:
+                for metric, value in metric_values(summary).items():
+                    if value is None:
+                        continue
+                    state = company_states.setdefault(metric, new_state())
+                    result = update(state, value, metric, day.weekday())
+                    state["last"], state["last_date"] = result, day
+                    if result["anomaly"]:
+                        anomalies.append({"company": company, "date": str(day), "metric": metric, **result})
+            day = add_days(day, 1)
+        rows.extend(_state_row(company, metric, state)
+                    for metric, state in company_states.items() if "last" in state)
+
+    _save_states(rows)
+    _save_anomalies(anomalies)
+    _publish(anomalies)
+    return anomalies
+
+
+@frappe.whitelist()
+def get_sales_anomalies(company=None, days=7):
+    """Anomalies flagged for a company over the last `days` days.
+
+    Returns:
+        list of dicts with metric, date, value, expected, score and change,
+        newest first
+    """
+    # Shown on the home dashboard: users without sales access just see none
+    if not frappe.has_permission("Sales Invoice", "read"):
+        return []
+    if not company:
+        company = frappe.defaults.get_user_default("Company")
+    rows = frappe.get_all(
+        ANOMALY_DOCTYPE,
+        filters={"company": company, "date": [">=", add_days(today(), -int(days or 7))]},
+        fields=["metric", "date", "value", "expected", "score", "deviation"],
+        order_by="date desc, metric asc",
+    )
+    return [
+        {
+            "metric": row.metric,
+            "date": str(row.date),
+            "value": flt(row.value, 4),
+            "expected": flt(row.expected, 4),
+            "score": flt(row.score, 2),
+            "change": flt(row.deviation, 4),
+        }
+        for row in rows
+    ]
+
+
+# ─── Internal helpers ────────────────────────────────────────────────────────
+
+def _load_states(companies):
+    """Return ({company: {metric: state}}, {company: first day to process})."""
+    states, starts = {}, {}
+    for row in frappe.get_all(
+        BASELINE_DOCTYPE,
+        filters={"company": ["in", list(companies)]},
+        fields=["company", "metric", "last_date", "observations", "level", "variance", "season"],
+    ):
+        if row.metric not in METRICS:
+            continue
+        states.setdefault(row.company, {})[row.metric] = {
+            "observations": row.observations,
+            "level": flt(row.level),
+            "variance": flt(row.variance),
+            "season": json.loads(row.season) if row.season else [1.0] * 7,
+        }
+        # Payment shares skip days without sales, so resume after the most
+        # advanced metric
+        start = add_days(getdate(row.last_date), 1)
+        starts[row.company] = max(starts.get(row.company, start), start)
+    return states, starts
+
+
+def _state_row(company, metric, state):
+    last = state["last"]
+    return (
+        baseline_name(company, metric), company, metric, state["last_date"],
+        state["observations"], state["level"], state["variance"],
+        json.dumps([round(f, 6) for f in state["season"]]),
+        last["value"], last["expected"], last["score"], last["change"], int(last["anomaly"]),
+    )
+
+
+def _save_states(rows):
+    if not rows:
+        return
+    now = now_datetime()
+    user = frappe.session.user
+    values = [(row[0], now, now, user, user, *row[1:]) for row in rows]
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(values[0])) + ")"] * len(values))
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabSales Baseline`
+            (name, creation, modified, owner, modified_by,
+             company, metric, last_date, observations, level, variance, season,
+             last_value, last_expected, last_score, last_change, is_anomaly)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE
+            last_date = VALUES(last_date),
+            observations = VALUES(observations),
+            level = VALUES(level),
+            variance = VALUES(variance),
+            season = VALUES(season),
+            last_value = VALUES(last_value),
+            last_expected = VALUES(last_expected),
+            last_score = VALUES(last_score),
+            last_change = VALUES(last_change),
+            is_anomaly = VALUES(is_anomaly),
+            modified = VALUES(modified)
+        """,
+        [v for row in values for v in row],
+    )
+
+
+def _save_anomalies(anomalies):
+    if not anomalies:
+        return
+    now = now_datetime()
+    user = frappe.session.user
+    values = [
+        (anomaly_name(a["company"], a["date"], a["metric"]), now, now, user, user,
+         a["company"], a["date"], a["metric"], a["value"], a["expected"], a["score"], a["change"])
+        for a in anomalies
+    ]
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(values[0])) + ")"] * len(values))
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabSales Anomaly`
+            (name, creation, modified, owner, modified_by,
+             company, date, metric, value, expected, score, deviation)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE
+            value = VALUES(value),
+            expected = VALUES(expected),
+            score = VALUES(score),
+            deviation = VALUES(deviation),
+            modified = VALUES(modified)
+        """,
+        [v for row in values for v in row],
+    )
+
+
+def _publish(anomalies):
+    recent = add_days(today(), -_ALERT_DAYS)
+    by_company = {}
+    for anomaly in anomalies:
+        if date_diff(anomaly["date"], recent) >= 0:
+            by_company.setdefault(anomaly["company"], []).append(anomaly)
+
+    for company, items in by_company.items():
+        frappe.logger("sales_anomalies").info({"event": "sales_anomaly", "company": company, "anomalies": items})
+        frappe.publish_realtime(
+            REALTIME_EVENT,
+            {"company": company, "anomalies": items},
+            after_commit=True,
+        )
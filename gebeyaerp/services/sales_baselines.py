@@ -0,0 +1,132 @@
+"""Streaming baselines for daily sales metrics.
+
+Each (company, metric) keeps a small state: an EWMA level, multiplicative
+day-of-week factors (seeded from the first week) and an EWMA variance of
+the forecast error. A new day
+is scored against the state and folded into it in O(1), so history is
+never rescanned. Outliers are clipped before they update the state, so one
+bad day does not drag the baseline along with it.
+
+Kept free of Frappe imports so it can be unit tested standalone.
+"""
+
+import math
+
+# Level and error smoothing; ~1/ALPHA days of memory
+ALPHA = 0.1
+# Day-of-week factor smoothing (each factor sees one day a week)
+SEASON_ALPHA = 0.2
+# Days observed before anything is flagged (four of each weekday)
+WARMUP_DAYS = 28
+# Forecast errors beyond this many standard deviations are anomalies
+Z_THRESHOLD = 3.0
+
+# metric → (seasonal, relative, min_change). min_change is the smallest
+# deviation worth flagging: a fraction of the expected value for relative
+# metrics, an absolute amount (share points) otherwise.
+METRICS = {
+    "total_sales":            (True, True, 0.3),
+    "total_invoices":         (True, True, 0.3),
+    "cash_share":             (False, False, 0.15),
+    "mobile_money_share":     (False, False, 0.15),
+    "bank_share":             (False, False, 0.15),
+    "credit_share":           (False, False, 0.15),
+}
+
+_SHARES = {
+    "cash_share":         "cash_collected",
+    "mobile_money_share": "mobile_money_collected",
+    "bank_share":         "bank_collected",
+    "credit_share":       "credit_given",
+}
+
+
+def new_state():
+    """State of a metric that has not seen any day yet."""
+    return {"observations": 0, "level": 0.0, "variance": 0.0, "season": [1.0] * 7}
+
+
+def metric_values(summary):
+    """Metric values of one day from a Daily Summary-like mapping.
+
+    A missing summary (no sales) counts as zero sales and zero invoices;
+    payment shares are None on such days, as there is no mix to judge.
+    """
+    summary = summary or {}
+    total = float(summary.get("total_sales") or 0)
+    values = {
+        "total_sales": total,
+        "total_invoices": float(summary.get("total_invoices") or 0),
+    }
+    for metric, field in _SHARES.items():
+        values[metric] = float(summary.get(field) or 0) / total if total > 0 else None
+    return values
+
+
+def update(state, value, metric, weekday):
+    """Score one day's value against a state, then fold it in.
+
+    Args:
+        state: dict from new_state() or a previous update (modified in place)
+        value: The day's value
+        metric: Key of METRICS
+        weekday: date.weekday() of the day (0 = Monday)
+
+    Returns:
+        dict with value, expected, score (z), change and anomaly (bool)
+    """
+    seasonal, relative, min_change = METRICS[metric]
+    factor = state["season"][weekday] if seasonal else 1.0
+    n = state["observations"]
+
+    if n < 7 and seasonal:
+        # First week: keep raw values, then start from their mean and ratios
+        state["season"][weekday] = float(value)
+        state["observations"] = n + 1
+        if n == 6:
+            mean = sum(state["season"]) / 7
+            state["level"] = mean
+            state["season"] = [v / mean for v in state["season"]] if mean > 0 else [1.0] * 7
+        return _unscored(value)
+    if n == 0:
+        state.update(observations=1, level=float(value), variance=0.0)
+        return _unscored(value)
+
+    expected = state["level"] * factor
+    error = value - expected
+    # A floor keeps a perfectly steady metric from never scoring at all
+    std = max(math.sqrt(state["variance"]), 0.02 * abs(expected) if relative else 0.01)
+    score = error / std if std > 0 else 0.0
+    if relative:
+        change = error / expected if expected > 0 else (1.0 if value > 0 else 0.0)
+    else:
+        change = error
+    anomaly = n >= WARMUP_DAYS and abs(score) >= Z_THRESHOLD and abs(change) >= min_change
+
+    # Past the warm-up, clip the error before learning from it
+    if n >= WARMUP_DAYS and std > 0:
+        error = max(-Z_THRESHOLD * std, min(Z_THRESHOLD * std, error))
+    observed = expected + error
+
+    state["variance"] = (1 - ALPHA) * state["variance"] + ALPHA * error * error
+    previous_level = state["level"]
+    state["level"] = (1 - ALPHA) * previous_level + ALPHA * (observed / factor if factor > 0 else observed)
+    if seasonal and previous_level > 0:
+        season = state["season"]
+        season[weekday] = (1 - SEASON_ALPHA) * season[weekday] + SEASON_ALPHA * observed / previous_level
+        mean = sum(season) / 7
+        if mean > 0:
+            state["season"] = [f / mean for f in season]
+    state["observations"] = n + 1
+
+    return {
+        "value": value,
+        "expected": expected,
+        "score": round(score, 2),
+        "change": round(change, 4),
+        "anomaly": anomaly,
+    }
+
+
+def _unscored(value):
+    return {"value": value, "expected": value, "score": 0.0, "change": 0.0, "anomaly": False}
@@ -0,0 +1,166 @@
+"""Week, month and fiscal-period rollups of Daily Summary.
+
+Whenever Daily Summaries are created or recomputed, the rollup rows of
+every period containing those days (see rollup_periods.PERIOD_TYPES) are
+re-summed from Daily Summary with one grouped query per period, for all
+affected companies at once. Long-range and year-over-year reports then
+read a handful of Daily Summary Rollup rows.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import flt, getdate, now_datetime, today
+
+from gebeyaerp.services.daily_summary import PAYMENT_FIELDS
+from gebeyaerp.services.rollup_periods import (
+    ETHIOPIAN,
+    PERIOD_TYPES,
+    periods_for,
+    same_period_last_year,
+)
+
+ROLLUP_DOCTYPE = "Daily Summary Rollup"
+SUM_FIELDS = (
+    "total_sales", "total_invoices", "total_items_sold", "new_customers",
+    *PAYMENT_FIELDS.values(),
+)
+
+
+def refresh_rollups(dates, companies):
+    """Re-sum the rollups of every period containing one of `dates`.
+
+    Args:
+        dates: Days whose Daily Summaries changed
+        companies: Companies to refresh
+
+    Does not commit; callers commit together with the summaries.
+    """
+    if not dates or not companies:
+        return
+    fiscal_year_start = _fiscal_year_start()
+    periods = {}
+    for day in set(map(getdate, dates)):
+        for period_type, key, from_date, to_date in periods_for(day, fiscal_year_start):
+            periods[(period_type, key)] = (from_date, to_date)
+
+    for (period_type, key), (from_date, to_date) in periods.items():
+        _refresh_period(period_type, key, from_date, to_date, tuple(set(companies)))
+
+
+def _refresh_period(period_type, key, from_date, to_date, companies):
+    sums = ", ".join(f"COALESCE(SUM({field}), 0) AS {field}" for field in SUM_FIELDS)
+    rows = frappe.db.sql(
+        f"""
+        SELECT company, COUNT(*) AS days, {sums}
+        FROM `tabDaily Summary`
+        WHERE company IN %(companies)s
+          AND date BETWEEN %(from_date)s AND %(to_date)s
+        GROUP BY company
+        """,
+        {"companies": companies, "from_date": from_date, "to_date": to_date},
+        as_dict=True,
+    )
+
+    # Periods whose days were all removed lose their rollup row
+    empty = set(companies) - {row.company for row in rows}
+    if empty:
+        frappe.db.delete(ROLLUP_DOCTYPE, {
+            "name": ["in", [_rollup_name(c, period_type, key) for c in empty]],
+        })
+    if not rows:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    columns = [
+        "name", "creation", "modified", "owner", "modified_by",
+        "company", "period_type", "period_key", "from_date", "to_date", "days", *SUM_FIELDS,
+    ]
+    values = [
+        (_rollup_name(row.company, period_type, key), now, now, user, user,
+         row.company, period_type, key, from_date, to_date, row.days,
+         *(row[field] for field in SUM_FIELDS))
+        for row in rows
+    ]
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(values))
+    updates = ", ".join(f"`{c}` = VALUES(`{c}`)" for c in columns[2:] if c != "owner")
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabDaily Summary Rollup` ({", ".join(f"`{c}`" for c in columns)})
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE {updates}
+        """,
+        [v for row in values for v in row],
+    )
+
+
+def rebuild_rollups(company=None):
+    """Recompute every rollup from the full Daily Summary history."""
+    filters = {"company": company} if company else {}
+    rows = frappe.get_all("Daily Summary", filters=filters, fields=["company", "date"], distinct=True)
+    if not rows:
+        return
+    frappe.db.delete(ROLLUP_DOCTYPE, filters)
+    refresh_rollups({row.date for row in rows}, {row.company for row in rows})
+    frappe.db.commit()
+
+
+# ─── Queries ─────────────────────────────────────────────────────────────────
+
+@frappe.whitelist()
+def get_rollups(company, period_type, from_date, to_date):
+    """Rollup rows of one period type that start within a date range, oldest first."""
+    frappe.has_permission(ROLLUP_DOCTYPE, "read", throw=True)
+    if period_type not in PERIOD_TYPES:
+        frappe.throw(f"Unknown period type: {period_type}")
+    return frappe.get_all(
+        ROLLUP_DOCTYPE,
+        filters={
+            "company": company,
+            "period_type": period_type,
+            "from_date": ["between", [from_date, to_date]],
+        },
+        fields=["period_key", "from_date", "to_date", "days", *SUM_FIELDS],
+        order_by="from_date asc",
+    )
+
+
+@frappe.whitelist()
+def get_year_over_year(company, period_type, date=None):
+    """Compare the period containing `date` with the same period a year earlier.
+
+    Returns:
+        {"current": row or None, "previous": row or None,
+         "change_pct": {field: float or None}}
+    """
+    frappe.has_permission(ROLLUP_DOCTYPE, "read", throw=True)
+    if period_type not in PERIOD_TYPES:
+        frappe.throw(f"Unknown period type: {period_type}")
+    date = getdate(date or today())
+    fiscal_year_start = _fiscal_year_start()
+
+    current_key = next(p[1] for p in periods_for(date, fiscal_year_start) if p[0] == period_type)
+    previous_key = same_period_last_year(period_type, date, fiscal_year_start)[0]
+    fields = ["period_key", "from_date", "to_date", "days", *SUM_FIELDS]
+
+    def _get(key):
+        return frappe.db.get_value(
+            ROLLUP_DOCTYPE, _rollup_name(company, period_type, key), fields, as_dict=True
+        )
+
+    current, previous = _get(current_key), _get(previous_key)
+    change = {}
+    for field in SUM_FIELDS:
+        before = flt(previous[field]) if previous else 0
+        after = flt(current[field]) if current else 0
+        change[field] = round((after - before) / before * 100, 1) if before else None
+    return {"current": current, "previous": previous, "change_pct": change}
+
+
+def _rollup_name(company, period_type, key):
+    return hashlib.sha1(f"{company}::{period_type}::{key}".encode()).hexdigest()[:20]
+
+
+def _fiscal_year_start():
+    return frappe.db.get_single_value("Shop Settings", "fiscal_year_start") or ETHIOPIAN
@@ -0,0 +1,130 @@
+"""Tests for the Message Batches client against a local stand-in server.
+
+No Frappe DB or network access required.
+Run standalone:  python -m pytest gebeyaerp/tests/test_claude_batch.py -v
+"""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from gebeyaerp.services.claude_batch import (
+    get_batch,
+    iter_batch_results,
+    result_error,
+    submit_batch,
+)
+
+
+# ─── Stand-in batch server ───────────────────────────────────────────────────
+
+class _StandInBatchHandler(BaseHTTPRequestHandler):
+    """Implements create / retrieve / results for a single in-memory batch.
+
+    Every request "succeeds" with an echo of its custom_id, except custom_ids
+    ending in "--fail", which come back errored.
+    """
+
+    batches = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if self.path != "/v1/messages/batches" or not self.headers.get("x-api-key"):
+            return self._send(404, {"error": "not found"})
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        batch_id = f"msgbatch_{len(self.batches) + 1}"
+        self.batches[batch_id] = body["requests"]
+        self._send(200, {"id": batch_id, "processing_status": "in_progress"})
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        batch_id = parts[3] if len(parts) > 3 else None
+        if batch_id not in self.batches:
+            return self._send(404, {"error": "not found"})
+
+        base = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+        if parts[-1] != "results":
+            return self._send(200, {
+                "id": batch_id,
+                "processing_status": "ended",
+                "created_at": "2026-01-01T00:00:00Z",
+                "ended_at": "2026-01-01T00:10:00Z",
+                "results_url": f"{base}/v1/messages/batches/{batch_id}/results",
+            })
+
+        lines = []
+        for req in self.batches[batch_id]:
+            if req["custom_id"].endswith("--fail"):
+                result = {"type": "errored", "error": {"type": "error", "error": {
+                    "type": "invalid_request_error", "message": "bad request"}}}
+            else:
+                result = {"type": "succeeded", "message": {
+                    "model": req["params"]["model"],
+                    "content": [{"type": "text", "text": f"report for {req['custom_id']}"}],
+                    "usage": {"input_tokens": 10, "output_tokens": 20},
+                }}
+            lines.append(json.dumps({"custom_id": req["custom_id"], "result": result}))
+        self._send(200, "\n".join(lines).encode(), "application/binary")
+
+
+class TestClaudeBatchClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), _StandInBatchHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _requests(self, *custom_ids):
+        return [
+            {"custom_id": cid, "params": {"model": "claude-test", "max_tokens": 10,
+                                          "messages": [{"role": "user", "content": "hi"}]}}
+            for cid in custom_ids
+        ]
+
+    def test_submit_poll_and_fetch_results(self):
+        batch = submit_batch(self._requests("PC-1--cfo", "PC-2--cfo"), "sk-test", self.base_url)
+        self.assertEqual(batch["processing_status"], "in_progress")
+
+        batch = get_batch(batch["id"], "sk-test", self.base_url)
+        self.assertEqual(batch["processing_status"], "ended")
+
+        results = dict(iter_batch_results(batch, "sk-test", self.base_url))
+        self.assertEqual(set(results), {"PC-1--cfo", "PC-2--cfo"})
+        message = results["PC-1--cfo"]["message"]
+        self.assertEqual(message["content"][0]["text"], "report for PC-1--cfo")
+        self.assertEqual(message["usage"]["output_tokens"], 20)
+
+    def test_errored_result_is_reported(self):
+        batch = submit_batch(self._requests("PC-3--fail"), "sk-test", self.base_url)
+        batch = get_batch(batch["id"], "sk-test", self.base_url)
+        (custom_id, result), = list(iter_batch_results(batch, "sk-test", self.base_url))
+
+        self.assertEqual(custom_id, "PC-3--fail")
+        self.assertEqual(result["type"], "errored")
+        self.assertIn("bad request", result_error(result))
+
+    def test_unknown_batch_raises(self):
+        with self.assertRaises(Exception):
+            get_batch("msgbatch_missing", "sk-test", self.base_url)
+
+
+if __name__ == "__main__":
+    unittest.main()
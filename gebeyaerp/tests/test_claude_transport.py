@@ -0,0 +1,123 @@
+"""Tests for the record/replay Claude transport.
+
+No Frappe DB or network access required.
+Run standalone:  python -m pytest gebeyaerp/tests/test_claude_transport.py -v
+"""
+
+import shutil
+import tempfile
+import time
+import unittest
+
+import requests
+
+from gebeyaerp.services.claude_transport import (
+    LiveTransport,
+    RecordingTransport,
+    ReplayTransport,
+    TransportResponse,
+    make_transport,
+    request_key,
+)
+
+
+PAYLOAD = {
+    "model": "claude-test",
+    "max_tokens": 100,
+    "system": "You are a CFO.",
+    "messages": [{"role": "user", "content": "FINANCIAL KPIs: {}"}],
+}
+
+
+class _CannedTransport:
+    """Inner transport that answers every request with a fixed message."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, path, payload, headers, timeout):
+        self.calls += 1
+        return TransportResponse(200, {
+            "model": payload["model"],
+            "content": [{"type": "text", "text": f"analysis #{self.calls}"}],
+            "usage": {"input_tokens": 12, "output_tokens": 34},
+        }, {"request-id": "req_1", "x-other": "dropped"})
+
+
+class TestClaudeTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def _record(self):
+        inner = _CannedTransport()
+        RecordingTransport(inner, self.directory).post("/v1/messages", PAYLOAD, {}, 30)
+        return inner
+
+    def test_request_key_ignores_dict_order(self):
+        reordered = dict(reversed(list(PAYLOAD.items())))
+        self.assertEqual(request_key("/v1/messages", PAYLOAD), request_key("/v1/messages", reordered))
+        self.assertNotEqual(request_key("/v1/messages", PAYLOAD), request_key("/v1/other", PAYLOAD))
+
+    def test_replay_returns_the_recorded_response(self):
+        self._record()
+        response = ReplayTransport(self.directory).post("/v1/messages", PAYLOAD, {}, 30)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["content"][0]["text"], "analysis #1")
+        self.assertEqual(response.headers, {"request-id": "req_1"})
+        response.raise_for_status()
+
+    def test_replay_without_recording_fails_loudly(self):
+        other = dict(PAYLOAD, system="You are a COO.")
+        with self.assertRaises(LookupError):
+            ReplayTransport(self.directory).post("/v1/messages", other, {}, 30)
+
+    def test_replay_injects_latency(self):
+        self._record()
+        start = time.perf_counter()
+        ReplayTransport(self.directory, latency=0.05).post("/v1/messages", PAYLOAD, {}, 30)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_injected_errors_are_reproducible(self):
+        self._record()
+
+        def statuses(seed):
+            transport = ReplayTransport(self.directory, error_rate=0.5, seed=seed)
+            return [transport.post("/v1/messages", PAYLOAD, {}, 30).status_code for _ in range(20)]
+
+        self.assertEqual(statuses(7), statuses(7))
+        self.assertEqual(set(statuses(7)), {200, 529})
+
+    def test_seeded_error_rate_holds_across_calls(self):
+        self._record()
+        transport = ReplayTransport(self.directory, error_rate=0.3, seed=11)
+        statuses = [transport.post("/v1/messages", PAYLOAD, {}, 30).status_code for _ in range(400)]
+        self.assertAlmostEqual(statuses.count(529) / len(statuses), 0.3, delta=0.07)
+
+    def test_injected_error_kinds(self):
+        self._record()
+        throttled = ReplayTransport(self.directory, error_rate=1, error_kind="rate_limit")
+        response = throttled.post("/v1/messages", PAYLOAD, {}, 30)
+        self.assertEqual(response.status_code, 429)
+        with self.assertRaises(requests.HTTPError):
+            response.raise_for_status()
+
+        offline = ReplayTransport(self.directory, error_rate=1, error_kind="connection")
+        with self.assertRaises(requests.ConnectionError):
+            offline.post("/v1/messages", PAYLOAD, {}, 30)
+
+    def test_make_transport(self):
+        self.assertIsInstance(make_transport("live", "https://example.test/"), LiveTransport)
+        self.assertIsInstance(
+            make_transport("replay", "", self.directory, latency=0), ReplayTransport
+        )
+        with self.assertRaises(ValueError):
+            make_transport("record", "https://example.test")       # no directory
+        with self.assertRaises(ValueError):
+            make_transport("mock", "https://example.test", self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
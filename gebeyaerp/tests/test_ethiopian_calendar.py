@@ -0,0 +1,77 @@
+"""Pure unit tests for bulk Ethiopian calendar conversion and fiscal ranges.
+
+Uses unittest.TestCase (no Frappe DB required).
+Run standalone:  python -m pytest gebeyaerp/tests/test_ethiopian_calendar.py -v
+"""
+
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from gebeyaerp.utils import ethiopian_calendar as ec
+
+
+# 1999-01-01 … 2031-12-31: several leap cycles on both calendars
+DATES = [date(1999, 1, 1) + timedelta(days=i) for i in range(12053)]
+
+
+def _rows(columns):
+    return [tuple(int(v) for v in row) for row in zip(*columns)]
+
+
+class TestBulkConversion(unittest.TestCase):
+
+    def _check_matches_scalar(self):
+        self.assertEqual(_rows(ec.from_gregorian_many(DATES)), [ec.from_gregorian(d) for d in DATES])
+        self.assertEqual(
+            _rows(ec.fiscal_positions_many(DATES)), [ec.fiscal_position(d) for d in DATES]
+        )
+        back = ec.to_gregorian_many(*ec.from_gregorian_many(DATES))
+        self.assertEqual([ec.as_date(str(d)) for d in back], DATES)
+
+    @unittest.skipIf(ec.np is None, "NumPy not installed")
+    def test_numpy_matches_scalar_conversion(self):
+        self._check_matches_scalar()
+
+    def test_fallback_without_numpy(self):
+        with mock.patch.object(ec, "np", None):
+            self._check_matches_scalar()
+            self.assertEqual(ec.from_gregorian_many([]), ([], [], []))
+
+    @unittest.skipIf(ec.np is None, "NumPy not installed")
+    def test_accepts_strings_and_datetime64(self):
+        years, months, days = ec.from_gregorian_many(["2023-09-11", "2024-09-11"])
+        self.assertEqual(_rows((years, months, days)), [(2015, 13, 6), (2017, 1, 1)])
+
+        as_datetime64 = ec.np.array(["2023-09-11"], dtype="datetime64[D]")
+        self.assertEqual(_rows(ec.from_gregorian_many(as_datetime64)), [(2015, 13, 6)])
+
+
+class TestFiscalRanges(unittest.TestCase):
+
+    def test_thirteen_months_cover_the_year_without_gaps(self):
+        ranges = ec.fiscal_period_ranges(2016)
+        self.assertEqual(len(ranges), 13)
+        self.assertEqual(ranges[0][1], "2023-07-08")
+        self.assertEqual(ranges[-1][2], "2024-07-07")
+        # Pagume 2015 E.C. (leap year) has 6 days
+        self.assertEqual(ranges[2], ("FY2016-M03", "2023-09-06", "2023-09-11"))
+        for (_k1, _s1, end), (_k2, start, _e2) in zip(ranges, ranges[1:]):
+            self.assertEqual(ec.as_date(end) + timedelta(days=1), ec.as_date(start))
+
+    def test_quarters_and_year(self):
+        quarters = ec.fiscal_period_ranges(2017, "quarter")
+        self.assertEqual([k for k, _s, _e in quarters], ["FY2017-Q1", "FY2017-Q2", "FY2017-Q3", "FY2017-Q4"])
+        self.assertEqual(quarters[0][1], ec.fiscal_period_ranges(2017, "year")[0][1])
+        with self.assertRaises(ValueError):
+            ec.fiscal_period_ranges(2017, "week")
+
+    def test_sql_period_case(self):
+        case = ec.sql_period_case("si.posting_date", ec.fiscal_period_ranges(2017, "year"))
+        self.assertEqual(
+            case, "CASE WHEN si.posting_date BETWEEN '2024-07-08' AND '2025-07-07' THEN 'FY2017' END"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
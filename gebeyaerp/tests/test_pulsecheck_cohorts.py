@@ -0,0 +1,78 @@
+"""Pure unit tests for the PulseCheck cohort retention engine.
+
+Uses unittest.TestCase (no Frappe DB required).
+Run standalone:  python -m pytest gebeyaerp/tests/test_pulsecheck_cohorts.py -v
+"""
+
+import unittest
+
+from gebeyaerp.services.pulsecheck_cohorts import (
+    churn_inputs,
+    first_months,
+    month_range,
+    retention_matrix,
+    shift_month,
+)
+from gebeyaerp.services.pulsecheck_kpis import calc_marketing_kpis
+
+
+ACTIVITY = {
+    "2026-01": {"Abebe": 100, "Sara": 200},
+    "2026-02": {"Abebe": 150, "Kebede": 50},
+    "2026-03": {"Abebe": 120, "Kebede": 60, "Meron": 80},
+}
+
+
+class TestMonths(unittest.TestCase):
+
+    def test_month_range_crosses_year_end(self):
+        self.assertEqual(month_range("2025-11", "2026-02"), ["2025-11", "2025-12", "2026-01", "2026-02"])
+
+    def test_shift_month(self):
+        self.assertEqual(shift_month("2026-01", -1), "2025-12")
+        self.assertEqual(shift_month("2025-12", 13), "2027-01")
+
+
+class TestCohorts(unittest.TestCase):
+
+    def test_first_months(self):
+        self.assertEqual(first_months(ACTIVITY), {
+            "Abebe": "2026-01", "Sara": "2026-01", "Kebede": "2026-02", "Meron": "2026-03",
+        })
+
+    def test_retention_matrix(self):
+        matrix = retention_matrix(ACTIVITY)
+        self.assertEqual(matrix[0], {"cohort": "2026-01", "size": 2, "retention": [1.0, 0.5, 0.5]})
+        self.assertEqual(matrix[1], {"cohort": "2026-02", "size": 1, "retention": [1.0, 1.0]})
+        self.assertEqual(matrix[2]["retention"], [1.0])
+
+    def test_churn_against_preceding_period(self):
+        # February base {Abebe, Kebede} both bought again in March
+        march = churn_inputs(ACTIVITY, ["2026-03"])
+        self.assertEqual(march["churn_rate"], 0.0)
+        self.assertEqual(march["net_revenue_retention"], 0.9)      # 180 / 200
+
+        # January base {Abebe, Sara}: Sara is lost
+        february = churn_inputs(ACTIVITY, ["2026-02"])
+        self.assertEqual(february["churn_rate"], 0.5)
+        self.assertEqual(february["customers_retained"], 1)
+
+    def test_no_base_gives_no_rate(self):
+        self.assertIsNone(churn_inputs(ACTIVITY, ["2026-01"])["churn_rate"])
+
+    def test_marketing_kpis_use_observed_churn(self):
+        data = {"customers_start": 100, "customers_end": 120, "new_customers": 20,
+                "arpu": 50, "gross_margin": 0.3, "churn_rate": 0.25,
+                "net_revenue_retention": 0.9}
+        retention = calc_marketing_kpis(data)["Retention"]
+        self.assertEqual(retention["Churn_Rate"], "25.0%")
+        self.assertEqual(retention["Retention_Rate"], "75.0%")
+        self.assertEqual(retention["Net_Revenue_Retention"], "90.0%")
+
+        # No cohort figures → count-based estimate (0% churn here)
+        del data["churn_rate"], data["net_revenue_retention"]
+        self.assertEqual(calc_marketing_kpis(data)["Retention"]["Churn_Rate"], "0.0%")
+
+
+if __name__ == "__main__":
+    unittest.main()
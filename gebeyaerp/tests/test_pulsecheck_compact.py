@@ -0,0 +1,137 @@
+"""Pure unit tests for PulseCheck consultant context compaction.
+
+Uses unittest.TestCase (no Frappe DB required).
+Run standalone:  python -m pytest gebeyaerp/tests/test_pulsecheck_compact.py -v
+"""
+
+import json
+import unittest
+
+from gebeyaerp.services.pulsecheck_compact import (
+    build_consultant_input,
+    compact_report,
+    estimate_tokens,
+    flatten_kpis,
+    split_sections,
+    truncate_to_tokens,
+)
+
+
+_FILLER = "Margins are compressing because supplier prices rose faster than shelf prices. " * 20
+
+CFO_REPORT = f"""Here is my financial analysis.
+
+**Executive Summary** — The shop is profitable but cash-tight.
+Liquidity is the main risk.
+
+**Red Flags** — Current ratio of 0.8 is below the 1.2 retail norm.
+
+**Green Flags** — Gross margin of 32% beats the sector.
+{_FILLER}
+
+**3 CFO Directives** — 1. Cut slow stock. 2. Renegotiate terms. 3. Build a cash buffer.
+
+**Benchmark Context** — {_FILLER}
+"""
+
+
+# ─── estimate_tokens ─────────────────────────────────────────────────────────
+
+class TestEstimateTokens(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens(None), 0)
+
+    def test_words_and_punctuation(self):
+        # "Hello" (2) + "," (1) + "world" (2) + "!" (1)
+        self.assertEqual(estimate_tokens("Hello, world!"), 6)
+
+    def test_roughly_four_chars_per_token_for_prose(self):
+        tokens = estimate_tokens(_FILLER)
+        self.assertGreater(tokens, len(_FILLER) / 6)
+        self.assertLess(tokens, len(_FILLER) / 3)
+
+
+# ─── split_sections / compact_report ─────────────────────────────────────────
+
+class TestCompactReport(unittest.TestCase):
+
+    def test_split_sections_by_bold_headings(self):
+        headings = [h for h, _b in split_sections(CFO_REPORT)]
+        self.assertEqual(headings, [
+            "", "Executive Summary", "Red Flags", "Green Flags",
+            "3 CFO Directives", "Benchmark Context",
+        ])
+
+    def test_split_sections_accepts_markdown_headings(self):
+        sections = split_sections("## Verdict\nStrong.\n## Outlook\nStable.")
+        self.assertEqual(sections, [("Verdict", "Strong."), ("Outlook", "Stable.")])
+
+    def test_large_budget_keeps_every_section_but_the_preamble(self):
+        compact = compact_report(CFO_REPORT, "cfo", 10000)
+        self.assertNotIn("Here is my financial analysis", compact)
+        self.assertIn("**Benchmark Context**", compact)
+
+    def test_tight_budget_drops_low_priority_sections_first(self):
+        compact = compact_report(CFO_REPORT, "cfo", 120)
+        self.assertIn("Current ratio of 0.8", compact)
+        self.assertIn("Renegotiate terms", compact)
+        self.assertNotIn("Benchmark Context", compact)
+        self.assertNotIn("Green Flags", compact)
+        self.assertLessEqual(estimate_tokens(compact), 120)
+
+    def test_essential_sections_are_truncated_not_dropped(self):
+        report = "**Red Flags** — " + _FILLER + "\n**3 CFO Directives** — " + _FILLER
+        compact = compact_report(report, "cfo", 200)
+        self.assertIn("**Red Flags**", compact)
+        self.assertIn("**3 CFO Directives**", compact)
+        self.assertIn("…", compact)
+
+    def test_report_without_headings_is_truncated(self):
+        compact = compact_report(_FILLER, "coo", 50)
+        self.assertLessEqual(estimate_tokens(compact), 55)
+
+    def test_truncate_keeps_whole_sentences(self):
+        text = "First sentence here. Second sentence here. Third one."
+        self.assertEqual(truncate_to_tokens(text, 8), "First sentence here. …")
+
+
+# ─── build_consultant_input ──────────────────────────────────────────────────
+
+class TestBuildConsultantInput(unittest.TestCase):
+
+    KPIS = {
+        "financial": {"Liquidity": {"Current_Ratio": 0.8, "Quick_Ratio": 0.4}},
+        "marketing": {"Retention": {"Churn_Rate": "12.5%"}},
+        "operating": {},
+    }
+
+    def test_flatten_kpis_keeps_every_value(self):
+        line = flatten_kpis(self.KPIS["financial"])
+        self.assertEqual(line, "Liquidity: Current_Ratio 0.8; Quick_Ratio 0.4")
+
+    def test_smaller_than_full_prompt_and_keeps_key_content(self):
+        reports = {"cfo": CFO_REPORT, "cmo": CFO_REPORT, "coo": CFO_REPORT}
+        full = "CONTEXT\n" + "".join(
+            json.dumps(v, indent=2) for v in self.KPIS.values()
+        ) + "".join(reports.values())
+
+        compact = build_consultant_input("CONTEXT\n", self.KPIS, reports, budget=600)
+
+        self.assertLess(estimate_tokens(compact), estimate_tokens(full) / 2)
+        self.assertIn("Current_Ratio 0.8", compact)
+        self.assertIn("Churn_Rate 12.5%", compact)
+        self.assertIn("--- CMO REPORT (key sections) ---", compact)
+        self.assertNotIn("[OPERATING]", compact)
+
+    def test_short_reports_donate_unused_budget(self):
+        reports = {"cfo": "**Red Flags** — none.", "cmo": CFO_REPORT, "coo": ""}
+        compact = build_consultant_input("", {}, reports, budget=400)
+        self.assertIn("**Red Flags** — none.", compact)
+        self.assertIn("Renegotiate terms", compact)
+        self.assertNotIn("COO REPORT", compact)
+
+
+if __name__ == "__main__":
+    unittest.main()
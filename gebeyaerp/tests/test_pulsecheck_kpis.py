@@ -10,6 +10,7 @@ from gebeyaerp.services.pulsecheck_kpis import (
     calc_financial_kpis,
     calc_marketing_kpis,
     calc_operating_kpis,
+    kpi_facts,
     pct,
     safe_div,
 )
@@ -278,5 +279,24 @@ class TestCalcOperatingKpisWithData(unittest.TestCase):
         )
 
 
+# ─── kpi_facts ───────────────────────────────────────────────────────────────
+
+class TestKpiFacts(unittest.TestCase):
+
+    def test_flattens_to_typed_rows(self):
+        facts = kpi_facts({
+            "financial": {"Profitability": {"Gross_Margin": "32.5%"}},
+            "operating": {"Workforce": {"Revenue_Per_Employee": "ETB 20,000"}},
+        })
+        self.assertEqual(facts, [
+            ("financial.Profitability.Gross_Margin", "financial", 32.5, "32.5%"),
+            ("operating.Workforce.Revenue_Per_Employee", "operating", 20000.0, "ETB 20,000"),
+        ])
+
+    def test_skips_non_numeric_values(self):
+        facts = kpi_facts({"marketing": {"Unit_Economics": {"Status": "Healthy", "LTV_CAC": 3.2}}})
+        self.assertEqual([code for code, *_ in facts], ["marketing.Unit_Economics.LTV_CAC"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,150 @@
+"""Pure unit tests for the local rule-based PulseCheck analyst.
+
+Uses unittest.TestCase (no Frappe DB required).
+Run standalone:  python -m pytest gebeyaerp/tests/test_pulsecheck_local.py -v
+"""
+
+import unittest
+
+from gebeyaerp.services.pulsecheck_compact import split_sections
+from gebeyaerp.services.pulsecheck_kpis import (
+    calc_financial_kpis,
+    calc_marketing_kpis,
+    calc_operating_kpis,
+)
+from gebeyaerp.services.pulsecheck_local import (
+    ENGINE_NOTE,
+    evaluate,
+    generate_local_analysis,
+    health_rating,
+    health_score,
+    parse_kpi_value,
+)
+
+
+def _data():
+    """A cash-tight grocery: thin margins, slow stock, healthy collections."""
+    return {
+        "financial": {
+            "Revenue": 100000, "COGS": 80000, "Gross_Profit": 20000, "Net_Income": 1000,
+            "cash_equivalents": 5000, "accounts_receivable": 2000, "inventory": 40000,
+            "accounts_payable": 30000, "shareholders_equity": 17000,
+        },
+        "marketing": {
+            "revenue": 100000, "gross_margin": 0.2, "customers_start": 100,
+            "customers_end": 110, "new_customers": 30, "arpu": 900,
+        },
+        "operating": {
+            "Revenue": 100000, "COGS": 80000, "Net_Income": 20000, "inventory": 40000,
+            "accounts_receivable": 2000, "accounts_payable": 30000, "employees": 4,
+            "units_produced": 500, "total_capacity": 500,
+            "orders_on_time": 90, "orders_total": 90,
+        },
+    }
+
+
+def _kpis(data=None):
+    data = data or _data()
+    return {
+        "financial": calc_financial_kpis(data["financial"]),
+        "marketing": calc_marketing_kpis(data["marketing"]),
+        "operating": calc_operating_kpis(data["operating"]),
+    }
+
+
+# ─── parse_kpi_value ─────────────────────────────────────────────────────────
+
+class TestParseKpiValue(unittest.TestCase):
+
+    def test_percentage_string(self):
+        self.assertEqual(parse_kpi_value("15.3%"), 15.3)
+
+    def test_currency_with_thousands_separator(self):
+        self.assertEqual(parse_kpi_value("ETB 25,000"), 25000.0)
+
+    def test_negative_and_plain_numbers(self):
+        self.assertEqual(parse_kpi_value("-4.5%"), -4.5)
+        self.assertEqual(parse_kpi_value(1.57), 1.57)
+
+    def test_non_numeric(self):
+        self.assertIsNone(parse_kpi_value("Healthy"))
+        self.assertIsNone(parse_kpi_value(None))
+
+
+# ─── evaluate / scoring ──────────────────────────────────────────────────────
+
+class TestEvaluate(unittest.TestCase):
+
+    def test_thresholds_both_directions(self):
+        findings = {f["label"]: f for f in evaluate("coo", _kpis()["operating"])}
+        self.assertEqual(findings["Days sales outstanding"]["status"], "good")    # 7.3 ≤ 15
+        self.assertEqual(findings["Cash conversion cycle (days)"]["status"], "watch")
+        self.assertEqual(findings["Days of inventory"]["status"], "bad")          # 182.5 > 90
+        self.assertEqual(findings["On-time fulfilment"]["benchmark"], "≥ 95%")
+
+    def test_unrecorded_inputs_are_not_measured(self):
+        # No marketing spend recorded → CAC-based KPIs are skipped, not "bad"
+        labels = {f["label"] for f in evaluate("cmo", _kpis()["marketing"], _data()["marketing"])}
+        self.assertNotIn("LTV:CAC ratio", labels)
+        self.assertNotIn("Revenue per marketing birr", labels)
+        self.assertIn("Customer churn", labels)
+
+    def test_zero_values_from_recorded_inputs_are_findings(self):
+        data = _data()
+        data["operating"]["accounts_receivable"] = 0
+        data["marketing"].update(customers_end=130)
+        kpis = _kpis(data)
+
+        coo = {f["label"]: f for f in evaluate("coo", kpis["operating"], data["operating"])}
+        cmo = {f["label"]: f for f in evaluate("cmo", kpis["marketing"], data["marketing"])}
+        self.assertEqual(coo["Days sales outstanding"]["value"], 0)
+        self.assertEqual(coo["Days sales outstanding"]["status"], "good")
+        self.assertEqual(cmo["Customer churn"]["value"], 0)
+        self.assertEqual(cmo["Customer churn"]["status"], "good")
+
+    def test_without_inputs_only_missing_kpis_are_skipped(self):
+        findings = {f["label"]: f for f in evaluate("coo", {"Cash_Conversion": {"Days_Sales_Outstanding": 0}})}
+        self.assertEqual(list(findings), ["Days sales outstanding"])
+        self.assertEqual(findings["Days sales outstanding"]["status"], "good")
+
+    def test_health_score_and_rating(self):
+        findings = [{"status": "good"}, {"status": "watch"}, {"status": "bad"}, {"status": "good"}]
+        self.assertAlmostEqual(health_score(findings), 5 / 8)
+        self.assertEqual(health_rating(health_score(findings)), "Stable")
+        self.assertIsNone(health_score([]))
+        self.assertEqual(health_rating(None), "Insufficient data")
+
+
+# ─── generate_local_analysis ─────────────────────────────────────────────────
+
+class TestGenerateLocalAnalysis(unittest.TestCase):
+
+    def test_sections_match_claude_prompt_headings(self):
+        analysis = generate_local_analysis(_kpis(), {"companyName": "Abebe Shop"}, _data())
+        headings = {stage: [h for h, _b in split_sections(text) if h] for stage, text in analysis.items()}
+
+        self.assertEqual(headings["cfo"], [
+            "Executive Summary", "Red Flags", "Green Flags", "3 CFO Directives", "Benchmark Context",
+        ])
+        self.assertIn("3 COO Directives", headings["coo"])
+        self.assertIn("Growth Engine Score", headings["cmo"])
+        self.assertIn("Strategic Recommendation", headings["consultant"])
+        self.assertTrue(all(text.startswith(ENGINE_NOTE) for text in analysis.values()))
+
+    def test_findings_drive_the_content(self):
+        analysis = generate_local_analysis(_kpis(), {"companyName": "Abebe Shop"}, _data())
+        self.assertIn("Days of inventory: **182.5**", analysis["coo"])
+        self.assertIn("Abebe Shop", analysis["consultant"])
+        self.assertIn("Capital Restructuring", analysis["consultant"])
+        self.assertIn("Thin margins", analysis["consultant"])     # margin × churn interdependency
+
+    def test_empty_period_does_not_fabricate_findings(self):
+        empty = {"financial": {}, "marketing": {}, "operating": {}}
+        analysis = generate_local_analysis(_kpis(empty), data=empty)
+        self.assertIn("Not enough data", analysis["consultant"])
+        self.assertIn("Record complete sales", analysis["cfo"])
+        self.assertNotIn("Red flags across", analysis["consultant"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Pure unit tests for compressed PulseCheck Report text storage.
+
+Uses unittest.TestCase (no Frappe DB required).
+Run standalone:  python -m pytest gebeyaerp/tests/test_pulsecheck_storage.py -v
+"""
+
+import base64
+import os
+import unittest
+
+from gebeyaerp.services.pulsecheck_storage import (
+    PREFIX,
+    compress_text,
+    decompress_text,
+    is_compressed,
+)
+
+
+REPORT = (
+    "**Executive Summary** — Gross margin of 32% beats the sector; liquidity is tight.\n"
+    "**Red Flags** — Quick ratio 0.4 vs 1.0 benchmark. ብር ፲፻ ተቀማጭ።\n"
+) * 60
+
+
+class TestPulseCheckStorage(unittest.TestCase):
+
+    def test_round_trip_preserves_unicode(self):
+        stored = compress_text(REPORT)
+        self.assertTrue(is_compressed(stored))
+        self.assertEqual(decompress_text(stored), REPORT)
+
+    def test_large_markdown_shrinks(self):
+        self.assertLess(len(compress_text(REPORT)), len(REPORT) / 3)
+
+    def test_small_and_non_text_values_stay_plain(self):
+        self.assertEqual(compress_text("short report"), "short report")
+        self.assertIsNone(compress_text(None))
+        self.assertEqual(compress_text(42), 42)
+
+    def test_incompressible_text_stays_plain(self):
+        noise = base64.b64encode(os.urandom(4000)).decode()
+        self.assertEqual(compress_text(noise), noise)
+
+    def test_plain_legacy_values_pass_through(self):
+        self.assertEqual(decompress_text(REPORT), REPORT)
+        self.assertIsNone(decompress_text(None))
+
+    def test_already_compressed_is_not_compressed_twice(self):
+        stored = compress_text(REPORT)
+        self.assertEqual(compress_text(stored), stored)
+        self.assertTrue(stored.startswith(PREFIX))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Pure unit tests for the Ethiopian calendar and Daily Summary rollup periods.
+
+Uses unittest.TestCase (no Frappe DB required).
+Run standalone:  python -m pytest gebeyaerp/tests/test_rollup_periods.py -v
+"""
+
+import unittest
+from datetime import date
+
+from gebeyaerp.services.rollup_periods import periods_for, same_period_last_year
+from gebeyaerp.utils.ethiopian_calendar import (
+    fiscal_position,
+    fiscal_year_range,
+    from_gregorian,
+    to_gregorian,
+)
+
+
+class TestEthiopianCalendar(unittest.TestCase):
+
+    def test_new_year(self):
+        self.assertEqual(from_gregorian(date(2024, 9, 11)), (2017, 1, 1))
+        self.assertEqual(to_gregorian(2016, 1, 1), date(2023, 9, 12))
+
+    def test_pagume_in_leap_year(self):
+        # 2015 E.C. is a leap year: Pagume has 6 days
+        self.assertEqual(from_gregorian(date(2023, 9, 11)), (2015, 13, 6))
+        with self.assertRaises(ValueError):
+            to_gregorian(2016, 13, 6)
+
+    def test_genna(self):
+        self.assertEqual(from_gregorian("2024-01-07"), (2016, 4, 28))
+
+    def test_fiscal_year_runs_hamle_to_sene(self):
+        self.assertEqual(fiscal_year_range(2017), (date(2024, 7, 8), date(2025, 7, 7)))
+        # Tikimt 9, 2019 → FY2019, Q2, fiscal month 5
+        self.assertEqual(fiscal_position("2026-10-19"), (2019, 2, 5))
+
+
+class TestRollupPeriods(unittest.TestCase):
+
+    def test_periods_for_ethiopian_fiscal_year(self):
+        periods = {p[0]: p[1:] for p in periods_for("2026-10-19")}
+        self.assertEqual(periods["Week"], ("2026-W43", date(2026, 10, 19), date(2026, 10, 25)))
+        self.assertEqual(periods["Month"][0], "2026-10")
+        self.assertEqual(periods["Fiscal Month"], ("FY2019-M05", date(2026, 10, 11), date(2026, 11, 9)))
+        self.assertEqual(periods["Fiscal Year"], ("FY2019", date(2026, 7, 8), date(2027, 7, 7)))
+
+    def test_gregorian_fiscal_year(self):
+        periods = {p[0]: p[1:] for p in periods_for("2026-10-19", "January (Gregorian)")}
+        self.assertEqual(periods["Fiscal Quarter"], ("FY2026-Q4", date(2026, 10, 1), date(2026, 12, 31)))
+
+    def test_same_period_last_year(self):
+        self.assertEqual(same_period_last_year("Fiscal Month", "2026-10-19")[0], "FY2018-M05")
+        self.assertEqual(same_period_last_year("Week", "2026-10-19")[0], "2025-W43")
+        # Pagume maps to the previous year's Pagume
+        self.assertEqual(
+            same_period_last_year("Fiscal Month", "2027-09-10"),
+            ("FY2019-M03", date(2026, 9, 6), date(2026, 9, 10)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Pure unit tests for the streaming sales baselines.
+
+Uses unittest.TestCase (no Frappe DB required).
+Run standalone:  python -m pytest gebeyaerp/tests/test_sales_baselines.py -v
+"""
+
+import random
+import unittest
+from datetime import date, timedelta
+
+from gebeyaerp.services.sales_baselines import (
+    WARMUP_DAYS,
+    metric_values,
+    new_state,
+    update,
+)
+
+
+def _weekly_sales(days, seed=1):
+    """(day, sales) with a busy Saturday, a quiet Sunday and ±15% noise."""
+    rng = random.Random(seed)
+    day = date(2026, 1, 5)      # a Monday
+    for _ in range(days):
+        base = 10000 * {5: 1.6, 6: 0.5}.get(day.weekday(), 1.0)
+        yield day, base * rng.uniform(0.85, 1.15)
+        day += timedelta(days=1)
+
+
+class TestSalesBaselines(unittest.TestCase):
+
+    def _feed(self, series, metric="total_sales"):
+        state, flagged = new_state(), []
+        for day, value in series:
+            if update(state, value, metric, day.weekday())["anomaly"]:
+                flagged.append(day)
+        return state, flagged
+
+    def test_normal_weeks_are_not_flagged(self):
+        _state, flagged = self._feed(_weekly_sales(120))
+        self.assertEqual(flagged, [])
+
+    def test_learns_day_of_week_pattern(self):
+        state, _flagged = self._feed(_weekly_sales(120))
+        self.assertGreater(state["season"][5], 1.3)     # Saturday
+        self.assertLess(state["season"][6], 0.7)        # Sunday
+        self.assertAlmostEqual(sum(state["season"]) / 7, 1.0)
+
+    def test_busy_saturday_is_not_a_spike(self):
+        state, _flagged = self._feed(_weekly_sales(118))       # ends on a Friday
+        result = update(state, 16000, "total_sales", 5)
+        self.assertFalse(result["anomaly"])
+
+    def test_sixty_percent_drop_is_flagged(self):
+        state, _flagged = self._feed(_weekly_sales(120))
+        result = update(state, 4000, "total_sales", 2)         # a Wednesday
+        self.assertTrue(result["anomaly"])
+        self.assertLess(result["score"], -3)
+        self.assertAlmostEqual(result["change"], -0.6, delta=0.1)
+
+    def test_outlier_barely_moves_the_baseline(self):
+        state, _flagged = self._feed(_weekly_sales(120))
+        level = state["level"]
+        update(state, 0, "total_sales", 2)
+        self.assertGreater(state["level"], level * 0.9)
+
+    def test_nothing_flagged_during_warmup(self):
+        state = new_state()
+        for i in range(WARMUP_DAYS - 1):
+            update(state, 100 + i % 3, "total_invoices", i % 7)
+        self.assertFalse(update(state, 1, "total_invoices", 0)["anomaly"])
+
+    def test_credit_share_spike_is_flagged(self):
+        rng = random.Random(3)
+        series = [(date(2026, 1, 1) + timedelta(days=i), rng.uniform(0.05, 0.12)) for i in range(60)]
+        state, flagged = self._feed(series, "credit_share")
+        self.assertEqual(flagged, [])
+        result = update(state, 0.45, "credit_share", 0)
+        self.assertTrue(result["anomaly"])
+
+    def test_metric_values(self):
+        values = metric_values({"total_sales": 200, "total_invoices": 4, "credit_given": 50, "cash_collected": 150})
+        self.assertEqual(values["credit_share"], 0.25)
+        self.assertEqual(values["cash_share"], 0.75)
+        self.assertEqual(values["bank_share"], 0)
+
+        empty = metric_values(None)
+        self.assertEqual((empty["total_sales"], empty["total_invoices"]), (0, 0))
+        self.assertIsNone(empty["credit_share"])
+
+
+if __name__ == "__main__":
+    unittest.main()
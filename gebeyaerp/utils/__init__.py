@@ -1,10 +1,14 @@
-"""Shared utility functions for Gebeya ERP."""
+"""Shared utility functions for Gebeya ERP.
 
-import frappe
+Frappe is imported inside the helpers so that the pure submodules
+(e.g. ethiopian_calendar) can be imported and unit tested without it.
+"""
 
 
 def get_shop_settings():
     """Get the Shop Settings singleton."""
+    import frappe
+
     try:
         return frappe.get_single("Shop Settings")
     except Exception:
@@ -13,6 +17,8 @@ def get_shop_settings():
 
 def get_default_company():
     """Get the default company for the current user."""
+    import frappe
+
     return frappe.defaults.get_user_default("Company") or frappe.db.get_single_value(
         "Shop Settings", "company"
     )
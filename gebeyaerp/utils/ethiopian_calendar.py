@@ -0,0 +1,226 @@
+"""Ethiopian calendar conversion and fiscal periods.
+
+The Ethiopian year has 12 months of 30 days plus Pagume, a 13th month of
+5 days (6 in a leap year, i.e. when year % 4 == 3). Dates are converted
+through the Julian Day Number (JDN).
+
+The Ethiopian fiscal year ("July (Ethiopian)" in Shop Settings) starts on
+Hamle 1 (month 11, around 8 July) and is named after the Ethiopian year in
+which it ends: FY 2017 runs from Hamle 1, 2016 to Sene 30, 2017. Its
+periods are the 13 months in order Hamle, Nehase, Pagume, Meskerem … Sene.
+
+The ``*_many`` functions convert whole columns of dates at once with NumPy
+when it is installed (falling back to a per-date loop otherwise), and
+``fiscal_period_ranges``/``sql_period_case`` give period boundaries as
+SQL-ready date strings, so reports can bucket rows by Ethiopian period in
+the database instead of converting each row in Python.
+
+No Frappe imports.
+"""
+
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:     # optional: the *_many helpers loop instead
+    np = None
+
+# JDN of Meskerem 1, year 1 (Amete Mihret)
+EPOCH = 1724221
+# date.toordinal() + this = JDN
+_ORDINAL_TO_JDN = 1721425
+# JDN of 1970-01-01, the zero of numpy datetime64[D]
+_UNIX_EPOCH_JDN = 2440588
+
+MONTH_NAMES = (
+    "Meskerem", "Tikimt", "Hidar", "Tahsas", "Tir", "Yekatit", "Megabit",
+    "Miyazya", "Ginbot", "Sene", "Hamle", "Nehase", "Pagume",
+)
+
+FISCAL_START_MONTH = 11   # Hamle
+
+# Fiscal quarter → fiscal month numbers (1 = Hamle … 13 = Sene)
+FISCAL_QUARTERS = {1: (1, 2, 3, 4), 2: (5, 6, 7), 3: (8, 9, 10), 4: (11, 12, 13)}
+# Fiscal month number → quarter (index 0 unused)
+_QUARTER_OF_MONTH = (0, 1, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4)
+
+
+def is_leap_year(year):
+    """Ethiopian leap year: Pagume has 6 days."""
+    return year % 4 == 3
+
+
+def month_days(year, month):
+    if month == 13:
+        return 6 if is_leap_year(year) else 5
+    return 30
+
+
+def to_jdn(year, month, day):
+    return EPOCH - 1 + 365 * (year - 1) + year // 4 + 30 * (month - 1) + day
+
+
+def from_jdn(jdn):
+    """Return (year, month, day) for a Julian Day Number."""
+    # Count 4-year cycles from year 0, so each cycle ends with its leap
+    # year (year % 4 == 3) and the last day of a cycle is Pagume 6.
+    cycle, r = divmod(jdn - (EPOCH - 365), 1461)
+    year_in_cycle = min(r // 365, 3)
+    day_of_year = r - 365 * year_in_cycle
+    return 4 * cycle + year_in_cycle, day_of_year // 30 + 1, day_of_year % 30 + 1
+
+
+def from_gregorian(value):
+    """Gregorian date → Ethiopian (year, month, day)."""
+    return from_jdn(as_date(value).toordinal() + _ORDINAL_TO_JDN)
+
+
+def to_gregorian(year, month, day):
+    """Ethiopian (year, month, day) → Gregorian date."""
+    if not 1 <= month <= 13 or not 1 <= day <= month_days(year, month):
+        raise ValueError(f"Invalid Ethiopian date: {year}-{month}-{day}")
+    return date.fromordinal(to_jdn(year, month, day) - _ORDINAL_TO_JDN)
+
+
+# ─── Fiscal periods ──────────────────────────────────────────────────────────
+
+def fiscal_month_number(month):
+    """Ethiopian month → position in the fiscal year (Hamle = 1, Sene = 13)."""
+    return (month - FISCAL_START_MONTH) % 13 + 1
+
+
+def calendar_month(fiscal_month):
+    """Position in the fiscal year → Ethiopian month (1 → Hamle, 13 → Sene)."""
+    return (fiscal_month + FISCAL_START_MONTH - 2) % 13 + 1
+
+
+def fiscal_year(year, month):
+    """Fiscal year (named by its end year) of an Ethiopian date."""
+    return year + 1 if month >= FISCAL_START_MONTH else year
+
+
+def fiscal_quarter(fiscal_month):
+    if not 1 <= fiscal_month <= 13:
+        raise ValueError(f"Invalid fiscal month: {fiscal_month}")
+    return _QUARTER_OF_MONTH[fiscal_month]
+
+
+def fiscal_position(value):
+    """Gregorian date → (fiscal year, fiscal quarter, fiscal month)."""
+    year, month, _day = from_gregorian(value)
+    number = fiscal_month_number(month)
+    return fiscal_year(year, month), fiscal_quarter(number), number
+
+
+def fiscal_month_range(fy, fiscal_month):
+    """Gregorian (first, last) day of a fiscal month."""
+    month = calendar_month(fiscal_month)
+    year = fy - 1 if month >= FISCAL_START_MONTH else fy
+    return to_gregorian(year, month, 1), to_gregorian(year, month, month_days(year, month))
+
+
+def fiscal_quarter_range(fy, quarter):
+    months = FISCAL_QUARTERS[quarter]
+    return fiscal_month_range(fy, months[0])[0], fiscal_month_range(fy, months[-1])[1]
+
+
+def fiscal_year_range(fy):
+    return fiscal_month_range(fy, 1)[0], fiscal_month_range(fy, 13)[1]
+
+
+def fiscal_period_ranges(fy, period="month"):
+    """SQL-ready boundaries of every month, quarter or the whole of a fiscal year.
+
+    Args:
+        fy: Fiscal year (named by its end year)
+        period: "month" (13 rows, Pagume included), "quarter" (4) or "year" (1)
+
+    Returns:
+        list of (key, "YYYY-MM-DD", "YYYY-MM-DD"), e.g.
+        ("FY2017-M03", "2024-09-06", "2024-09-10") for Pagume 2016
+    """
+    if period == "month":
+        ranges = [(f"FY{fy}-M{m:02d}", *fiscal_month_range(fy, m)) for m in range(1, 14)]
+    elif period == "quarter":
+        ranges = [(f"FY{fy}-Q{q}", *fiscal_quarter_range(fy, q)) for q in FISCAL_QUARTERS]
+    elif period == "year":
+        ranges = [(f"FY{fy}", *fiscal_year_range(fy))]
+    else:
+        raise ValueError(f"Unknown fiscal period: {period}")
+    return [(key, start.isoformat(), end.isoformat()) for key, start, end in ranges]
+
+
+def sql_period_case(column, ranges):
+    """CASE expression mapping a date column to period keys, for GROUP BY.
+
+    Args:
+        column: Trusted column expression, e.g. "posting_date" (not user input)
+        ranges: Output of fiscal_period_ranges (possibly for several years)
+
+    Returns:
+        "CASE WHEN <column> BETWEEN '…' AND '…' THEN 'FY2017-M01' … END"
+    """
+    whens = " ".join(
+        f"WHEN {column} BETWEEN '{start}' AND '{end}' THEN '{key}'"
+        for key, start, end in ranges
+    )
+    return f"CASE {whens} END"
+
+
+# ─── Bulk conversion ─────────────────────────────────────────────────────────
+
+def from_gregorian_many(dates):
+    """Convert many Gregorian dates to Ethiopian in one vectorized pass.
+
+    Args:
+        dates: Sequence of dates, "YYYY-MM-DD" strings or a datetime64 array
+
+    Returns:
+        (years, months, days): int64 arrays with NumPy, lists without it
+    """
+    if np is None:
+        converted = [from_gregorian(value) for value in dates]
+        return tuple(list(column) for column in zip(*converted)) if converted else ([], [], [])
+
+    jdn = _as_day_numbers(dates) + _UNIX_EPOCH_JDN
+    cycle, r = np.divmod(jdn - (EPOCH - 365), 1461)
+    year_in_cycle = np.minimum(r // 365, 3)
+    day_of_year = r - 365 * year_in_cycle
+    return 4 * cycle + year_in_cycle, day_of_year // 30 + 1, day_of_year % 30 + 1
+
+
+def to_gregorian_many(years, months, days):
+    """Convert Ethiopian (year, month, day) columns to Gregorian dates.
+
+    Returns a datetime64[D] array with NumPy, a list of dates without it.
+    Dates are not validated; use to_gregorian for single, untrusted input.
+    """
+    if np is None:
+        return [to_gregorian(y, m, d) for y, m, d in zip(years, months, days)]
+    years, months, days = (np.asarray(a, dtype=np.int64) for a in (years, months, days))
+    jdn = EPOCH - 1 + 365 * (years - 1) + years // 4 + 30 * (months - 1) + days
+    return (jdn - _UNIX_EPOCH_JDN).astype("datetime64[D]")
+
+
+def fiscal_positions_many(dates):
+    """(fiscal years, fiscal quarters, fiscal months) of many Gregorian dates."""
+    if np is None:
+        converted = [fiscal_position(value) for value in dates]
+        return tuple(list(column) for column in zip(*converted)) if converted else ([], [], [])
+
+    years, months, _days = from_gregorian_many(dates)
+    fiscal_months = (months - FISCAL_START_MONTH) % 13 + 1
+    fiscal_years = years + (months >= FISCAL_START_MONTH)
+    quarters = np.asarray(_QUARTER_OF_MONTH)[fiscal_months]
+    return fiscal_years, quarters, fiscal_months
+
+
+def _as_day_numbers(dates):
+    """Days since 1970-01-01 for any array-like of dates."""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def as_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])